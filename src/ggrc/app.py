@@ -187,6 +187,13 @@ def _enable_jasmine():
         Asset("dashboard-js-specs"))
 
 
+def _enable_profiler():
+  """Collect request latency and SQL statistics if enabled in settings."""
+  if getattr(settings, "PROFILER_ENABLED", False):
+    from ggrc.utils import profiler
+    profiler.init_app(app)
+
+
 def _display_sql_queries():
   """Set up display database queries
 
@@ -250,4 +257,5 @@ notifications.register_notification_listeners()
 
 _enable_debug_toolbar()
 _enable_jasmine()
+_enable_profiler()
 _display_sql_queries()
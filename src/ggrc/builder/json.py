@@ -76,6 +76,25 @@ def publish(obj, inclusions=(), inclusion_filter=None):
   return obj
 
 
+def publish_fields(obj, fields):
+  """Translate only the published attributes in ``fields`` of ``obj``.
+
+  Attributes that are not requested are never read, so they don't have to be
+  loaded from the database. Link attributes are published the same way as
+  in ``publish``.
+  """
+  # pylint: disable=protected-access
+  publisher = get_json_builder(obj)
+  ret = {}
+  if 'selfLink' in fields or 'viewLink' in fields:
+    ret.update(publish_base_properties(obj))
+  attrs = [attr for attr in publisher._publish_attrs
+           if getattr(attr, 'attr_name', attr) in fields]
+  inclusions = tuple((attr,) for attr in publisher._include_links)
+  publisher._publish_attrs_for(obj, attrs, ret, inclusions)
+  return ret
+
+
 def update(obj, json_obj):
   """Translate the state represented by ``json_obj`` into update actions
   performed upon the model object ``obj``. After performing the update ``obj``
@@ -0,0 +1,404 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Clients of the shared cache used for resources and permissions.
+
+All clients expose the subset of App Engine memcache.Client API that is used
+in GGRC (get, gets, set, add, cas, delete and their _multi variants,
+flush_all), with the same return value conventions. The client is chosen by
+CACHE_BACKEND setting:
+
+  appengine - App Engine memcache service.
+  memcached - memcached servers from CACHE_SERVERS, spoken to over the
+              memcached text protocol.
+  local     - in-process LRU cache, only consistent within a single process,
+              so entries also expire after CACHE_LOCAL_TTL seconds.
+"""
+
+import cPickle
+import copy
+import hashlib
+import logging
+import socket
+import threading
+import time
+import zlib
+
+from ggrc import settings
+from ggrc.utils.structures import LRUCache
+
+
+logger = logging.getLogger(__name__)
+
+# Return values of delete, same as in google.appengine.api.memcache
+DELETE_NETWORK_FAILURE = 0
+DELETE_ITEM_MISSING = 1
+DELETE_SUCCESSFUL = 2
+
+# Max expiration time in seconds that is treated as relative by memcached
+MAX_RELATIVE_EXPIRATION = 60 * 60 * 24 * 30
+
+_FLAG_PICKLED = 1
+
+
+class LocalClient(object):
+  """In-process cache client backed by a bounded LRU cache.
+
+  Values are copied on every read and write, so callers can't change cached
+  values by mutating the objects they stored or got.
+  """
+
+  def __init__(self, max_size=10000, ttl=None, timer=time.time):
+    self._cache = LRUCache(max_size, ttl, timer=timer)
+    self._timer = timer
+    self._lock = threading.RLock()
+    self._version = 0
+    self._state = threading.local()
+
+  @property
+  def _cas_ids(self):
+    if not hasattr(self._state, "cas_ids"):
+      self._state.cas_ids = {}
+    return self._state.cas_ids
+
+  def _expire_at(self, expiration_time):
+    if not expiration_time:
+      return None
+    if expiration_time > MAX_RELATIVE_EXPIRATION:
+      return expiration_time
+    return self._timer() + expiration_time
+
+  def _get_entry(self, key):
+    """Get (version, value, expire_at) of a live entry or None."""
+    entry = self._cache.get(key)
+    if entry is not None and entry[2] is not None and \
+       entry[2] <= self._timer():
+      self._cache.pop(key, None)
+      return None
+    return entry
+
+  def _store(self, key, value, expiration_time):
+    self._version += 1
+    self._cache[key] = (self._version, copy.deepcopy(value),
+                        self._expire_at(expiration_time))
+    return True
+
+  def get(self, key):
+    with self._lock:
+      entry = self._get_entry(key)
+    return copy.deepcopy(entry[1]) if entry is not None else None
+
+  def gets(self, key):
+    with self._lock:
+      entry = self._get_entry(key)
+      if entry is None:
+        return None
+      self._cas_ids[key] = entry[0]
+      return copy.deepcopy(entry[1])
+
+  def set(self, key, value, time=0):  # pylint: disable=redefined-outer-name
+    with self._lock:
+      return self._store(key, value, time)
+
+  def add(self, key, value, time=0):  # pylint: disable=redefined-outer-name
+    with self._lock:
+      if self._get_entry(key) is not None:
+        return False
+      return self._store(key, value, time)
+
+  def cas(self, key, value, time=0):  # pylint: disable=redefined-outer-name
+    with self._lock:
+      entry = self._get_entry(key)
+      if entry is None or self._cas_ids.pop(key, None) != entry[0]:
+        return False
+      return self._store(key, value, time)
+
+  def delete(self, key, seconds=0):
+    # pylint: disable=unused-argument
+    with self._lock:
+      if self._get_entry(key) is None:
+        return DELETE_ITEM_MISSING
+      self._cache.pop(key, None)
+      return DELETE_SUCCESSFUL
+
+  def get_multi(self, keys, key_prefix='', namespace=None, for_cas=False):
+    # pylint: disable=unused-argument
+    result = {}
+    for key in keys:
+      value = self.gets(key_prefix + key) if for_cas else \
+          self.get(key_prefix + key)
+      if value is not None:
+        result[key] = value
+    return result
+
+  def set_multi(self, mapping, time=0):  # pylint: disable=redefined-outer-name
+    return [key for key, value in mapping.iteritems()
+            if not self.set(key, value, time)]
+
+  def add_multi(self, mapping, time=0):  # pylint: disable=redefined-outer-name
+    return [key for key, value in mapping.iteritems()
+            if not self.add(key, value, time)]
+
+  def cas_multi(self, mapping, time=0):  # pylint: disable=redefined-outer-name
+    return [key for key, value in mapping.iteritems()
+            if not self.cas(key, value, time)]
+
+  def delete_multi(self, keys, seconds=0):
+    for key in keys:
+      self.delete(key, seconds)
+    return True
+
+  def flush_all(self):
+    with self._lock:
+      self._cache.clear()
+    return True
+
+
+class MemcachedClient(object):
+  """Client of memcached servers using the memcached text protocol.
+
+  Keys are distributed between servers by crc32 of the key. Values are
+  pickled. Network errors are logged and reported with the same return values
+  as App Engine memcache client uses for RPC failures.
+  """
+
+  def __init__(self, servers, timeout=1.0):
+    self._servers = [self._parse_server(server) for server in servers]
+    if not self._servers:
+      raise ValueError("At least one memcached server is required")
+    self._timeout = timeout
+    self._state = threading.local()
+
+  @staticmethod
+  def _parse_server(server):
+    host, _, port = server.strip().rpartition(":")
+    return host, int(port)
+
+  @property
+  def _cas_ids(self):
+    if not hasattr(self._state, "cas_ids"):
+      self._state.cas_ids = {}
+    return self._state.cas_ids
+
+  @property
+  def _connections(self):
+    if not hasattr(self._state, "connections"):
+      self._state.connections = {}
+    return self._state.connections
+
+  @staticmethod
+  def _server_key(key):
+    """Get key that is valid for memcached: short and without whitespace."""
+    if isinstance(key, unicode):
+      key = key.encode("utf-8")
+    key = str(key)
+    if len(key) > 250 or any(char.isspace() for char in key):
+      key = "sha1:" + hashlib.sha1(key).hexdigest()
+    return key
+
+  def _get_server(self, key):
+    return self._servers[(zlib.crc32(key) & 0xffffffff) % len(self._servers)]
+
+  def _connection(self, server):
+    """Get buffered connection file to server, connect if needed."""
+    connection = self._connections.get(server)
+    if connection is None:
+      sock = socket.create_connection(server, self._timeout)
+      connection = self._connections[server] = (sock, sock.makefile("rb"))
+    return connection
+
+  def _close(self, server):
+    connection = self._connections.pop(server, None)
+    if connection is not None:
+      for item in reversed(connection):
+        try:
+          item.close()
+        except socket.error:
+          pass
+
+  def disconnect_all(self):
+    """Close all connections of the current thread."""
+    for server in self._connections.keys():
+      self._close(server)
+
+  def _command(self, server, command, data=None):
+    """Send a command to server and return the reader of the response."""
+    sock, reader = self._connection(server)
+    payload = command + "\r\n"
+    if data is not None:
+      payload += data + "\r\n"
+    sock.sendall(payload)
+    return reader
+
+  @staticmethod
+  def _read_line(reader):
+    line = reader.readline()
+    if not line.endswith("\r\n"):
+      raise socket.error("Connection closed by memcached server")
+    return line[:-2]
+
+  @staticmethod
+  def _serialize(value):
+    if isinstance(value, str):
+      return 0, value
+    return _FLAG_PICKLED, cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)
+
+  @staticmethod
+  def _deserialize(flags, data):
+    if flags & _FLAG_PICKLED:
+      return cPickle.loads(data)
+    return data
+
+  def _group_by_server(self, keys):
+    """Group server keys by server, keeping track of the original keys."""
+    groups = {}
+    for key in keys:
+      server_key = self._server_key(key)
+      groups.setdefault(self._get_server(server_key), {})[server_key] = key
+    return groups
+
+  def _retrieve(self, keys, for_cas):
+    """Get {key: value} for the found keys, record cas ids if needed."""
+    result = {}
+    command = "gets" if for_cas else "get"
+    for server, server_keys in self._group_by_server(keys).iteritems():
+      try:
+        reader = self._command(server, "{} {}".format(
+            command, " ".join(server_keys)))
+        while True:
+          line = self._read_line(reader)
+          if line == "END":
+            break
+          parts = line.split()
+          if parts[0] != "VALUE":
+            raise socket.error("Unexpected response: {}".format(line))
+          data = reader.read(int(parts[3]) + 2)[:-2]
+          key = server_keys[parts[1]]
+          result[key] = self._deserialize(int(parts[2]), data)
+          if for_cas:
+            self._cas_ids[key] = parts[4]
+      except socket.error as error:
+        logger.warning("Memcached get from %s failed: %s", server, error)
+        self._close(server)
+    return result
+
+  def _storage(self, command, key, value, time, cas_id=None):
+    # pylint: disable=redefined-outer-name,too-many-arguments
+    server_key = self._server_key(key)
+    server = self._get_server(server_key)
+    flags, data = self._serialize(value)
+    line = "{} {} {} {} {}".format(command, server_key, flags, int(time),
+                                   len(data))
+    if cas_id is not None:
+      line += " " + cas_id
+    try:
+      return self._read_line(self._command(server, line, data)) == "STORED"
+    except socket.error as error:
+      logger.warning("Memcached %s to %s failed: %s", command, server, error)
+      self._close(server)
+      return False
+
+  def get(self, key):
+    return self._retrieve([key], False).get(key)
+
+  def gets(self, key):
+    return self._retrieve([key], True).get(key)
+
+  def set(self, key, value, time=0):  # pylint: disable=redefined-outer-name
+    return self._storage("set", key, value, time)
+
+  def add(self, key, value, time=0):  # pylint: disable=redefined-outer-name
+    return self._storage("add", key, value, time)
+
+  def cas(self, key, value, time=0):  # pylint: disable=redefined-outer-name
+    cas_id = self._cas_ids.pop(key, None)
+    if cas_id is None:
+      return False
+    return self._storage("cas", key, value, time, cas_id)
+
+  def delete(self, key, seconds=0):
+    # pylint: disable=unused-argument
+    server_key = self._server_key(key)
+    server = self._get_server(server_key)
+    try:
+      response = self._read_line(self._command(
+          server, "delete {}".format(server_key)))
+    except socket.error as error:
+      logger.warning("Memcached delete from %s failed: %s", server, error)
+      self._close(server)
+      return DELETE_NETWORK_FAILURE
+    if response == "DELETED":
+      return DELETE_SUCCESSFUL
+    if response == "NOT_FOUND":
+      return DELETE_ITEM_MISSING
+    return DELETE_NETWORK_FAILURE
+
+  def get_multi(self, keys, key_prefix='', namespace=None, for_cas=False):
+    # pylint: disable=unused-argument
+    result = self._retrieve([key_prefix + key for key in keys], for_cas)
+    return {key[len(key_prefix):]: value for key, value in result.iteritems()}
+
+  def set_multi(self, mapping, time=0):  # pylint: disable=redefined-outer-name
+    return [key for key, value in mapping.iteritems()
+            if not self.set(key, value, time)]
+
+  def add_multi(self, mapping, time=0):  # pylint: disable=redefined-outer-name
+    return [key for key, value in mapping.iteritems()
+            if not self.add(key, value, time)]
+
+  def cas_multi(self, mapping, time=0):  # pylint: disable=redefined-outer-name
+    return [key for key, value in mapping.iteritems()
+            if not self.cas(key, value, time)]
+
+  def delete_multi(self, keys, seconds=0):
+    return all(self.delete(key, seconds) != DELETE_NETWORK_FAILURE
+               for key in list(keys))
+
+  def flush_all(self):
+    success = True
+    for server in self._servers:
+      try:
+        success &= self._read_line(self._command(server, "flush_all")) == "OK"
+      except socket.error as error:
+        logger.warning("Memcached flush_all on %s failed: %s", server, error)
+        self._close(server)
+        success = False
+    return success
+
+
+def create_client(backend=None):
+  """Create cache client for the backend, CACHE_BACKEND setting by default."""
+  backend = backend or getattr(settings, "CACHE_BACKEND", "local")
+  if backend == "appengine":
+    from google.appengine.api import memcache
+    return memcache.Client()
+  if backend == "memcached":
+    servers = getattr(settings, "CACHE_SERVERS", "")
+    return MemcachedClient([server for server in servers.split(",")
+                            if server.strip()])
+  if backend == "local":
+    return LocalClient(getattr(settings, "CACHE_LOCAL_SIZE", 10000),
+                       getattr(settings, "CACHE_LOCAL_TTL", 60))
+  raise ValueError("Unknown cache backend: {}".format(backend))
+
+
+# Backends that are shared by all workers
+SHARED_BACKENDS = {"appengine", "memcached"}
+
+_client = None  # pylint: disable=invalid-name
+_client_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def is_shared():
+  """Check if values cached by one worker are seen by all workers."""
+  return getattr(settings, "CACHE_BACKEND", "local") in SHARED_BACKENDS
+
+
+def get_client():
+  """Get cache client shared by the whole process."""
+  global _client  # pylint: disable=global-statement,invalid-name
+  if _client is None:
+    with _client_lock:
+      if _client is None:
+        _client = create_client()
+  return _client
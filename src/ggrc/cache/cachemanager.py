@@ -141,6 +141,11 @@ class CacheManager:
     else:
       return False
 
+  @property
+  def client(self):
+    """Client of the cache backend with memcache.Client compatible API."""
+    return self.cache_object.client
+
   def bulk_get(self, data):
     """Perform Bulk Get operations in cache for specified data.
 
@@ -2,25 +2,26 @@
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
 
-from google.appengine.api import memcache
 from cache import Cache
 from cache import all_cache_entries
 from collections import OrderedDict
 from copy import deepcopy
 
+from ggrc.cache import backends
+
 """
-    Memcache implements the remote AppEngine Memcache mechanism
+    Memcache implements the remote cache mechanism on top of the client of
+    the configured cache backend (App Engine memcache, memcached or local)
 
 """
 class MemCache(Cache):
   def __init__(self):
     self.name = 'memcache'
-    self.client = None
+    self.client = backends.get_client()
 
     for cache_entry in all_cache_entries():
       if cache_entry.cache_type is self.name:
         self.supported_resources[cache_entry.model_plural]=cache_entry.class_name
-        self.memcache_client = memcache.Client()
 
   def get_name(self):
     return self.name
@@ -54,7 +55,7 @@ class MemCache(Cache):
       if ids is None:
         return None
     for id in ids:
-      attrvalues= self.memcache_client.gets(cache_key + ":" + str(id))
+      attrvalues= self.client.gets(cache_key + ":" + str(id))
       if attrvalues is not None:
         if attrs is None:
           data[id] = attrvalues
@@ -91,9 +92,9 @@ class MemCache(Cache):
     # TODO(dan): use memcache.Client.add_multi() instead of add()
     for key in data.keys():
       id = cache_key + ":" + str(key)
-      cache_data = self.memcache_client.gets(id)
+      cache_data = self.client.gets(id)
       if cache_data is None:
-        if self.memcache_client.add(id, data.get(key), expiration_time) is False:
+        if self.client.add(id, data.get(key), expiration_time) is False:
           # We stop processing any further
           # TODO(ggrcdev): Should we throw exceptions and/or log critical events
           return None
@@ -102,7 +103,7 @@ class MemCache(Cache):
       else:
         # This could occur on import scenarios
         #
-        if self.memcache_client.cas(id, data.get(key), expiration_time) is False:
+        if self.client.cas(id, data.get(key), expiration_time) is False:
           # We stop processing any further
           # TODO(ggrcdev): Should we throw exceptions and/or log critical events
           return None
@@ -132,7 +133,7 @@ class MemCache(Cache):
     #
     for key in data.keys():
       id = cache_key + ":" + str(key)
-      if self.memcache_client.cas(id, data.get(key), expiration_time) is False:
+      if self.client.cas(id, data.get(key), expiration_time) is False:
         # RPC Error or value is not id is not found in cache.
         # Cannot proceed further with update (All or None) policy
         return None
@@ -162,7 +163,7 @@ class MemCache(Cache):
     #
     for key in data.keys():
       id = cache_key + ":" + str(key)
-      retvalue = self.memcache_client.delete(id, lockadd_seconds)
+      retvalue = self.client.delete(id, lockadd_seconds)
       # Log the event of delete failures
       if retvalue is 0:
         # retvalue of 0 indicates Network failure, Cannot proceed further with delete (All or None) policy
@@ -193,7 +194,7 @@ class MemCache(Cache):
     """
     # TODO(dan): import scenarios, add will return non-empty list, we should invoke update_multi for those items
     #
-    return self.memcache_client.add_multi(data, expiration_time)
+    return self.client.add_multi(data, expiration_time)
 
   def get_multi(self, data):
     """ Get multiple entries from memcache
@@ -207,7 +208,7 @@ class MemCache(Cache):
     Returns:
       memcache client API get_multi
     """
-    return self.memcache_client.get_multi(data, '', None, True)
+    return self.client.get_multi(data, '', None, True)
 
   def update_multi(self, data, expiration_time=0):
     """ update multiple entries to memcache
@@ -221,7 +222,7 @@ class MemCache(Cache):
     Returns:
       memcache client API cas_multi (compare and set)
     """
-    return self.memcache_client.cas_multi(data, expiration_time)
+    return self.client.cas_multi(data, expiration_time)
 
   def remove_multi(self, data, lockadd_seconds):
     """ delete multiple entries to memcache
@@ -234,9 +235,9 @@ class MemCache(Cache):
     Returns:
       memcache client API delete_multi
     """
-    return self.memcache_client.delete_multi(data, lockadd_seconds)
+    return self.client.delete_multi(data, lockadd_seconds)
 
   def clean(self):
     """ flush everything from memcache """
-    return self.memcache_client.flush_all()
+    return self.client.flush_all()
 
@@ -0,0 +1,117 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Data versions of DB tables kept in the shared cache.
+
+Every table has a random version token that is replaced whenever rows of the
+table are changed. Values computed from a set of tables stay valid while the
+tokens of all these tables are unchanged. Tokens are kept by the client of
+CACHE_BACKEND, so with a shared backend changes made by any worker are seen
+by all of them.
+
+Tables changed by INSERT, UPDATE and DELETE statements are collected per
+thread. Their versions are bumped after every session flush and again after
+commit, when the changes become visible to other transactions. Statements
+executed outside of transactions are bumped right away.
+"""
+
+import threading
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.dml import UpdateBase
+
+from ggrc.cache import backends
+
+
+KEY_PREFIX = "table_version:"
+
+_changes = threading.local()  # pylint: disable=invalid-name
+
+
+def _new_token():
+  return uuid.uuid4().hex
+
+
+def get_versions(tables):
+  """Get version tokens of tables.
+
+  Tables without a token get a new one. Tables whose token can't be read,
+  like on cache backend errors, are missing in the result.
+
+  Args:
+    tables: names of the tables.
+
+  Returns:
+    dict of version tokens by table name.
+  """
+  tables = set(tables)
+  if not tables:
+    return {}
+  client = backends.get_client()
+  versions = client.get_multi(tables, key_prefix=KEY_PREFIX)
+  missing = tables.difference(versions)
+  if missing:
+    client.add_multi({KEY_PREFIX + table: _new_token() for table in missing})
+    versions.update(client.get_multi(missing, key_prefix=KEY_PREFIX))
+  return versions
+
+
+def bump(tables):
+  """Give new version tokens to tables with changed rows."""
+  if tables:
+    backends.get_client().set_multi(
+        {KEY_PREFIX + table: _new_token() for table in tables})
+
+
+def _get_changed_tables():
+  """Get tables changed in the current transaction of this thread."""
+  if not hasattr(_changes, "tables"):
+    _changes.tables = set()
+  return _changes.tables
+
+
+def _after_execute(conn, clauseelement, multiparams, params, result):
+  # pylint: disable=unused-argument
+  if not isinstance(clauseelement, UpdateBase):
+    return
+  if conn.in_transaction():
+    _get_changed_tables().add(clauseelement.table.name)
+  else:
+    bump([clauseelement.table.name])
+
+
+def add_changed_tables(tables):
+  """Bump tables changed by untracked statements, like textual SQL.
+
+  Versions are bumped with other changes of the current transaction.
+  """
+  _get_changed_tables().update(tables)
+
+
+def _after_flush(session, flush_context):
+  # pylint: disable=unused-argument
+  bump(_get_changed_tables())
+
+
+def _after_commit(session):
+  # pylint: disable=unused-argument
+  tables = _get_changed_tables()
+  bump(tables)
+  tables.clear()
+
+
+def _after_rollback(session):
+  # pylint: disable=unused-argument
+  _get_changed_tables().clear()
+
+
+def init_session_hooks(session_class):
+  """Bump versions of tables changed in transactions of the sessions."""
+  if event.contains(Engine, "after_execute", _after_execute):
+    return
+  event.listen(Engine, "after_execute", _after_execute)
+  event.listen(session_class, "after_flush", _after_flush)
+  event.listen(session_class, "after_commit", _after_commit)
+  event.listen(session_class, "after_rollback", _after_rollback)
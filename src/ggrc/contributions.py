@@ -6,10 +6,12 @@
 from ggrc.notifications import common
 from ggrc.notifications import notification_handlers
 from ggrc.notifications import data_handlers
+from ggrc.rbac import resource_sets
 
 
 CONTRIBUTED_CRON_JOBS = [
-    common.send_daily_digest_notifications
+    common.send_daily_digest_notifications,
+    resource_sets.purge_resource_sets,
 ]
 
 NOTIFICATION_LISTENERS = [
@@ -9,15 +9,19 @@ from operator import eq, lt, gt, le, ge
 import flask
 import sqlalchemy
 from sqlalchemy.orm import load_only
+from sqlalchemy.sql.elements import BindParameter
 
 from ggrc import db
 from ggrc import models
 from ggrc.converters.autocast import autocast
 from ggrc.converters.exceptions import BadQueryException
+from ggrc.fulltext import get_indexer
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.fulltext.sql import SqlIndexer
 from ggrc.login import is_creator
 from ggrc.models import inflector
 from ggrc.models.relationship_helper import RelationshipHelper
+from ggrc.services import query_cache
 from ggrc.snapshotter import rules
 from ggrc.utils import query_helpers
 from ggrc_basic_permissions import UserRole
@@ -51,10 +55,45 @@ def build_op_shortcut(predicate):
   return decorated
 
 
-@build_op_shortcut
-def like(left, right):
+def like_pattern(value):
+  """Get SQL LIKE pattern matching strings that contain value."""
+  if isinstance(value, BindParameter):
+    # values bound to cached expression templates are patterns already
+    return value
+  return u"%{}%".format(value)
+
+
+def _like_predicate(left, right):
   """Handle ~ operator with SQL LIKE."""
-  return left.ilike(u"%{}%".format(right))
+  return left.ilike(like_pattern(right))
+
+
+def is_sql_like(exp, object_class, target_class):
+  """Check if ~ operator is handled with SQL LIKE instead of the indexer."""
+  key = exp['left'].lower()
+  key, filter_by = target_class.attributes_map().get(key, (key, None))
+  return (isinstance(get_indexer(), SqlIndexer) or callable(filter_by) or
+          key in GETATTR_WHITELIST or object_class is models.Snapshot)
+
+
+def like(exp, object_class, target_class, query):
+  """Handle ~ operator.
+
+  Full text properties are searched in the configured indexer if it does not
+  store records in the SQL table, otherwise SQL LIKE is used.
+  """
+  if is_sql_like(exp, object_class, target_class):
+    return build_op_shortcut(_like_predicate)(
+        exp, object_class, target_class, query)
+  key = exp['left'].lower()
+  key, _ = target_class.attributes_map().get(key, (key, None))
+  # the indexer has no table versions the results could depend on
+  query_cache.add_unknown_tables()
+  keys = get_indexer().get_matching_keys(object_class.__name__, key,
+                                         exp['right'])
+  if not keys:
+    return sqlalchemy.sql.false()
+  return object_class.id.in_(keys)
 
 
 def reverse(operation):
@@ -194,7 +233,7 @@ def text_search(exp, object_class, target_class, query):
   return object_class.id.in_(
       db.session.query(Record.key).filter(
           Record.type == object_class.__name__,
-          Record.content.ilike(u"%{}%".format(exp['text'])),
+          Record.content.ilike(like_pattern(exp['text'])),
       ),
   )
 
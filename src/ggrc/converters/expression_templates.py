@@ -0,0 +1,215 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Per worker cache of filter clauses built from query expressions.
+
+The frontend sends a handful of filter expression shapes that differ only in
+their literals, like the ids of a "relevant" filter or the right side of a
+comparison. Building a filter clause runs autocast, attribute map lookups and
+the construction of relationship subqueries for every node. Clauses are built
+once per expression shape with literals replaced by unique bind parameters,
+and copies of the cached template get the literals of each expression.
+
+Expressions with operators that read data while the clause is built
+("similar", "owned", "related_people", "relevant" to results of previous
+queries and "~" searched in an external indexer) and comparisons that are
+autocast to date ranges are built from scratch every time. Autocasting
+depends on custom attribute definitions, so templates are keyed by the data
+version of their table. Versions bumped by other workers are seen only with
+a shared CACHE_BACKEND, so the cache is disabled with the local backend.
+"""
+
+import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.sql import visitors
+
+from ggrc import settings
+from ggrc.cache import backends
+from ggrc.cache import table_versions
+from ggrc.converters import autocast
+from ggrc.converters import custom_operators
+from ggrc.utils.structures import LRUCache
+
+
+PARAMETER_PREFIX = "query_literal_"
+
+COMPARISON_OPERATIONS = {"=", "!=", "<", ">", "<=", ">="}
+LIKE_OPERATIONS = {"~", "!~"}
+
+# Literals bound as parameters, None literals make different clauses
+LITERAL_TYPES = (basestring, int, long, float, datetime.date)
+
+CAD_TABLE = "custom_attribute_definitions"
+
+_NOT_CACHEABLE = object()
+
+_cache = LRUCache(  # pylint: disable=invalid-name
+    getattr(settings, "QUERY_TEMPLATE_CACHE_SIZE", 1000))
+
+
+def is_enabled():
+  return (getattr(settings, "QUERY_TEMPLATE_CACHE_SIZE", 1000) > 0 and
+          backends.is_shared())
+
+
+def clear():
+  _cache.clear()
+
+
+def _parameter(value, values):
+  """Get a new bind parameter for value."""
+  name = "{}{}".format(PARAMETER_PREFIX, len(values))
+  values[name] = value
+  return sa.bindparam(name, None, unique=True)
+
+
+def _parameterize_comparison(exp, values):
+  left, right = exp.get("left"), exp.get("right")
+  if (not isinstance(left, basestring) or
+          not isinstance(right, LITERAL_TYPES)):
+    return None, None
+  name = exp["op"]["name"]
+  if name in LIKE_OPERATIONS:
+    right = custom_operators.like_pattern(right)
+  return ((name, left),
+          {"op": {"name": name}, "left": left,
+           "right": _parameter(right, values)})
+
+
+def _parameterize_is(exp, values):
+  # pylint: disable=unused-argument
+  left, right = exp.get("left"), exp.get("right")
+  if not isinstance(left, basestring) or not isinstance(right, basestring):
+    return None, None
+  return (("is", left, right),
+          {"op": {"name": "is"}, "left": left, "right": right})
+
+
+def _parameterize_text_search(exp, values):
+  if not isinstance(exp.get("text"), LITERAL_TYPES):
+    return None, None
+  return (("text_search",),
+          {"op": {"name": "text_search"},
+           "text": _parameter(custom_operators.like_pattern(exp["text"]),
+                              values)})
+
+
+def _parameterize_relevant(exp, values):
+  object_name, ids = exp.get("object_name"), exp.get("ids", [])
+  if not isinstance(object_name, basestring) or object_name == "__previous__":
+    return None, None
+  return (("relevant", object_name, len(ids)),
+          {"op": {"name": "relevant"}, "object_name": object_name,
+           "ids": [_parameter(id_, values) for id_ in ids]})
+
+
+def _parameterize_operation(exp, values):
+  name = exp["op"]["name"]
+  left_shape, left = _parameterize(exp.get("left"), values)
+  right_shape, right = _parameterize(exp.get("right"), values)
+  if left_shape is None or right_shape is None:
+    return None, None
+  return ((name, left_shape, right_shape),
+          {"op": {"name": name}, "left": left, "right": right})
+
+
+def _parameterize(exp, values):
+  """Get shape and template of an expression.
+
+  Args:
+    exp: query expression.
+    values: dict that gets values of bind parameters of the template.
+
+  Returns:
+    (shape, template) tuple, where shape is a hashable description of the
+    expression without its literals and template is a copy of the expression
+    with literals replaced by bind parameters, or (None, None) if the clause
+    of the expression depends on more than its shape.
+  """
+  if not isinstance(exp, dict) or not isinstance(exp.get("op"), dict):
+    return None, None
+  parameterize = PARAMETERIZERS.get(exp["op"].get("name"))
+  if parameterize is None:
+    return None, None
+  return parameterize(exp, values)
+
+
+PARAMETERIZERS = dict(
+    [(name, _parameterize_comparison)
+     for name in COMPARISON_OPERATIONS | LIKE_OPERATIONS] +
+    [("AND", _parameterize_operation),
+     ("OR", _parameterize_operation),
+     ("is", _parameterize_is),
+     ("text_search", _parameterize_text_search),
+     ("relevant", _parameterize_relevant)]
+)
+
+
+def _iter_leaves(exp):
+  """Iterate over expressions that are not AND or OR of other expressions."""
+  if exp["op"]["name"] in ("AND", "OR"):
+    for child in (exp["left"], exp["right"]):
+      for leaf in _iter_leaves(child):
+        yield leaf
+  else:
+    yield exp
+
+
+def _is_cacheable(template, object_class, target_class):
+  """Check if literals don't change the clause of a template expression."""
+  for leaf in _iter_leaves(template):
+    name = leaf["op"]["name"]
+    if name not in COMPARISON_OPERATIONS and name not in LIKE_OPERATIONS:
+      continue
+    key = leaf["left"].lower()
+    key, _ = target_class.attributes_map().get(key, (key, None))
+    extra_parser, _ = autocast.get_parsers(target_class, key)
+    if extra_parser is not None:
+      return False
+    if (name in LIKE_OPERATIONS and
+            not custom_operators.is_sql_like(leaf, object_class,
+                                             target_class)):
+      return False
+  return True
+
+
+def _bind(template, values):
+  """Get a copy of template clause with values of its parameters."""
+  def bind(parameter):
+    # pylint: disable=protected-access
+    if parameter._orig_key in values:
+      parameter.value = values[parameter._orig_key]
+
+  return visitors.cloned_traverse(template, {}, {"bindparam": bind})
+
+
+def build_expression(exp, object_class, target_class, query):
+  """Make an SQLAlchemy filtering expression from exp expression tree.
+
+  Same as custom_operators.build_expression, but clauses of expressions
+  without data dependent operators are copied from cached templates.
+  """
+  if not is_enabled():
+    return custom_operators.build_expression(
+        exp, object_class, target_class, query)
+  values = {}
+  shape, template = _parameterize(exp, values)
+  versions = table_versions.get_versions([CAD_TABLE]) if shape else {}
+  if CAD_TABLE not in versions:
+    return custom_operators.build_expression(
+        exp, object_class, target_class, query)
+  key = (object_class.__name__, target_class.__name__, shape,
+         versions[CAD_TABLE])
+  clause = _cache.get(key)
+  if clause is None:
+    if _is_cacheable(template, object_class, target_class):
+      clause = custom_operators.build_expression(
+          template, object_class, target_class, query)
+    else:
+      clause = _NOT_CACHEABLE
+    _cache[key] = clause
+  if clause is _NOT_CACHEABLE:
+    return custom_operators.build_expression(
+        exp, object_class, target_class, query)
+  return _bind(clause, values)
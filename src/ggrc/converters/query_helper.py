@@ -15,8 +15,10 @@ from ggrc import models
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.models import inflector
 from ggrc.rbac import context_query_filter
+from ggrc.rbac.resource_sets import resource_query_filter
 from ggrc.utils import query_helpers, benchmark
 from ggrc.converters import custom_operators
+from ggrc.converters import expression_templates
 from ggrc.converters.exceptions import BadQueryException
 
 
@@ -219,7 +221,7 @@ class QueryHelper(object):
 
     if contexts is not None:
       if resources:
-        resource_sql = model.id.in_(resources)
+        resource_sql = resource_query_filter(model.id, resources)
       else:
         resource_sql = sa.sql.false()
 
@@ -259,10 +261,7 @@ class QueryHelper(object):
     object_class = inflector.get_model(object_name)
     query = db.session.query(object_class.id)
 
-    tgt_class = object_class
-    if object_name == "Snapshot":
-      child_type = self._get_snapshot_child_type(object_query)
-      tgt_class = getattr(models.all_models, child_type, object_class)
+    tgt_class = self._get_target_class(object_query, object_class)
 
     requested_permissions = object_query.get("permissions", "read")
     with benchmark("Get permissions: _get_ids > _get_type_query"):
@@ -270,11 +269,10 @@ class QueryHelper(object):
       if type_query is not None:
         query = query.filter(type_query)
     with benchmark("Parse filter query: _get_ids > _build_expression"):
-      filter_expression = custom_operators.build_expression(
+      filter_expression = self._build_expression(
           expression,
           object_class,
           tgt_class,
-          self.query
       )
       if filter_expression is not None:
         query = query.filter(filter_expression)
@@ -302,6 +300,22 @@ class QueryHelper(object):
       delattr(flask.g, "similar_objects_query")
     return ids
 
+  def _get_target_class(self, object_query, object_class):
+    """Get the snapshotted model for Snapshot queries or the queried model."""
+    if object_query["object_name"] == "Snapshot":
+      child_type = self._get_snapshot_child_type(object_query)
+      return getattr(models.all_models, child_type, object_class)
+    return object_class
+
+  def _build_expression(self, expression, object_class, tgt_class):
+    """Make an SQLAlchemy filtering expression from expression tree."""
+    return expression_templates.build_expression(
+        expression,
+        object_class,
+        tgt_class,
+        self.query
+    )
+
   @staticmethod
   def _apply_limit(query, limit):
     """Apply limits for pagination.
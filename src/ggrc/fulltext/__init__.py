@@ -6,6 +6,12 @@ from collections import defaultdict
 from ggrc.extensions import get_extension_instance
 
 
+# Properties that are matched by global search
+SEARCHABLE_PROPERTIES = [
+    'title', 'name', 'email', 'notes', 'description', 'slug',
+]
+
+
 class Indexer(object):
   """General class for indexer"""
 
@@ -42,9 +48,59 @@ class Indexer(object):
   def delete_record(self, key):
     raise NotImplementedError()
 
+  def create_records(self, records, commit=True):
+    """Create index records for multiple objects."""
+    for record in records:
+      self.create_record(record, commit=False)
+    if commit:
+      self._commit()
+
+  def update_records(self, records, commit=True, replace=False):
+    """Update index records of multiple objects.
+
+    If replace is True, properties missing in the records are removed too.
+    """
+    for record in records:
+      if replace:
+        self.delete_record(record.key, record.type, commit=False)
+        self.create_record(record, commit=False)
+      else:
+        self.update_record(record, commit=False)
+    if commit:
+      self._commit()
+
+  def delete_records(self, keys_by_type, commit=True):
+    """Delete index records of objects given as {type: keys} dict."""
+    for type_, keys in keys_by_type.iteritems():
+      for key in keys:
+        self.delete_record(key, type_, commit=False)
+    if commit:
+      self._commit()
+
+  @staticmethod
+  def _commit():
+    from ggrc import db
+    db.session.commit()
+
   def search(self, terms):
     raise NotImplementedError()
 
+  @staticmethod
+  def _get_grouped_types(types=None, extra_params=None):
+    """Return list of model names from all model names
+
+    if they in sended types and extra_params"""
+    from ggrc.models import all_models
+    model_names = []
+    for model_klass in all_models.all_models:
+      model_name = model_klass.__name__
+      if types and model_name not in types:
+        continue
+      if extra_params and model_name in extra_params:
+        continue
+      model_names.append(model_name)
+    return model_names
+
 
 def resolve_default_text_indexer():
   """Get indexer for settings fulltest db"""
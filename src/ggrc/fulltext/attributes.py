@@ -78,20 +78,32 @@ class CustomRoleAttr(object):
     self.with_template = False
 
   def get_properties(self, instance):
-    """Returns index properties of all custom roles for a given instance"""
+    """Returns index properties of all custom roles for a given instance
+
+    People are taken from the shared people cache, all missing people of the
+    instance are loaded with a single query.
+    """
+    # people cache module imports models, which import this module
+    from ggrc.fulltext.people import people_cache
+    acls = getattr(instance, self.alias, [])
+    people_cache.prefetch(acl.person_id for acl in acls)
     results = {}
     sorted_roles = defaultdict(list)
-    for acl in getattr(instance, self.alias, []):
+    for acl in acls:
       ac_role = acl.ac_role.name
-      person_id = acl.person.id
-      if not results.get(acl.ac_role.name, None):
-        results[acl.ac_role.name] = {}
-      sorted_roles[ac_role].append(acl.person.user_name)
-      results[ac_role]["{}-email".format(person_id)] = acl.person.email
-      results[ac_role]["{}-name".format(person_id)] = acl.person.name
-      results[ac_role]["{}-user_name".format(person_id)] = acl.person.user_name
+      person_id, person_name, person_email = people_cache.get(
+          {"id": acl.person_id})
+      if person_email is None:
+        continue
+      user_name = person_email.split("@")[0]
+      if not results.get(ac_role, None):
+        results[ac_role] = {}
+      sorted_roles[ac_role].append(user_name)
+      results[ac_role]["{}-email".format(person_id)] = person_email
+      results[ac_role]["{}-name".format(person_id)] = person_name
+      results[ac_role]["{}-user_name".format(person_id)] = user_name
     for role in sorted_roles:
-      results[role]["__sort__"] = u':'.join(sorted(sorted_roles[ac_role]))
+      results[role]["__sort__"] = u':'.join(sorted(sorted_roles[role]))
     return results
 
 
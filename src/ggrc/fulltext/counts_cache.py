@@ -0,0 +1,123 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Short lived cache of full text search counts.
+
+Counts are cached by user permissions fingerprint, search parameters and
+the index versions of the counted types. Index writes bump the version of
+the written type, so cached counts of that type are not used anymore, while
+counts of the other types stay valid until they expire.
+
+Index writes are visible to other transactions only after commit, so counts
+cached in between would be computed from the old index. Versions of the
+written types are bumped once more after the transaction of the writing
+thread is committed.
+"""
+
+import json
+import threading
+from collections import defaultdict
+
+from sqlalchemy import event
+
+from ggrc import settings
+from ggrc.rbac import permissions
+from ggrc.utils.structures import LRUCache
+
+
+_cache = LRUCache(  # pylint: disable=invalid-name
+    getattr(settings, "FULLTEXT_COUNTS_CACHE_SIZE", 1000),
+    getattr(settings, "FULLTEXT_COUNTS_CACHE_TTL", 60),
+)
+_versions = defaultdict(int)  # pylint: disable=invalid-name
+_versions_lock = threading.Lock()  # pylint: disable=invalid-name
+_pending = threading.local()  # pylint: disable=invalid-name
+
+# Version of all types together, used for counts over all types
+ALL_TYPES = None
+
+
+def _bump(types):
+  """Bump index versions of types, or of all types if types is None."""
+  with _versions_lock:
+    if types is None:
+      _cache.clear()
+    else:
+      for type_ in types:
+        _versions[type_] += 1
+    _versions[ALL_TYPES] += 1
+
+
+def _get_pending_types():
+  """Get types written in the current transaction of this thread."""
+  if not hasattr(_pending, "types"):
+    _pending.types = set()
+  return _pending.types
+
+
+def invalidate(types=None):
+  """Bump index versions of types, or of all types if types is None.
+
+  Versions are bumped again after the current transaction is committed.
+  """
+  _bump(types)
+  _get_pending_types().update([ALL_TYPES] if types is None else types)
+
+
+def _after_commit(session):
+  # pylint: disable=unused-argument
+  types = _get_pending_types()
+  if ALL_TYPES in types:
+    _bump(None)
+  elif types:
+    _bump(types)
+  types.clear()
+
+
+def _after_rollback(session):
+  # pylint: disable=unused-argument
+  _get_pending_types().clear()
+
+
+def init_session_hooks(session_class):
+  """Bump versions of types written in transactions of the sessions."""
+  if event.contains(session_class, "after_commit", _after_commit):
+    return
+  event.listen(session_class, "after_commit", _after_commit)
+  event.listen(session_class, "after_rollback", _after_rollback)
+
+
+def _get_key(types, params):
+  """Get cache key for counts of types with the given search params."""
+  with _versions_lock:
+    if types:
+      versions = tuple(_versions[type_] for type_ in sorted(types))
+    else:
+      versions = _versions[ALL_TYPES]
+  return (permissions.permissions_fingerprint(), versions,
+          json.dumps(params, sort_keys=True))
+
+
+def get_counts(counts, terms, types=None, contact_id=None,
+               extra_params=None, extra_columns=None):
+  """Get counts from the cache or compute them with counts function.
+
+  Args:
+    counts: Indexer counts method.
+    Other arguments are the same as for Indexer counts method.
+  """
+  extra_params = extra_params or {}
+  extra_columns = extra_columns or {}
+  all_types = None
+  if types:
+    all_types = (set(types) | set(extra_params) |
+                 set(extra_columns.values()))
+  key = _get_key(all_types, [terms, types, contact_id, extra_params,
+                             extra_columns])
+  result = _cache.get(key)
+  if result is None:
+    result = [tuple(row) for row in counts(
+        terms, types=types, contact_id=contact_id,
+        extra_params=extra_params, extra_columns=extra_columns)]
+    _cache[key] = result
+  return result
@@ -0,0 +1,153 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Deferred full text indexing.
+
+If FULLTEXT_INDEX_ASYNC setting is enabled, objects are not reindexed in the
+request that changed them. Their (type, id) pairs are stored in the
+fulltext_index_queue table instead and the index is updated later by
+`drain`. Repeated changes of the same object are coalesced into a single
+queue row, whose version is bumped, so that a change made while the object
+is being reindexed is not lost. Search results may lag behind the latest
+changes until the queue is drained.
+"""
+
+import datetime
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy import tuple_
+
+from ggrc import db
+from ggrc import settings
+from ggrc.cache import table_versions
+from ggrc.fulltext import get_indexer
+from ggrc.fulltext import mixin
+from ggrc.models.inflector import get_model
+
+
+class IndexQueueItem(db.Model):
+  """Object whose full text records have to be updated."""
+  __tablename__ = 'fulltext_index_queue'
+
+  object_type = db.Column(db.String(250), primary_key=True)
+  object_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  version = db.Column(db.Integer, nullable=False, default=1)
+  queued_at = db.Column(db.DateTime, nullable=False, index=True,
+                        default=datetime.datetime.utcnow)
+
+
+ENQUEUE_QUERY = text("""
+    INSERT INTO fulltext_index_queue
+      (object_type, object_id, version, queued_at)
+    VALUES (:object_type, :object_id, 1, :queued_at)
+    ON DUPLICATE KEY UPDATE version = version + 1
+""")
+
+
+def is_enabled():
+  return getattr(settings, "FULLTEXT_INDEX_ASYNC", False)
+
+
+def enqueue(pairs):
+  """Add (type, id) pairs to the index queue.
+
+  The queue rows are written in the current transaction and are not
+  committed here.
+  """
+  now = datetime.datetime.utcnow()
+  params = [{"object_type": type_, "object_id": id_, "queued_at": now}
+            for type_, id_ in set(pairs) if id_ is not None]
+  if params:
+    db.session.execute(ENQUEUE_QUERY, params)
+    # textual statements are not tracked by table versions
+    table_versions.add_changed_tables([IndexQueueItem.__tablename__])
+
+
+def _reindex(type_, ids):
+  """Update full text records of objects of one type."""
+  model = get_model(type_)
+  indexer = get_indexer()
+  if model is None:
+    indexer.delete_records({type_: ids}, commit=False)
+    return
+  if issubclass(model, mixin.Indexed):
+    model.bulk_record_update_for(ids)
+    return
+  instances = model.query.filter(model.id.in_(ids)).all()
+  missing = set(ids) - {instance.id for instance in instances}
+  if missing:
+    indexer.delete_records({type_: missing}, commit=False)
+  indexer.update_records(
+      [indexer.fts_record_for(instance) for instance in instances],
+      commit=False,
+      replace=True,
+  )
+
+
+def _reindex_snapshots(ids):
+  """Update full text records of snapshots."""
+  from ggrc.models import all_models
+  from ggrc.snapshotter.indexer import reindex_snapshots
+  get_indexer().delete_records({"Snapshot": ids}, commit=False)
+  existing = [row.id for row in db.session.query(all_models.Snapshot.id)
+              .filter(all_models.Snapshot.id.in_(ids))]
+  db.session.commit()
+  reindex_snapshots(existing)
+
+
+def drain(limit=1000):
+  """Update index for the oldest queued objects.
+
+  Args:
+    limit: Maximum number of queued objects to process.
+
+  Returns:
+    Number of processed queue items.
+  """
+  items = db.session.query(
+      IndexQueueItem.object_type,
+      IndexQueueItem.object_id,
+      IndexQueueItem.version,
+  ).order_by(IndexQueueItem.queued_at).limit(limit).all()
+  if not items:
+    return 0
+  ids_by_type = defaultdict(set)
+  for item in items:
+    ids_by_type[item.object_type].add(item.object_id)
+  snapshot_ids = ids_by_type.pop("Snapshot", None)
+  for type_, ids in ids_by_type.iteritems():
+    _reindex(type_, ids)
+  db.session.commit()
+  if snapshot_ids:
+    _reindex_snapshots(snapshot_ids)
+  # items that were queued again while processing keep their newer version
+  db.session.query(IndexQueueItem).filter(
+      tuple_(IndexQueueItem.object_type,
+             IndexQueueItem.object_id,
+             IndexQueueItem.version).in_([tuple(item) for item in items])
+  ).delete(synchronize_session=False)
+  db.session.commit()
+  return len(items)
+
+
+def drain_all(chunk_size=1000):
+  """Drain the whole index queue, return the number of processed items."""
+  total = 0
+  while True:
+    count = drain(chunk_size)
+    if not count:
+      return total
+    total += count
+
+
+def get_status():
+  """Get queue length and the age of the oldest queued item in seconds."""
+  count, oldest = db.session.query(
+      db.func.count(IndexQueueItem.object_id),
+      db.func.min(IndexQueueItem.queued_at),
+  ).one()
+  lag = 0
+  if oldest is not None:
+    lag = (datetime.datetime.utcnow() - oldest).total_seconds()
+  return {"length": count, "lag": lag}
@@ -0,0 +1,531 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""In-process inverted index full text engine.
+
+The index maps every search term to a posting list of documents, where a
+document is a (type, key, property) triple of an indexed object. Searching
+does not touch the fulltext_record_properties table, so it takes the search
+load off the database and works without any external services.
+
+To use this engine set FULLTEXT_INDEXER setting to
+'ggrc.fulltext.inverted.InvertedIndexer'. If FULLTEXT_INDEX_PATH setting is
+set, the index is persisted to that file and every committed change is
+appended to a journal next to it, so that all processes on the same host
+share the same index. Otherwise the index lives only in process memory.
+
+Note: snapshots are still indexed in the SQL table by the snapshotter.
+"""
+
+import array
+import cPickle
+import fcntl
+import heapq
+import os
+import re
+import threading
+from collections import defaultdict
+from collections import namedtuple
+from contextlib import contextmanager
+from logging import getLogger
+
+from sqlalchemy import event
+
+from ggrc import db
+from ggrc.fulltext import Indexer
+from ggrc.fulltext import counts_cache
+from ggrc.fulltext import SEARCHABLE_PROPERTIES
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+
+SearchResult = namedtuple("SearchResult", ["key", "type"])
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+NO_CONTEXT = -1
+
+PENDING_KEY = "fulltext_inverted_pending"
+
+# Length of substrings of indexed terms that are mapped to the terms
+GRAM_SIZE = 3
+
+
+def tokenize(content):
+  """Split content into a set of lowercase terms."""
+  if content is None:
+    return set()
+  return set(TOKEN_RE.findall(unicode(content).lower()))
+
+
+def iter_grams(term):
+  """Iterate over all substrings of term with GRAM_SIZE length."""
+  for start in xrange(len(term) - GRAM_SIZE + 1):
+    yield term[start:start + GRAM_SIZE]
+
+
+class InvertedIndex(object):
+  """Term to posting list index of (type, key, property) documents.
+
+  Documents are stored in parallel compact arrays and are addressed by their
+  position in them. Removed documents are only marked as dead and are dropped
+  from the arrays and posting lists by `compact`.
+
+  Search terms match indexed terms that contain them. To avoid scanning the
+  whole vocabulary for every search term, indexed terms are also looked up
+  by their substrings of GRAM_SIZE length. Search terms shorter than that
+  scan the distinct grams and the short indexed terms instead. The gram
+  lookup is not persisted, it is rebuilt from the terms when the index is
+  loaded.
+  """
+
+  def __init__(self):
+    self.types = []
+    self.properties = []
+    self.doc_types = array.array("i")
+    self.doc_keys = array.array("i")
+    self.doc_properties = array.array("i")
+    self.doc_contexts = array.array("i")
+    self.alive = bytearray()
+    self.postings = {}
+    self.dead = 0
+    self._build_lookups()
+
+  def _build_lookups(self):
+    """Build in-memory lookup tables that are not persisted."""
+    self._type_ids = {name: i for i, name in enumerate(self.types)}
+    self._property_ids = {name: i for i, name in enumerate(self.properties)}
+    self._objects = defaultdict(list)
+    for doc_id, alive in enumerate(self.alive):
+      if alive:
+        obj = (self.types[self.doc_types[doc_id]], self.doc_keys[doc_id])
+        self._objects[obj].append(doc_id)
+    self._grams = defaultdict(set)
+    self._short_terms = set()
+    for term in self.postings:
+      self._add_term(term)
+
+  def _add_term(self, term):
+    """Add a new indexed term to the gram lookup."""
+    if len(term) < GRAM_SIZE:
+      self._short_terms.add(term)
+    for gram in iter_grams(term):
+      self._grams[gram].add(term)
+
+  def _get_indexed_terms(self, term):
+    """Get indexed terms that contain the search term."""
+    if len(term) < GRAM_SIZE:
+      terms = {indexed for indexed in self._short_terms if term in indexed}
+      for gram, gram_terms in self._grams.iteritems():
+        if term in gram:
+          terms.update(gram_terms)
+      return terms
+    candidates = sorted((self._grams.get(gram, set())
+                         for gram in set(iter_grams(term))), key=len)
+    terms = set(candidates[0])
+    for gram_terms in candidates[1:]:
+      if not terms:
+        break
+      terms &= gram_terms
+    return {indexed for indexed in terms if term in indexed}
+
+  def __getstate__(self):
+    return {
+        "types": self.types,
+        "properties": self.properties,
+        "doc_types": self.doc_types,
+        "doc_keys": self.doc_keys,
+        "doc_properties": self.doc_properties,
+        "doc_contexts": self.doc_contexts,
+        "alive": self.alive,
+        "postings": self.postings,
+        "dead": self.dead,
+    }
+
+  def __setstate__(self, state):
+    self.__dict__.update(state)
+    self._build_lookups()
+
+  @staticmethod
+  def _intern(names, ids, name):
+    if name not in ids:
+      ids[name] = len(names)
+      names.append(name)
+    return ids[name]
+
+  def __len__(self):
+    return len(self.alive) - self.dead
+
+  def add(self, type_, key, context_id, prop, terms):
+    """Add a document with the given terms to the index."""
+    doc_id = len(self.alive)
+    self.doc_types.append(self._intern(self.types, self._type_ids, type_))
+    self.doc_keys.append(key)
+    self.doc_properties.append(
+        self._intern(self.properties, self._property_ids, prop))
+    self.doc_contexts.append(
+        NO_CONTEXT if context_id is None else context_id)
+    self.alive.append(1)
+    self._objects[(type_, key)].append(doc_id)
+    for term in terms:
+      if term not in self.postings:
+        self.postings[term] = array.array("i")
+        self._add_term(term)
+      self.postings[term].append(doc_id)
+
+  def remove(self, type_, key, properties=None):
+    """Remove all or only the given properties of an object."""
+    doc_ids = self._objects.get((type_, key), [])
+    kept = []
+    for doc_id in doc_ids:
+      prop = self.properties[self.doc_properties[doc_id]]
+      if properties is None or prop in properties:
+        self.alive[doc_id] = 0
+        self.dead += 1
+      else:
+        kept.append(doc_id)
+    if kept:
+      self._objects[(type_, key)] = kept
+    else:
+      self._objects.pop((type_, key), None)
+
+  def remove_type(self, type_):
+    """Remove all documents of the given type."""
+    for obj in [obj for obj in self._objects if obj[0] == type_]:
+      self.remove(*obj)
+
+  def clear(self):
+    self.__init__()
+
+  def compact(self):
+    """Drop dead documents from the arrays and the posting lists."""
+    new_ids = array.array("i", [-1] * len(self.alive))
+    compacted = InvertedIndex()
+    compacted.types = self.types
+    compacted.properties = self.properties
+    for doc_id, alive in enumerate(self.alive):
+      if not alive:
+        continue
+      new_ids[doc_id] = len(compacted.alive)
+      compacted.doc_types.append(self.doc_types[doc_id])
+      compacted.doc_keys.append(self.doc_keys[doc_id])
+      compacted.doc_properties.append(self.doc_properties[doc_id])
+      compacted.doc_contexts.append(self.doc_contexts[doc_id])
+      compacted.alive.append(1)
+    for term, postings in self.postings.iteritems():
+      new_postings = array.array(
+          "i", (new_ids[i] for i in postings if new_ids[i] != -1))
+      if new_postings:
+        compacted.postings[term] = new_postings
+    self.__setstate__(compacted.__getstate__())
+
+  def match(self, terms):
+    """Get ids of live documents that contain all of the given terms.
+
+    A search term matches every indexed term that contains it, so the search
+    has the same "contains" semantics as LIKE '%term%' for single words.
+    """
+    result = None
+    for term in terms:
+      doc_ids = set()
+      for indexed_term in self._get_indexed_terms(term):
+        doc_ids.update(self.postings[indexed_term])
+      result = doc_ids if result is None else result & doc_ids
+      if not result:
+        return set()
+    if result is None:
+      result = xrange(len(self.alive))
+    return {doc_id for doc_id in result if self.alive[doc_id]}
+
+  def document(self, doc_id):
+    """Get (type, key, context_id, property) for a document."""
+    context_id = self.doc_contexts[doc_id]
+    return (
+        self.types[self.doc_types[doc_id]],
+        self.doc_keys[doc_id],
+        None if context_id == NO_CONTEXT else context_id,
+        self.properties[self.doc_properties[doc_id]],
+    )
+
+
+class InvertedIndexer(Indexer):
+  """Indexer that keeps the full text index in process memory."""
+
+  # Journal size in bytes after which the index snapshot is rewritten
+  JOURNAL_LIMIT = 16 * 1024 * 1024
+
+  def __init__(self, settings):
+    super(InvertedIndexer, self).__init__(settings)
+    self.path = getattr(settings, "FULLTEXT_INDEX_PATH", None)
+    self._index = InvertedIndex()
+    self._lock = threading.RLock()
+    self._snapshot_id = None
+    self._journal_offset = 0
+
+  @property
+  def journal_path(self):
+    return self.path + ".journal"
+
+  @contextmanager
+  def _locked(self, exclusive=False):
+    """Lock the index in this process and its files for other processes."""
+    with self._lock:
+      if not self.path:
+        yield
+        return
+      with open(self.path + ".lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+          yield
+        finally:
+          fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+  def _sync(self):
+    """Load changes that were persisted by other processes."""
+    if not self.path:
+      return
+    try:
+      stat = os.stat(self.path)
+      snapshot_id = (stat.st_ino, stat.st_mtime, stat.st_size)
+    except OSError:
+      snapshot_id = None
+    if snapshot_id != self._snapshot_id:
+      if snapshot_id is None:
+        self._index = InvertedIndex()
+      else:
+        with open(self.path, "rb") as snapshot_file:
+          self._index = cPickle.load(snapshot_file)
+      self._snapshot_id = snapshot_id
+      self._journal_offset = 0
+    if not os.path.exists(self.journal_path):
+      return
+    with open(self.journal_path, "rb") as journal:
+      journal.seek(self._journal_offset)
+      while True:
+        try:
+          operations = cPickle.load(journal)
+        except EOFError:
+          break
+        self._apply(operations)
+        self._journal_offset = journal.tell()
+
+  def _persist(self, operations):
+    """Append operations to the journal, rewrite snapshot if it's too big."""
+    if not self.path:
+      if self._index.dead > len(self._index):
+        self._index.compact()
+      return
+    with open(self.journal_path, "ab") as journal:
+      cPickle.dump(operations, journal, cPickle.HIGHEST_PROTOCOL)
+      self._journal_offset = journal.tell()
+    if self._journal_offset < self.JOURNAL_LIMIT:
+      return
+    self._index.compact()
+    tmp_path = self.path + ".tmp"
+    with open(tmp_path, "wb") as snapshot_file:
+      cPickle.dump(self._index, snapshot_file, cPickle.HIGHEST_PROTOCOL)
+    os.rename(tmp_path, self.path)
+    open(self.journal_path, "wb").close()
+    stat = os.stat(self.path)
+    self._snapshot_id = (stat.st_ino, stat.st_mtime, stat.st_size)
+    self._journal_offset = 0
+
+  def _apply(self, operations):
+    """Apply a list of index operations to the in-memory index."""
+    for operation in operations:
+      name, args = operation[0], operation[1:]
+      getattr(self._index, name)(*args)
+      counts_cache.invalidate(args[:1] or None)
+
+  def _pending(self):
+    """Get operations waiting for the current transaction to be committed."""
+    pending = db.session().info.setdefault(PENDING_KEY, {})
+    return pending.setdefault(self, [])
+
+  def commit_operations(self, operations):
+    """Apply and persist operations of a committed transaction."""
+    with self._locked(exclusive=True):
+      self._sync()
+      self._apply(operations)
+      self._persist(operations)
+
+  def create_record(self, record, commit=True):
+    pending = self._pending()
+    for prop, value in record.properties.items():
+      terms = set()
+      for content in value.values():
+        terms.update(tokenize(content))
+      pending.append(("add", record.type, record.key, record.context_id,
+                      prop, sorted(terms)))
+    if commit:
+      db.session.commit()
+
+  def update_record(self, record, commit=True):
+    if record.properties:
+      self._pending().append(("remove", record.type, record.key,
+                              set(record.properties.keys())))
+    self.create_record(record, commit=commit)
+
+  def delete_record(self, key, type, commit=True):
+    # pylint: disable=redefined-builtin
+    self._pending().append(("remove", type, key))
+    if commit:
+      db.session.commit()
+
+  def delete_all_records(self, commit=True):
+    self._pending().append(("clear",))
+    if commit:
+      db.session.commit()
+
+  def delete_records_by_type(self, type, commit=True):
+    # pylint: disable=redefined-builtin
+    self._pending().append(("remove_type", type))
+    if commit:
+      db.session.commit()
+
+  def _match(self, terms, properties=None):
+    """Get (type, key, context_id, property) of documents matching terms."""
+    with self._locked():
+      self._sync()
+      return [
+          doc for doc in (self._index.document(doc_id)
+                          for doc_id in self._index.match(tokenize(terms)))
+          if properties is None or doc[3] in properties
+      ]
+
+  @staticmethod
+  def _get_permission_filter(model_names, permission_type='read',
+                             permission_model=None):
+    """Get a function that checks read access to a (type, key, context)."""
+    from ggrc.utils import query_helpers
+    allowed = {}
+    for model_name in model_names:
+      contexts, resources = query_helpers.get_context_resource(
+          model_name=model_name,
+          permission_type=permission_type,
+          permission_model=permission_model
+      )
+      allowed[model_name] = (None if contexts is None else set(contexts),
+                             set(resources or ()))
+
+    def check(type_, key, context_id):
+      """Check access to a single document."""
+      if type_ not in allowed:
+        return False
+      contexts, resources = allowed[type_]
+      return (contexts is None or context_id in contexts or
+              key in resources)
+    return check
+
+  @staticmethod
+  def _get_owned_objects(types, contact_id):
+    """Get (type, id) pairs of objects shown on the contact's dashboard."""
+    from ggrc.login import is_creator
+    from ggrc.utils import query_helpers
+    query = query_helpers.get_myobjects_query(
+        types=types,
+        contact_id=contact_id,
+        is_creator=is_creator()
+    ).alias()
+    return {(row.type, row.id) for row in
+            db.session.query(query.c.type, query.c.id)}
+
+  @staticmethod
+  def _get_extra_params_keys(type_name, extra_param):
+    """Get ids of objects that match extra params."""
+    from ggrc.models import all_models
+    model = getattr(all_models, type_name, None)
+    if model is None:
+      return None
+    return {row.id for row in
+            db.session.query(model.id).filter_by(**extra_param)}
+
+  def _filter(self, docs, model_names, contact_id=None, types=None,
+              extra_param=None, permission_type='read',
+              permission_model=None):
+    """Filter documents by type, permissions, owner and extra params."""
+    check = self._get_permission_filter(
+        model_names, permission_type, permission_model)
+    owned = self._get_owned_objects(types, contact_id) if contact_id else None
+    extra_keys = None
+    if extra_param and len(model_names) == 1:
+      extra_keys = self._get_extra_params_keys(model_names[0], extra_param)
+    return [
+        doc for doc in docs
+        if check(*doc[:3]) and
+        (owned is None or doc[:2] in owned) and
+        (extra_keys is None or doc[1] in extra_keys)
+    ]
+
+  def search(self, terms, types=None, permission_type='read',
+             permission_model=None, contact_id=None, extra_params=None,
+             limit=None, offset=0):
+    """Search the index and return ordered (key, type) results."""
+    extra_params = extra_params or {}
+    docs = self._match(terms, SEARCHABLE_PROPERTIES)
+    found = self._filter(
+        docs, self._get_grouped_types(types, extra_params),
+        contact_id, types, None, permission_type, permission_model)
+    model_names = self._get_grouped_types(types)
+    for key, value in extra_params.iteritems():
+      if key not in model_names:
+        continue
+      found.extend(self._filter(docs, [key], contact_id, [key], value,
+                                permission_type, permission_model))
+    ranked = {}
+    for type_, key, _, prop in found:
+      rank = 0 if prop == "title" else 1
+      ranked[(type_, key)] = min(rank, ranked.get((type_, key), rank))
+    if limit is None:
+      ordered = sorted(ranked.items(), key=lambda item: (item[1], item[0]))
+    else:
+      ordered = heapq.nsmallest(offset + limit, ranked.items(),
+                                key=lambda item: (item[1], item[0]))
+      ordered = ordered[offset:]
+    return [SearchResult(key, type_) for (type_, key), _ in ordered]
+
+  def counts(self, terms, types=None, contact_id=None,
+             extra_params=None, extra_columns=None):
+    """Count search results for each of the requested objects."""
+    extra_params = extra_params or {}
+    extra_columns = extra_columns or {}
+    docs = self._match(terms, SEARCHABLE_PROPERTIES)
+
+    def count(found, label):
+      keys = defaultdict(set)
+      for type_, key, _, _ in found:
+        keys[type_].add(key)
+      return [(type_, len(type_keys), label)
+              for type_, type_keys in keys.iteritems()]
+
+    results = count(self._filter(
+        docs, self._get_grouped_types(types, extra_params), contact_id,
+        types), "")
+    all_extra_columns = dict(extra_columns.items() +
+                             [(p, p) for p in extra_params
+                              if p not in extra_columns])
+    for key, value in all_extra_columns.iteritems():
+      results.extend(count(self._filter(
+          docs, [value], contact_id, [value], extra_params.get(key, None)),
+          key))
+    return results
+
+  def get_matching_keys(self, type_, prop, terms):
+    """Get ids of objects of type_ which have prop containing terms."""
+    return {key for doc_type, key, _, _ in self._match(terms, {prop})
+            if doc_type == type_}
+
+
+@event.listens_for(db.session.__class__, "after_commit")
+def _after_commit(session):
+  """Apply index operations of the committed transaction to their indexers."""
+  pending = session.info.pop(PENDING_KEY, None)
+  for indexer, operations in (pending or {}).iteritems():
+    if operations:
+      indexer.commit_operations(operations)
+
+
+@event.listens_for(db.session.__class__, "after_rollback")
+def _after_rollback(session):
+  session.info.pop(PENDING_KEY, None)
@@ -2,12 +2,9 @@
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
 """Module contains Indexed mixin class"""
-import itertools
 from collections import namedtuple
 
-from sqlalchemy import inspect, orm
-
-from ggrc import db
+from sqlalchemy import orm
 
 from ggrc import fulltext
 
@@ -40,47 +37,32 @@ class Indexed(object):
     """Update indexer for current instance"""
     if self.__class__.__name__ not in fulltext.get_indexed_model_names():
       return
-    self.delete_record()
-    self.create_record()
+    indexer = fulltext.get_indexer()
+    indexer.update_records([indexer.fts_record_for(self)], False,
+                           replace=True)
 
   def get_reindex_pair(self):
     return (self.__class__.__name__, self.id)
 
   @classmethod
-  def get_insert_query_for(cls, ids):
-    """Return insert class record query. It will return None, if it's empty."""
-    if not ids:
-      return
-    instances = cls.indexed_query().filter(cls.id.in_(ids))
-    indexer = fulltext.get_indexer()
-    keys = inspect(indexer.record_type).c
-    records = (indexer.fts_record_for(i) for i in instances)
-    rows = itertools.chain(*[indexer.records_generator(i) for i in records])
-    values = [{c.name: getattr(r, a) for a, c in keys.items()} for r in rows]
-    if values:
-      return indexer.record_type.__table__.insert().values(values)
+  def bulk_record_update_for(cls, ids):
+    """Bulky update index records for current class
 
-  @classmethod
-  def get_delete_query_for(cls, ids):
-    """Return delete class record query. If ids are empty, will return None."""
+    Only the difference with the stored index records is written.
+    """
     if not ids:
       return
     indexer = fulltext.get_indexer()
-    return indexer.record_type.__table__.delete().where(
-        indexer.record_type.type == cls.__name__
-    ).where(
-        indexer.record_type.key.in_(ids)
+    instances = cls.indexed_query().filter(cls.id.in_(ids)).all()
+    missing = set(ids) - {instance.id for instance in instances}
+    if missing:
+      indexer.delete_records({cls.__name__: missing}, False)
+    indexer.update_records(
+        [indexer.fts_record_for(instance) for instance in instances],
+        False,
+        replace=True,
     )
 
-  @classmethod
-  def bulk_record_update_for(cls, ids):
-    """Bulky update index records for current class"""
-    delete_query = cls.get_delete_query_for(ids)
-    insert_query = cls.get_insert_query_for(ids)
-    for query in [delete_query, insert_query]:
-      if query is not None:
-        db.session.execute(query)
-
   @classmethod
   def indexed_query(cls):
     return cls.query.options(
@@ -22,6 +22,9 @@ from ggrc.models import all_models
 from ggrc.models.inflector import get_model
 from ggrc.utils import query_helpers
 from ggrc.rbac import context_query_filter
+from ggrc.rbac.resource_sets import resource_query_filter
+from ggrc.fulltext import SEARCHABLE_PROPERTIES
+from ggrc.fulltext import index_queue
 from ggrc.fulltext.sql import SqlIndexer
 
 
@@ -53,8 +56,7 @@ class MysqlIndexer(SqlIndexer):
   @staticmethod
   def _get_filter_query(terms):
     """Get the whitelist of fields to filter in full text table."""
-    whitelist = MysqlRecordProperty.property.in_(
-        ['title', 'name', 'email', 'notes', 'description', 'slug'])
+    whitelist = MysqlRecordProperty.property.in_(SEARCHABLE_PROPERTIES)
 
     if not terms:
       return whitelist
@@ -78,7 +80,7 @@ class MysqlIndexer(SqlIndexer):
         if resources:
           resource_sql = and_(
               MysqlRecordProperty.type == model_name,
-              MysqlRecordProperty.key.in_(resources))
+              resource_query_filter(MysqlRecordProperty.key, resources))
         else:
           resource_sql = false()
 
@@ -133,25 +135,15 @@ class MysqlIndexer(SqlIndexer):
         ).filter_by(**extra_param)
     ))
 
-  @staticmethod
-  def _get_grouped_types(types=None, extra_params=None):
-    """Return list of model names from all model names
-
-    if they in sended types and extra_params"""
-    model_names = []
-    for model_klass in all_models.all_models:
-      model_name = model_klass.__name__
-      if types and model_name not in types:
-        continue
-      if extra_params and model_name in extra_params:
-        continue
-      model_names.append(model_name)
-    return model_names
-
   def search(self, terms, types=None, permission_type='read',
-             permission_model=None, contact_id=None, extra_params=None):
+             permission_model=None, contact_id=None, extra_params=None,
+             limit=None, offset=0):
     """Prepare the search query and return the results set based on the
-    full text table."""
+    full text table.
+
+    Objects with matching title come first. If limit is set, only a single
+    page of the ordered results is returned.
+    """
     extra_params = extra_params or {}
     model_names = self._get_grouped_types(types, extra_params)
     columns = (
@@ -183,11 +175,18 @@ class MysqlIndexer(SqlIndexer):
       extra_q = self.search_get_owner_query(extra_q, [key], contact_id)
       extra_q = self._add_extra_params_query(extra_q, key, value)
       unions.append(extra_q)
-    all_queries = union(*unions)
-    all_queries = aliased(all_queries.order_by(
-        all_queries.c.sort_key, all_queries.c.content))
-    return db.session.execute(
-        select([all_queries.c.key, all_queries.c.type]).distinct())
+    all_queries = aliased(union(*unions))
+    query = select([all_queries.c.key, all_queries.c.type]).group_by(
+        all_queries.c.key, all_queries.c.type,
+    ).order_by(
+        func.min(all_queries.c.sort_key),
+        func.min(all_queries.c.content),
+        all_queries.c.type,
+        all_queries.c.key,
+    )
+    if limit is not None:
+      query = query.limit(limit).offset(offset)
+    return db.session.execute(query)
 
   def counts(self, terms, types=None, contact_id=None,
              extra_params=None, extra_columns=None):
@@ -225,6 +224,35 @@ class MysqlIndexer(SqlIndexer):
     return query.all()
 
 
+class MysqlNgramIndexer(MysqlIndexer):
+  """Full text index engine that uses MySQL FULLTEXT index for searching.
+
+  Search terms are matched with MATCH ... AGAINST on the FULLTEXT index with
+  ngram parser instead of LIKE '%term%' that has to scan the whole table.
+  Requires MySQL 5.7.6+ and the ft_fulltext_record_properties_content index.
+
+  To use this indexer set FULLTEXT_INDEXER setting to
+  'ggrc.fulltext.mysql.MysqlNgramIndexer'.
+  """
+
+  # Must be equal to ngram_token_size MySQL server variable. Terms shorter
+  # than this can not be found in ngram index, LIKE is used for them instead.
+  NGRAM_TOKEN_SIZE = 2
+
+  @staticmethod
+  def _get_filter_query(terms):
+    """Get the whitelist of fields to filter in full text table."""
+    # Double quotes have special meaning in boolean mode and are not indexed
+    terms = (terms or u"").replace(u'"', u" ").strip()
+    if len(terms) < MysqlNgramIndexer.NGRAM_TOKEN_SIZE:
+      return MysqlIndexer._get_filter_query(terms)
+    whitelist = MysqlIndexer._get_filter_query(None)
+    # ngram parser turns a phrase into a sequence of adjacent ngrams, which
+    # gives the same "contains" semantics as LIKE '%term%'
+    return and_(whitelist,
+                MysqlRecordProperty.content.match(u'"{}"'.format(terms)))
+
+
 Indexer = MysqlIndexer
 
 
@@ -242,5 +270,10 @@ def update_indexer(session):  # pylint:disable=unused-argument
     if type_name:
       models_ids_to_reindex[type_name].add(id_value)
   db.session.reindex_set = set()
+  if index_queue.is_enabled():
+    index_queue.enqueue((model_name, id_)
+                        for model_name, ids in models_ids_to_reindex.items()
+                        for id_ in ids)
+    return
   for model_name, ids in models_ids_to_reindex.iteritems():
     get_model(model_name).bulk_record_update_for(ids)
@@ -0,0 +1,132 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Cache of person names and emails used in full text records.
+
+Cached entries are kept for a version token of the people table, see
+ggrc.cache.table_versions. The token is replaced after people are changed by
+any worker sharing CACHE_BACKEND and is checked on every prefetch, which is
+done before records of an object or a batch of objects are built. Entries
+read between prefetches can be stale for at most the cache TTL.
+
+People changed in the current transaction of a thread are always loaded
+from the DB by that thread and never cached, so values that are rolled back
+don't stay in the cache. They are removed from the cache once the
+transaction ends.
+"""
+
+import threading
+
+import sqlalchemy as sa
+from sqlalchemy import event
+
+from ggrc import db
+from ggrc import settings
+from ggrc.cache import table_versions
+from ggrc.models.person import Person
+from ggrc.utils.structures import LRUCache
+
+
+_pending = threading.local()  # pylint: disable=invalid-name
+
+
+def _get_pending_ids():
+  """Get ids of people changed in the current transaction of this thread."""
+  if not hasattr(_pending, "ids"):
+    _pending.ids = set()
+  return _pending.ids
+
+
+class PeopleCache(object):
+  """Bounded cache of (name, email) of people by person id."""
+
+  def __init__(self, max_size, ttl=None):
+    self._cache = LRUCache(max_size, ttl)
+    self._version = None
+
+  def _sync(self):
+    """Clear the cache if the people table version has changed."""
+    version = table_versions.get_versions(
+        [Person.__tablename__]).get(Person.__tablename__)
+    if version is None or version != self._version:
+      self._cache.clear()
+      self._version = version
+
+  def prefetch(self, person_ids):
+    """Load all missing people with a single query.
+
+    Returns:
+      dict of (name, email) of the loaded people by person id.
+    """
+    self._sync()
+    pending = _get_pending_ids()
+    missing = {id_ for id_ in person_ids
+               if id_ is not None and
+               (id_ in pending or id_ not in self._cache)}
+    if not missing:
+      return {}
+    people = db.session.query(Person.id, Person.name, Person.email).filter(
+        Person.id.in_(missing))
+    loaded = {}
+    for person in people:
+      loaded[person.id] = (person.name, person.email)
+      if person.id not in pending:
+        self._cache[person.id] = loaded[person.id]
+    return loaded
+
+  def get(self, person):
+    """Get id, name and email for person (either object or dict).
+
+    Name and email of people that don't exist are None.
+    """
+    pending = _get_pending_ids()
+    if isinstance(person, dict):
+      person_id = person["id"]
+      entry = None if person_id in pending else self._cache.get(person_id)
+      if entry is None:
+        entry = self.prefetch([person_id]).get(person_id, (None, None))
+      person_name, person_email = entry
+    else:
+      person_id, person_name, person_email = (person.id, person.name,
+                                              person.email)
+      if (person_id is not None and person_id not in pending and
+              not sa.inspect(person).modified):
+        self._cache[person_id] = (person_name, person_email)
+    return person_id, person_name, person_email
+
+  def invalidate(self, person_id=None):
+    """Remove a single person or all people from the cache."""
+    if person_id is None:
+      self._cache.clear()
+    else:
+      self._cache.pop(person_id, None)
+
+
+people_cache = PeopleCache(  # pylint: disable=invalid-name
+    getattr(settings, "FULLTEXT_PEOPLE_CACHE_SIZE", 10000),
+    getattr(settings, "FULLTEXT_PEOPLE_CACHE_TTL", None),
+)
+
+
+@event.listens_for(Person, "after_insert")
+@event.listens_for(Person, "after_update")
+@event.listens_for(Person, "after_delete")
+def add_pending_person(mapper, connection, target):
+  # pylint: disable=unused-argument
+  _get_pending_ids().add(target.id)
+
+
+def _after_transaction(session):
+  # pylint: disable=unused-argument
+  pending = _get_pending_ids()
+  for person_id in pending:
+    people_cache.invalidate(person_id)
+  pending.clear()
+
+
+def init_session_hooks(session_class):
+  """Drop people changed in transactions of the sessions once they end."""
+  if event.contains(session_class, "after_commit", _after_transaction):
+    return
+  event.listen(session_class, "after_commit", _after_transaction)
+  event.listen(session_class, "after_rollback", _after_transaction)
@@ -3,14 +3,13 @@
 
 """Module for full text index record builder."""
 
-from ggrc import db
 import ggrc.models.all_models
 from ggrc.models.reflection import AttributeInfo
-from ggrc.models.person import Person
 from ggrc.models.mixins import CustomAttributable
 from ggrc.fulltext.attributes import FullTextAttr
 from ggrc.fulltext.attributes import CustomRoleAttr
 from ggrc.fulltext.mixin import Indexed
+from ggrc.fulltext.people import people_cache
 
 
 class Record(object):
@@ -76,25 +75,14 @@ class RecordBuilder(object):
         properties[property_name] = attr.get_property_for(obj)
     return properties
 
-  def get_person_id_name_email(self, person):
+  @staticmethod
+  def get_person_id_name_email(person):
     """Get id, name and email for person (either object or dict).
 
-    If there is a global people map, get the data from it instead of the DB.
+    The data is taken from the shared people cache instead of the DB if
+    possible.
     """
-    if isinstance(person, dict):
-      person_id = person["id"]
-    else:
-      person_id = person.id
-    if person_id in self.indexer.cache['people_map']:
-      person_name, person_email = self.indexer.cache['people_map'][person_id]
-    else:
-      if isinstance(person, dict):
-        person = db.session.query(Person).filter_by(id=person["id"]).one()
-      person_id = person.id
-      person_name = person.name
-      person_email = person.email
-      self.indexer.cache['people_map'][person_id] = (person_name, person_email)
-    return person_id, person_name, person_email
+    return people_cache.get(person)
 
   def build_person_subprops(self, person):
     """Get dict of Person properties for fulltext indexing
@@ -118,7 +106,7 @@ class RecordBuilder(object):
     if not people:
       return {"__sort__": ""}
     _, _, emails = zip(*(self.get_person_id_name_email(p) for p in people))
-    sort_values = (email.split("@")[0] for email in emails)
+    sort_values = (email.split("@")[0] for email in emails if email)
     content = ":".join(sorted(sort_values))
     return {"__sort__": content}
 
@@ -131,10 +119,10 @@ class RecordBuilder(object):
     properties = {}
     if (obj.custom_attribute.attribute_type == "Map:Person" and
             obj.attribute_object_id):
-      properties[attribute_name] = self.build_person_subprops(
-          obj.attribute_object)
+      person = {"id": obj.attribute_object_id}
+      properties[attribute_name] = self.build_person_subprops(person)
       properties[attribute_name].update(self.build_list_sort_subprop(
-          [obj.attribute_object]))
+          [person]))
     else:
       properties[attribute_name] = {"": obj.attribute_value}
     return properties
@@ -157,6 +145,9 @@ class RecordBuilder(object):
 
     properties = self._get_properties(obj)
     if isinstance(obj, CustomAttributable):
+      people_cache.prefetch(
+          cav.attribute_object_id for cav in obj.custom_attribute_values
+          if cav.custom_attribute.attribute_type == "Map:Person")
       for custom_attr in obj.custom_attribute_values:
         properties.update(self.get_custom_attribute_properties(custom_attr))
 
@@ -0,0 +1,215 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Checkpointed full text reindex.
+
+Every indexed model (and snapshots) is reindexed in id ordered chunks. After
+each chunk the last processed id of the model is stored in the
+fulltext_reindex_checkpoints table in the same transaction as the index
+records, so an interrupted reindex can be resumed from the last watermark
+instead of starting from zero. Models are independent units of work and can
+be split across a process pool, each worker with its own DB connection.
+"""
+
+import datetime
+import multiprocessing
+from logging import getLogger
+
+from ggrc import db
+from ggrc import settings
+from ggrc.fulltext import get_indexer
+from ggrc.fulltext import get_indexed_model_names
+from ggrc.fulltext import mixin
+from ggrc.fulltext.people import people_cache
+from ggrc.models import all_models
+from ggrc.models.inflector import get_model
+from ggrc.utils import benchmark
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+
+SNAPSHOT = "Snapshot"
+
+
+class ReindexCheckpoint(db.Model):
+  """Last reindexed id of a model."""
+  __tablename__ = 'fulltext_reindex_checkpoints'
+
+  model = db.Column(db.String(250), primary_key=True)
+  last_id = db.Column(db.Integer, nullable=False, default=0)
+  completed = db.Column(db.Boolean, nullable=False, default=False)
+  updated_at = db.Column(db.DateTime, nullable=False,
+                         default=datetime.datetime.utcnow,
+                         onupdate=datetime.datetime.utcnow)
+
+
+def _get_checkpoint(model_name):
+  checkpoint = ReindexCheckpoint.query.get(model_name)
+  if checkpoint is None:
+    checkpoint = ReindexCheckpoint(model=model_name, last_id=0)
+    db.session.add(checkpoint)
+  return checkpoint
+
+
+def _iter_chunks(id_column, query, last_id, chunk_size):
+  """Yield id ordered chunks of query after last_id.
+
+  Unlike generate_query_chunks this uses id ranges instead of offsets, so the
+  chunks stay stable while the index is written and can start anywhere.
+  """
+  while True:
+    chunk = query.filter(id_column > last_id).order_by(
+        id_column).limit(chunk_size).all()
+    if not chunk:
+      return
+    yield chunk
+    last_id = chunk[-1].id
+
+
+def _index_model_chunk(model, chunk):
+  """Reindex objects of a model with the given ids."""
+  indexer = get_indexer()
+  if issubclass(model, mixin.Indexed):
+    model.bulk_record_update_for([row.id for row in chunk])
+    return
+  ids = [row.id for row in chunk]
+  mapper_class = model._sa_class_manager.mapper.base_mapper.class_
+  instances = model.query.options(
+      db.undefer_group(mapper_class.__name__ + '_complete'),
+  ).filter(model.id.in_(ids))
+  indexer.delete_records({model.__name__: ids}, False)
+  indexer.create_records(
+      [indexer.fts_record_for(instance) for instance in instances], False)
+
+
+def _index_snapshot_chunk(chunk):
+  from ggrc.snapshotter.datastructures import Pair
+  from ggrc.snapshotter.indexer import reindex_pairs
+  reindex_pairs({Pair.from_4tuple(row[1:]) for row in chunk})
+
+
+def reindex_model(model_name, chunk_size=1000):
+  """Reindex a single model starting from its checkpoint.
+
+  Args:
+    model_name: Name of an indexed model or "Snapshot".
+    chunk_size: Number of objects reindexed in a single transaction.
+  """
+  checkpoint = _get_checkpoint(model_name)
+  if checkpoint.completed:
+    return
+  if model_name == SNAPSHOT:
+    snapshot = all_models.Snapshot
+    id_column = snapshot.id
+    query = db.session.query(snapshot.id, snapshot.parent_type,
+                             snapshot.parent_id, snapshot.child_type,
+                             snapshot.child_id)
+  else:
+    model = get_model(model_name)
+    id_column = model.id
+    query = db.session.query(model.id)
+    if not issubclass(model, mixin.Indexed):
+      logger.warning(
+          "Try to index model that not inherited from Indexed mixin: %s",
+          model_name
+      )
+  logger.info("Updating index for: %s from id %s",
+              model_name, checkpoint.last_id)
+  with benchmark("Create records for %s" % model_name):
+    for chunk in _iter_chunks(id_column, query, checkpoint.last_id,
+                              chunk_size):
+      if model_name == SNAPSHOT:
+        _index_snapshot_chunk(chunk)
+      else:
+        _index_model_chunk(model, chunk)
+      checkpoint = _get_checkpoint(model_name)
+      checkpoint.last_id = chunk[-1].id
+      db.session.commit()
+  checkpoint = _get_checkpoint(model_name)
+  checkpoint.completed = True
+  db.session.commit()
+
+
+def _init_worker():
+  """Drop DB session inherited from the parent process."""
+  db.session.remove()
+
+
+def _reindex_worker(model_name):
+  """Reindex a model in a pool worker process."""
+  from ggrc.app import app
+  with app.app_context():
+    try:
+      reindex_model(model_name)
+    finally:
+      db.session.remove()
+  return model_name
+
+
+def _get_processes(processes):
+  """Get number of processes that can be used with the current indexer."""
+  from ggrc.fulltext.sql import SqlIndexer
+  if processes is None:
+    processes = getattr(settings, "FULLTEXT_REINDEX_PROCESSES", 1)
+  indexer = get_indexer()
+  if (not isinstance(indexer, SqlIndexer) and
+          not getattr(indexer, "path", None)):
+    # index changes made in other processes would not be shared
+    return 1
+  return max(int(processes), 1)
+
+
+def get_progress():
+  """Get reindex progress of all models that were started."""
+  return {
+      checkpoint.model: {
+          "last_id": checkpoint.last_id,
+          "completed": checkpoint.completed,
+      }
+      for checkpoint in ReindexCheckpoint.query
+  }
+
+
+def do_reindex(resume=False, processes=None):
+  """Update the full text search index.
+
+  Args:
+    resume: Continue from the stored checkpoints instead of starting over.
+    processes: Number of worker processes, FULLTEXT_REINDEX_PROCESSES setting
+        is used if not set.
+  """
+  indexer = get_indexer()
+  if not resume:
+    ReindexCheckpoint.query.delete()
+    for model_name in get_indexed_model_names():
+      if not issubclass(get_model(model_name), mixin.Indexed):
+        indexer.delete_records_by_type(model_name, False)
+    db.session.commit()
+
+  people_cache.prefetch(row.id for row in
+                        db.session.query(all_models.Person.id))
+
+  completed = {model for model, progress in get_progress().iteritems()
+               if progress["completed"]}
+  model_names = [model for model in sorted(get_indexed_model_names())
+                 if model not in completed]
+  if SNAPSHOT not in completed:
+    model_names.append(SNAPSHOT)
+
+  processes = min(_get_processes(processes), len(model_names))
+  if processes > 1:
+    # connections must not be shared with the forked workers
+    db.session.remove()
+    db.engine.dispose()
+    pool = multiprocessing.Pool(processes, initializer=_init_worker)
+    try:
+      for model_name in pool.imap_unordered(_reindex_worker, model_names):
+        logger.info("Index updated for: %s", model_name)
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    for model_name in model_names:
+      reindex_model(model_name)
+  indexer.invalidate_cache()
@@ -3,55 +3,202 @@
 
 """SQL routines for full-text indexing."""
 
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy import tuple_
+
 from ggrc import db
+from ggrc.cache import table_versions
 from ggrc.fulltext import Indexer
+from ggrc.fulltext import counts_cache
 
 
 class SqlIndexer(Indexer):
-  def records_generator(self, record):
+  """Indexer that stores records in record_type table."""
+
+  # Columns that are not part of the primary key and can change
+  UPDATABLE_COLUMNS = ("context_id", "tags", "content")
+
+  def rows_generator(self, record):
+    """Generate column values of record_type rows for a single record."""
     for prop, value in record.properties.items():
       for subproperty, content in value.items():
         if content is not None:
-          yield self.record_type(
-              key=record.key,
-              type=record.type,
-              context_id=record.context_id,
-              tags=record.tags,
-              property=prop,
-              subproperty=unicode(subproperty),
-              content=unicode(content),
-          )
+          yield {
+              "key": record.key,
+              "type": record.type,
+              "context_id": record.context_id,
+              "tags": record.tags,
+              "property": prop,
+              "subproperty": unicode(subproperty),
+              "content": unicode(content),
+          }
 
-  def create_record(self, record, commit=True):
-    for db_record in self.records_generator(record):
-      db.session.add(db_record)
+  def records_generator(self, record):
+    for row in self.rows_generator(record):
+      yield self.record_type(**row)
+
+  def _get_pk(self, row):
+    return tuple(row[column.name] for column in
+                 self.record_type.__table__.primary_key.columns)
+
+  def _get_rows(self, records):
+    """Get rows of records by primary key, the last duplicate wins."""
+    rows = {}
+    for record in records:
+      for row in self.rows_generator(record):
+        rows[self._get_pk(row)] = row
+    return rows
+
+  def _get_insert_query(self, rows):
+    if rows:
+      return self.record_type.__table__.insert().values(rows)
+
+  def get_insert_query(self, records):
+    """Get multi-row insert query for records or None if there are no rows.
+
+    Rows with the same primary key are inserted only once, the last one wins.
+    """
+    return self._get_insert_query(self._get_rows(records).values())
+
+  def _get_existing_rows(self, records, replace):
+    """Get stored rows by primary key for the properties of records.
+
+    Args:
+      records: Records that are going to be written.
+      replace: If True, all rows of the record objects are returned, otherwise
+          only rows of the properties present in the records.
+    """
+    keys = defaultdict(set)
+    properties = defaultdict(set)
+    for record in records:
+      keys[record.type].add(record.key)
+      properties[(record.type, record.key)].update(record.properties)
+    table = self.record_type.__table__
+    rows = {}
+    for type_, type_keys in keys.iteritems():
+      query = db.session.execute(table.select().where(
+          self.record_type.type == type_
+      ).where(
+          self.record_type.key.in_(type_keys)
+      ))
+      for row in query:
+        row = dict(row.items())
+        if replace or row["property"] in properties[(type_, row["key"])]:
+          rows[self._get_pk(row)] = row
+    return rows
+
+  def _delete_rows(self, pks):
+    """Delete rows with given primary keys with one query per type."""
+    to_delete = defaultdict(list)
+    for key, type_, prop, subproperty in pks:
+      to_delete[type_].append((key, prop, subproperty))
+    for type_, type_pks in to_delete.iteritems():
+      db.session.execute(self.record_type.__table__.delete().where(
+          self.record_type.type == type_
+      ).where(
+          tuple_(self.record_type.key,
+                 self.record_type.property,
+                 self.record_type.subproperty).in_(type_pks)
+      ))
+
+  def _upsert_rows(self, rows):
+    """Insert rows or update changed columns of stored rows.
+
+    Rows stored by a concurrent update of the same records after they were
+    read are updated instead of failing on a duplicate primary key.
+    """
+    table = self.record_type.__table__
+    quote = db.engine.dialect.identifier_preparer.quote
+    columns = rows[0].keys()
+    query = text(u"""
+        INSERT INTO {table} ({columns})
+        VALUES ({values})
+        ON DUPLICATE KEY UPDATE {updates}
+    """.format(
+        table=quote(table.name),
+        columns=", ".join(quote(name) for name in columns),
+        values=", ".join(":" + name for name in columns),
+        updates=", ".join("{0} = VALUES({0})".format(quote(name))
+                          for name in self.UPDATABLE_COLUMNS),
+    ))
+    db.session.execute(query, rows)
+    # textual statements are not tracked by table versions
+    table_versions.add_changed_tables([table.name])
+
+  def create_records(self, records, commit=True):
+    records = list(records)
+    counts_cache.invalidate({record.type for record in records})
+    query = self.get_insert_query(records)
+    if query is not None:
+      db.session.execute(query)
+    if commit:
+      db.session.commit()
+
+  def update_records(self, records, commit=True, replace=False):
+    """Write only the difference between records and the stored rows.
+
+    Only new rows and rows with changed content are written, with a single
+    INSERT ... ON DUPLICATE KEY UPDATE, so overlapping updates of the same
+    records don't fail on rows inserted after they were read. Only rows that
+    are missing in the records are deleted.
+
+    Args:
+      records: Records to write.
+      commit: Commit the session after writing.
+      replace: If True, rows of properties that are missing in the records are
+          deleted too, otherwise only the properties present are updated.
+    """
+    records = list(records)
+    counts_cache.invalidate({record.type for record in records})
+    new_rows = self._get_rows(records)
+    old_rows = self._get_existing_rows(records, replace)
+    self._delete_rows([pk for pk in old_rows if pk not in new_rows])
+    changed = [row for pk, row in new_rows.iteritems()
+               if pk not in old_rows or
+               any(row[name] != old_rows[pk][name]
+                   for name in self.UPDATABLE_COLUMNS)]
+    if changed:
+      self._upsert_rows(changed)
     if commit:
       db.session.commit()
 
+  def create_record(self, record, commit=True):
+    self.create_records([record], commit=commit)
+
   def update_record(self, record, commit=True):
-    # remove the obsolete index entries
-    if record.properties:
-      db.session.query(self.record_type).filter(
-          self.record_type.key == record.key,
-          self.record_type.type == record.type,
-          self.record_type.property.in_(list(record.properties.keys())),
-      ).delete(synchronize_session="fetch")
-    # add new index entries
-    self.create_record(record, commit=commit)
+    self.update_records([record], commit=commit)
 
   def delete_record(self, key, type, commit=True):
+    counts_cache.invalidate([type])
     db.session.query(self.record_type).filter(
         self.record_type.key == key,
         self.record_type.type == type).delete()
     if commit:
       db.session.commit()
 
+  def delete_records(self, keys_by_type, commit=True):
+    table = self.record_type.__table__
+    counts_cache.invalidate(keys_by_type.keys())
+    for type_, keys in keys_by_type.iteritems():
+      if keys:
+        db.session.execute(table.delete().where(
+            self.record_type.type == type_
+        ).where(
+            self.record_type.key.in_(keys)
+        ))
+    if commit:
+      db.session.commit()
+
   def delete_all_records(self, commit=True):
+    counts_cache.invalidate()
     db.session.query(self.record_type).delete()
     if commit:
       db.session.commit()
 
   def delete_records_by_type(self, type, commit=True):
+    counts_cache.invalidate([type])
     db.session.query(self.record_type).filter(
         self.record_type.type == type).delete()
     if commit:
@@ -0,0 +1,66 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add FULLTEXT index with ngram parser on fulltext_record_properties.content
+
+The index is used by MysqlNgramIndexer. The ngram parser is available only
+in MySQL 5.7.6 and newer, so on older servers the index is not created and
+the default LIKE based MysqlIndexer must be used.
+
+Create Date: 2017-05-03 10:15:12.418733
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import re
+from logging import getLogger
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c53d4510f248'
+down_revision = '1ac595e94a23'
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+INDEX_NAME = "ft_fulltext_record_properties_content"
+
+NGRAM_MIN_VERSION = (5, 7, 6)
+
+
+def _server_version():
+  """Get MySQL server version as a tuple of integers."""
+  version = op.get_bind().execute("SELECT VERSION()").scalar()
+  match = re.match(r"(\d+)\.(\d+)\.(\d+)", version)
+  if not match:
+    return ()
+  return tuple(int(part) for part in match.groups())
+
+
+def _index_exists():
+  return bool(op.get_bind().execute(
+      "SHOW INDEX FROM fulltext_record_properties WHERE Key_name = %s",
+      INDEX_NAME,
+  ).fetchall())
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  if _server_version() < NGRAM_MIN_VERSION:
+    logger.warning(
+        "MySQL server does not support ngram parser, skipping creation of "
+        "%s index. MysqlNgramIndexer can not be used with this database.",
+        INDEX_NAME,
+    )
+    return
+  op.execute("""
+      ALTER TABLE fulltext_record_properties
+      ADD FULLTEXT INDEX {} (content) WITH PARSER ngram
+  """.format(INDEX_NAME))
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  if _index_exists():
+    op.drop_index(INDEX_NAME, "fulltext_record_properties")
@@ -0,0 +1,36 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext reindex checkpoints table
+
+Create Date: 2017-05-08 14:32:07.551204
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3f1b4c2de9a7'
+down_revision = 'c53d4510f248'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_reindex_checkpoints',
+      sa.Column('model', sa.String(length=250), nullable=False),
+      sa.Column('last_id', sa.Integer(), nullable=False, server_default="0"),
+      sa.Column('completed', sa.Boolean(), nullable=False,
+                server_default="0"),
+      sa.Column('updated_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('model'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_reindex_checkpoints')
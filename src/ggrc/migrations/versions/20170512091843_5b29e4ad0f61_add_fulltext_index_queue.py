@@ -0,0 +1,40 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext index queue table
+
+Create Date: 2017-05-12 09:18:43.207815
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5b29e4ad0f61'
+down_revision = '3f1b4c2de9a7'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_index_queue',
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('object_id', sa.Integer(), nullable=False),
+      sa.Column('version', sa.Integer(), nullable=False, server_default="1"),
+      sa.Column('queued_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('object_type', 'object_id'),
+  )
+  op.create_index(
+      'ix_fulltext_index_queue_queued_at',
+      'fulltext_index_queue',
+      ['queued_at'],
+      unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_index_queue')
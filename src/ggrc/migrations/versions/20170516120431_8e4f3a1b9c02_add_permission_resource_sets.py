@@ -0,0 +1,45 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add permission resource sets tables
+
+Create Date: 2017-05-16 12:04:31.730264
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '8e4f3a1b9c02'
+down_revision = '5b29e4ad0f61'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'permission_resource_sets',
+      sa.Column('token', sa.String(length=40), nullable=False),
+      sa.Column('created_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('token'),
+  )
+  op.create_index(
+      'ix_permission_resource_sets_created_at',
+      'permission_resource_sets',
+      ['created_at'],
+      unique=False)
+  op.create_table(
+      'permission_resources',
+      sa.Column('token', sa.String(length=40), nullable=False),
+      sa.Column('resource_id', sa.Integer(), nullable=False),
+      sa.PrimaryKeyConstraint('token', 'resource_id'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('permission_resources')
+  op.drop_table('permission_resource_sets')
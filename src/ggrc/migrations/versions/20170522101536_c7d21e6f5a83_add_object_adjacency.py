@@ -0,0 +1,113 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add object adjacency table
+
+Create Date: 2017-05-22 10:15:36.417296
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'c7d21e6f5a83'
+down_revision = '8e4f3a1b9c02'
+
+
+# (table, object_type, object_id, related_type, related_id, condition) of
+# mappings stored in rows of tables, types are SQL expressions
+MAPPINGS = [
+    ("relationships", "source_type", "source_id",
+     "destination_type", "destination_id", None),
+    ("object_people", "'Person'", "person_id",
+     "personable_type", "personable_id", None),
+    ("object_owners", "'Person'", "person_id",
+     "ownable_type", "ownable_id", None),
+    ("snapshots", "parent_type", "parent_id", "'Snapshot'", "id", None),
+    ("custom_attribute_values", "attributable_type", "attributable_id",
+     "attribute_value", "attribute_object_id",
+     "attribute_object_id IS NOT NULL"),
+    ("audits", "'Program'", "program_id", "'Audit'", "id", None),
+    ("risk_assessments", "'Program'", "program_id",
+     "'RiskAssessment'", "id", None),
+    ("task_group_objects", "'TaskGroup'", "task_group_id",
+     "object_type", "object_id", None),
+]
+
+CONTACT_TABLES = [
+    ("audits", "Audit"),
+    ("cycles", "Cycle"),
+    ("cycle_task_groups", "CycleTaskGroup"),
+    ("cycle_task_group_object_tasks", "CycleTaskGroupObjectTask"),
+    ("task_groups", "TaskGroup"),
+    ("task_group_tasks", "TaskGroupTask"),
+]
+
+
+def get_mappings():
+  """Get mappings including contacts of objects."""
+  mappings = list(MAPPINGS)
+  for table, model in CONTACT_TABLES:
+    for column in ("contact_id", "secondary_contact_id"):
+      mappings.append((table, "'Person'", column, "'{}'".format(model), "id",
+                       None))
+  return mappings
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'object_adjacency',
+      sa.Column('related_type', sa.String(length=250), nullable=False),
+      sa.Column('related_id', sa.Integer(), nullable=False),
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('object_id', sa.Integer(), nullable=False),
+      sa.Column('via', sa.String(length=64), nullable=False),
+      sa.Column('via_id', sa.Integer(), nullable=False),
+      sa.PrimaryKeyConstraint('related_type', 'related_id', 'object_type',
+                              'object_id', 'via', 'via_id'),
+  )
+  op.create_index(
+      'ix_object_adjacency_via',
+      'object_adjacency',
+      ['via', 'via_id'],
+      unique=False)
+
+  # tables of extensions are missing when their migrations run later
+  existing = set(sa.inspect(op.get_bind()).get_table_names())
+  for mapping in get_mappings():
+    table, object_type, object_id, related_type, related_id, condition = \
+        mapping
+    if table not in existing:
+      continue
+    directions = ((object_type, object_id, related_type, related_id),
+                  (related_type, related_id, object_type, object_id))
+    for from_type, from_id, to_type, to_id in directions:
+      conditions = ["{} IS NOT NULL".format(expression)
+                    for expression in (from_type, from_id, to_type, to_id)]
+      if condition:
+        conditions.append(condition)
+      op.execute("""
+          INSERT IGNORE INTO object_adjacency (
+              related_type, related_id, object_type, object_id, via, via_id
+          )
+          SELECT {to_type}, {to_id}, {from_type}, {from_id}, '{table}', id
+          FROM {table}
+          WHERE {conditions}
+      """.format(
+          to_type=to_type,
+          to_id=to_id,
+          from_type=from_type,
+          from_id=from_id,
+          table=table,
+          conditions=" AND ".join(conditions),
+      ))
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('object_adjacency')
@@ -0,0 +1,51 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add last use time of permission resource sets
+
+Create Date: 2017-05-24 09:30:12.518394
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '4a9c1e7b2d55'
+down_revision = 'c7d21e6f5a83'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.add_column(
+      'permission_resource_sets',
+      sa.Column('last_used_at', sa.DateTime(), nullable=True),
+  )
+  op.execute("""
+      UPDATE permission_resource_sets SET last_used_at = created_at
+  """)
+  op.alter_column(
+      'permission_resource_sets', 'last_used_at',
+      existing_type=sa.DateTime(), nullable=False)
+  op.drop_index('ix_permission_resource_sets_created_at',
+                table_name='permission_resource_sets')
+  op.create_index(
+      'ix_permission_resource_sets_last_used_at',
+      'permission_resource_sets',
+      ['last_used_at'],
+      unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_index('ix_permission_resource_sets_last_used_at',
+                table_name='permission_resource_sets')
+  op.create_index(
+      'ix_permission_resource_sets_created_at',
+      'permission_resource_sets',
+      ['created_at'],
+      unique=False)
+  op.drop_column('permission_resource_sets', 'last_used_at')
@@ -123,6 +123,9 @@ def init_lazy_mixins():
 def init_session_monitor_cache():
   from sqlalchemy.orm.session import Session
   from sqlalchemy import event
+  from ggrc.cache import table_versions
+  from ggrc.fulltext import counts_cache
+  from ggrc.fulltext import people
   from ggrc.services.common import get_cache
 
   def update_cache_before_flush(session, flush_context, objects):
@@ -144,6 +147,9 @@ def init_session_monitor_cache():
   event.listen(Session, 'after_flush', update_cache_after_flush)
   event.listen(Session, 'after_commit', clear_cache)
   event.listen(Session, 'after_rollback', clear_cache)
+  table_versions.init_session_hooks(Session)
+  counts_cache.init_session_hooks(Session)
+  people.init_session_hooks(Session)
 
 
 def init_sanitization_hooks():
@@ -155,10 +161,16 @@ def init_sanitization_hooks():
       sa.event.listen(attr, 'set', html_cleaner.cleaner, retval=True)
 
 
+def init_adjacency_hooks():
+  from ggrc.models import adjacency
+  adjacency.init_hooks()
+
+
 def init_app(app):
   init_all_models(app)
   init_lazy_mixins()
   init_session_monitor_cache()
   init_sanitization_hooks()
+  init_adjacency_hooks()
 
 from ggrc.models.inflector import get_model  # noqa
@@ -0,0 +1,407 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Materialized adjacency of related objects.
+
+Objects are related by relationships and by special mappings, like people of
+ObjectPerson rows, contacts or the program of an audit. The object_adjacency
+table stores each such mapping in both directions, so objects of a type that
+are related to given objects are found with a single index range lookup.
+
+Every row keeps the source table (via) and the id of the source row (via_id).
+INSERT, UPDATE and DELETE statements on source tables, issued by the ORM or
+directly like the INSERT IGNORE of automappings or the INSERT ... SELECT of
+snapshot relationships, are followed by updating the rows derived from the
+changed source rows in the same transaction. UPDATE statements that don't
+set mapping columns are skipped, and ids of rows changed by statements
+filtered only by id, like those of ORM flushes, are taken from statement
+parameters instead of being selected. Textual SQL statements are not
+tracked, so data migrations that change source tables have to update
+object_adjacency as well.
+"""
+
+import collections
+import logging
+import threading
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.util import _distill_params
+from sqlalchemy.sql import operators
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.dml import Update
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import BinaryExpression
+from sqlalchemy.sql.elements import BindParameter
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models.mixins import WithContact
+
+
+logger = logging.getLogger(__name__)
+
+# ids of source rows selected before UPDATE and DELETE statements and max ids
+# before INSERT ... SELECT statements
+_changed = threading.local()  # pylint: disable=invalid-name
+
+
+class ObjectAdjacency(db.Model):
+  """Object related to another object through a row of the via table."""
+  __tablename__ = "object_adjacency"
+
+  related_type = db.Column(db.String(250), primary_key=True)
+  related_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  object_type = db.Column(db.String(250), primary_key=True)
+  object_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  via = db.Column(db.String(64), primary_key=True)
+  via_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+  __table_args__ = (
+      db.Index("ix_object_adjacency_via", "via", "via_id"),
+  )
+
+
+# object_type, object_id, related_type, related_id expressions of a mapping
+# stored by a source row and an optional condition for the row
+Edge = collections.namedtuple(
+    "Edge", ["object_type", "object_id", "related_type", "related_id",
+             "condition"])
+
+
+class Source(object):
+  """Table with rows that map objects to each other."""
+
+  def __init__(self, table, key_columns=None):
+    self.table = table
+    self.key_columns = key_columns
+    self.edges = []
+    self._column_names = None
+
+  def add_edge(self, object_type, object_id, related_type, related_id,
+               condition=None):
+    """Add a mapping stored in each row, types can be strings or columns."""
+    # pylint: disable=too-many-arguments
+    def expression(part):
+      if hasattr(part, "__clause_element__"):
+        return part.__clause_element__()
+      return part
+
+    self.edges.append(Edge(*[expression(part) for part in (
+        object_type, object_id, related_type, related_id, condition)]))
+    self._column_names = None
+
+  @property
+  def column_names(self):
+    """Get names of columns used by mappings."""
+    if self._column_names is not None:
+      return self._column_names
+    names = set()
+    for edge in self.edges:
+      for part in edge:
+        if part is not None and not isinstance(part, basestring):
+          visitors.traverse(part, {}, {
+              "column": lambda column: names.add(column.name),
+          })
+    self._column_names = names
+    return names
+
+  def select_edges(self, whereclause):
+    """Get select of object_adjacency rows for the source rows."""
+    def value(part):
+      if isinstance(part, basestring):
+        return sa.literal(part, sa.String)
+      return part
+
+    selects = []
+    for edge in self.edges:
+      directions = (
+          (edge.object_type, edge.object_id,
+           edge.related_type, edge.related_id),
+          (edge.related_type, edge.related_id,
+           edge.object_type, edge.object_id),
+      )
+      for object_type, object_id, related_type, related_id in directions:
+        conditions = [whereclause, object_id.isnot(None),
+                      related_id.isnot(None)]
+        if edge.condition is not None:
+          conditions.append(edge.condition)
+        for part in (object_type, related_type):
+          if not isinstance(part, basestring):
+            conditions.append(part.isnot(None))
+        selects.append(sa.select([
+            value(related_type), related_id,
+            value(object_type), object_id,
+            sa.literal(self.table.name, sa.String), self.table.c.id,
+        ]).where(sa.and_(*conditions)))
+    return sa.union_all(*selects)
+
+
+_sources = None  # pylint: disable=invalid-name
+
+
+def get_sources():
+  """Get sources of mappings by table name."""
+  # pylint: disable=global-statement,invalid-name
+  global _sources
+  if _sources is not None:
+    return _sources
+  sources = {}
+
+  def add(model, *args, **kwargs):
+    """Add edge of model rows, key_columns are set for the first edge."""
+    table = model.__table__
+    if table.name not in sources:
+      sources[table.name] = Source(table, kwargs.pop("key_columns", None))
+    sources[table.name].add_edge(*args, **kwargs)
+
+  relationship = all_models.Relationship
+  add(relationship, relationship.source_type, relationship.source_id,
+      relationship.destination_type, relationship.destination_id,
+      key_columns=("source_type", "source_id",
+                   "destination_type", "destination_id"))
+  object_person = all_models.ObjectPerson
+  add(object_person, "Person", object_person.person_id,
+      object_person.personable_type, object_person.personable_id,
+      key_columns=("person_id", "personable_type", "personable_id"))
+  object_owner = all_models.ObjectOwner
+  add(object_owner, "Person", object_owner.person_id,
+      object_owner.ownable_type, object_owner.ownable_id,
+      key_columns=("person_id", "ownable_type", "ownable_id"))
+  snapshot = all_models.Snapshot
+  add(snapshot, snapshot.parent_type, snapshot.parent_id,
+      "Snapshot", snapshot.id,
+      key_columns=("parent_type", "parent_id", "child_type", "child_id"))
+  value = all_models.CustomAttributeValue
+  add(value, value.attributable_type, value.attributable_id,
+      value.attribute_value, value.attribute_object_id)
+  add(all_models.Audit, "Program", all_models.Audit.program_id,
+      "Audit", all_models.Audit.id)
+  risk_assessment = getattr(all_models, "RiskAssessment", None)
+  if risk_assessment is not None:
+    add(risk_assessment, "Program", risk_assessment.program_id,
+        "RiskAssessment", risk_assessment.id)
+  task_group_object = getattr(all_models, "TaskGroupObject", None)
+  if task_group_object is not None:
+    add(task_group_object, "TaskGroup", task_group_object.task_group_id,
+        task_group_object.object_type, task_group_object.object_id)
+  for model in all_models.all_models:
+    if not issubclass(model, WithContact):
+      continue
+    mapper = sa.inspect(model)
+    condition = None
+    if mapper.polymorphic_on is not None:
+      condition = mapper.polymorphic_on == mapper.polymorphic_identity
+    for column in (model.__table__.c.contact_id,
+                   model.__table__.c.secondary_contact_id):
+      add(model, "Person", column, model.__name__, model.__table__.c.id,
+          condition=condition)
+  _sources = sources
+  return sources
+
+
+def get_related_ids(object_type, related_type, related_ids):
+  """Get query for ids of objects of object_type related to related_ids."""
+  return db.session.query(ObjectAdjacency.object_id).filter(
+      ObjectAdjacency.related_type == related_type,
+      ObjectAdjacency.related_id.in_(related_ids),
+      ObjectAdjacency.object_type == object_type,
+  ).distinct()
+
+
+def _get_source(clauseelement):
+  """Get source of a DML statement on a source table or None."""
+  if not isinstance(clauseelement, UpdateBase):
+    return None
+  source = get_sources().get(getattr(clauseelement.table, "name", None))
+  if source is None or source.table is not clauseelement.table:
+    # lightweight tables of data migrations aren't tracked
+    return None
+  return source
+
+
+def _get_statement_rows(clauseelement, multiparams, params):
+  """Get parameters of all rows of a statement."""
+  if getattr(clauseelement, "_has_multi_parameters", False):
+    rows = clauseelement.parameters
+  else:
+    rows = _distill_params(multiparams, params) or [{}]
+    values = getattr(clauseelement, "parameters", None)
+    if values:
+      rows = [dict(values, **row) for row in rows]
+  return [{getattr(key, "name", key): value for key, value in row.iteritems()}
+          for row in rows]
+
+
+def _delete_edges(conn, source, ids=None):
+  """Delete rows of source rows with ids, or of all source rows."""
+  table = ObjectAdjacency.__table__
+  condition = table.c.via == source.table.name
+  if ids is not None:
+    condition = sa.and_(condition, table.c.via_id.in_(ids))
+  conn.execute(table.delete().where(condition))
+
+
+def _insert_edges(conn, source, ids=None):
+  """Insert rows of source rows with ids, or of all source rows."""
+  table = ObjectAdjacency.__table__
+  whereclause = sa.true()
+  if ids is not None:
+    whereclause = source.table.c.id.in_(ids)
+  # both directions of a row can be the same, like equal contacts
+  conn.execute(table.insert().prefix_with("IGNORE").from_select(
+      [table.c.related_type, table.c.related_id,
+       table.c.object_type, table.c.object_id,
+       table.c.via, table.c.via_id],
+      source.select_edges(whereclause),
+  ))
+
+
+@contextmanager
+def _keep_open(conn):
+  """Don't close a connection of Engine.execute() with helper results."""
+  close_with_result = conn.should_close_with_result
+  conn.should_close_with_result = False
+  try:
+    yield conn
+  finally:
+    conn.should_close_with_result = close_with_result
+
+
+def _get_param_ids(source, clauseelement, rows):
+  """Get ids of rows of a statement filtered only by id, like ORM flushes.
+
+  Returns:
+    set of ids, or None if the statement has other conditions.
+  """
+  # pylint: disable=protected-access
+  whereclause = clauseelement._whereclause
+  clauses = getattr(whereclause, "clauses", [whereclause])
+  if len(clauses) != 1:
+    return None
+  clause = clauses[0]
+  if (not isinstance(clause, BinaryExpression) or
+          clause.operator is not operators.eq or
+          getattr(clause.left, "table", None) is not source.table or
+          clause.left.name != "id" or
+          not isinstance(clause.right, BindParameter)):
+    return None
+  ids = {row.get(clause.right.key, clause.right.value) for row in rows}
+  if None in ids:
+    return None
+  return ids
+
+
+def _get_ids(conn, query, rows):
+  ids = set()
+  for row in rows:
+    ids.update(result[0] for result in conn.execute(query, row))
+  return ids
+
+
+def _get_inserted_ids(conn, source, clauseelement, rows, result):
+  """Get ids of rows written by an insert statement.
+
+  Returns:
+    set of ids, or None if the inserted rows can't be identified.
+  """
+  table = source.table
+  if clauseelement.select is not None:
+    # INSERT ... SELECT rows get ids above the max id read before it
+    max_id = _changed.ids.pop(id(clauseelement))
+    return _get_ids(conn, sa.select([table.c.id]).where(
+        table.c.id > max_id), [{}])
+  if (len(rows) == 1 and not result.context.executemany and
+          not getattr(clauseelement, "_has_multi_parameters", False)):
+    primary_key = result.inserted_primary_key
+    if primary_key and primary_key[0]:
+      return {primary_key[0]}
+  if not source.key_columns or not all(name in row for row in rows
+                                       for name in source.key_columns):
+    return None
+  return _get_ids(conn, sa.select([table.c.id]).where(sa.tuple_(*[
+      table.c[name] for name in source.key_columns
+  ]).in_([tuple(row[name] for name in source.key_columns)
+          for row in rows])), [{}])
+
+
+def _before_execute(conn, clauseelement, multiparams, params):
+  """Find source rows changed by UPDATE, DELETE and INSERT ... SELECT."""
+  source = _get_source(clauseelement)
+  if source is None:
+    return
+  if not hasattr(_changed, "ids"):
+    _changed.ids = {}
+  if isinstance(clauseelement, Insert):
+    if clauseelement.select is not None:
+      with _keep_open(conn):
+        _changed.ids[id(clauseelement)] = conn.execute(sa.select([
+            sa.func.coalesce(sa.func.max(source.table.c.id), 0)
+        ])).scalar()
+    return
+  rows = _get_statement_rows(clauseelement, multiparams, params)
+  if isinstance(clauseelement, Update):
+    changed = {name for row in rows for name in row}
+    if not changed & source.column_names:
+      return
+  ids = _get_param_ids(source, clauseelement, rows)
+  if ids is None:
+    # pylint: disable=protected-access
+    query = sa.select([source.table.c.id])
+    if clauseelement._whereclause is not None:
+      query = query.where(clauseelement._whereclause)
+    with _keep_open(conn):
+      ids = _get_ids(conn, query, rows)
+  _changed.ids[id(clauseelement)] = ids
+
+
+def _after_execute(conn, clauseelement, multiparams, params, result):
+  """Update object_adjacency rows of changed source rows."""
+  source = _get_source(clauseelement)
+  if source is None:
+    return
+  if not conn.closed:
+    with _keep_open(conn):
+      _update_edges(conn, source, clauseelement, multiparams, params, result)
+    return
+  # Engine.execute() closes its connection together with the result, the
+  # statement is autocommitted already
+  conn = conn.engine.connect()
+  try:
+    _update_edges(conn, source, clauseelement, multiparams, params, result)
+  finally:
+    conn.close()
+
+
+def _update_edges(conn, source, clauseelement, multiparams, params, result):
+  """Replace object_adjacency rows of source rows changed by a statement."""
+  # pylint: disable=too-many-arguments
+  if isinstance(clauseelement, Insert):
+    ids = _get_inserted_ids(
+        conn, source, clauseelement,
+        _get_statement_rows(clauseelement, multiparams, params), result)
+    if ids is None:
+      logger.warning("Rebuilding object_adjacency rows of %s after a bulk "
+                     "insert without key columns", source.table.name)
+  else:
+    ids = getattr(_changed, "ids", {}).pop(id(clauseelement), set())
+  if ids is not None and not ids:
+    return
+  if not isinstance(clauseelement, Insert):
+    # inserted rows have no object_adjacency rows yet, and rows skipped by
+    # INSERT IGNORE keep theirs
+    _delete_edges(conn, source, ids)
+  if not isinstance(clauseelement, sa.sql.dml.Delete):
+    _insert_edges(conn, source, ids)
+
+
+def init_hooks():
+  """Keep object_adjacency up to date with changes of source tables."""
+  if event.contains(Engine, "after_execute", _after_execute):
+    return
+  get_sources()
+  event.listen(Engine, "before_execute", _before_execute)
+  event.listen(Engine, "after_execute", _after_execute)
@@ -1,6 +1,9 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
+import hashlib
+import json
+
 from flask import g
 from flask.ext.login import current_user
 from ggrc.extensions import get_extension_instance
@@ -26,6 +29,29 @@ def get_user():
   return None
 
 
+def permissions_fingerprint():
+  """Get hash of the current user and their permissions, once per request.
+
+  Values computed from data filtered by permissions can be shared between
+  requests with the same fingerprint.
+  """
+  fingerprint = getattr(g, '_permissions_fingerprint', None)
+  if fingerprint is None:
+    user = get_user()
+    user_permissions = permissions_for(user)
+    # Permission providers that load permissions lazily store them in
+    # g._request_permissions
+    if hasattr(user_permissions, 'check_permissions'):
+      user_permissions.check_permissions()
+    fingerprint = hashlib.sha1(json.dumps(
+        [getattr(user, 'id', None), getattr(g, '_request_permissions', None)],
+        sort_keys=True,
+        default=repr,
+    )).hexdigest()
+    g._permissions_fingerprint = fingerprint
+  return fingerprint
+
+
 def is_allowed_create(resource_type, resource_id, context_id):
   """Whether or not the user is allowed to create a resource of the specified
   type in the context.
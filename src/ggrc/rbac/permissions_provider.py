@@ -17,6 +17,9 @@ Permission = namedtuple(
 
 _contributing_resource_types = {}
 
+# Resource id that is not in any list of resources
+_NO_RESOURCE = object()
+
 
 def get_contributing_resource_types(resource_type):
   """Return a list of resource types using the same context space.
@@ -280,6 +283,33 @@ class DefaultUserPermissions(UserPermissions):
     """Whether or not the user is allowed to read the given instance"""
     return self._is_allowed_for(instance, 'read')
 
+  def filter_allowed_read(self, triples):
+    """Get (resource_type, resource_id, context_id) triples the user can read.
+
+    The result is the same as checking every triple with is_allowed_read, but
+    resource ids are matched against one set per resource type, and other
+    permissions are checked once per (resource_type, context_id) pair.
+    """
+    permissions = self._permissions()
+    resources = {}
+    allowed_contexts = {}
+    allowed = set()
+    for resource_type, resource_id, context_id in triples:
+      if resource_type not in resources:
+        resources[resource_type] = set(
+            permissions.get('read', {})
+            .get(resource_type, {})
+            .get('resources', []))
+      key = (resource_type, context_id)
+      if key not in allowed_contexts:
+        # A resource id that is not in any list checks everything but the
+        # resource lists
+        allowed_contexts[key] = self.is_allowed_read(
+            resource_type, _NO_RESOURCE, context_id)
+      if allowed_contexts[key] or resource_id in resources[resource_type]:
+        allowed.add((resource_type, resource_id, context_id))
+    return allowed
+
   def is_allowed_update(self, resource_type, resource_id, context_id):
     """Whether or not the user is allowed to update a resource of the specified
     type in the context."""
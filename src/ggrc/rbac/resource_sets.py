@@ -0,0 +1,132 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Materialized sets of resource ids for permission filters.
+
+Users can have read access to thousands of objects granted outside of
+contexts. Filtering by `id IN (<all resource ids>)` makes every search, count
+and query API statement megabytes long. Large resource lists are stored as
+rows of permission_resources table instead, identified by a hash of the list,
+and filters join against them. A set is stored once and reused by all
+requests and users that have the same list of resources.
+
+Sets that weren't used for PERMISSION_RESOURCES_TTL seconds are purged by the
+nightly cron job. Reusing a set refreshes its last use time at most once per
+quarter of the TTL, so sets used by running requests are never purged.
+"""
+
+import datetime
+import hashlib
+
+from flask import g
+from flask import has_app_context
+from sqlalchemy import and_
+from sqlalchemy import select
+
+from ggrc import db
+from ggrc import settings
+
+
+class PermissionResourceSet(db.Model):
+  """Marker of a completely stored set of resource ids."""
+  __tablename__ = 'permission_resource_sets'
+
+  token = db.Column(db.String(40), primary_key=True)
+  created_at = db.Column(db.DateTime, nullable=False)
+  last_used_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class PermissionResource(db.Model):
+  """Single resource id of a stored set."""
+  __tablename__ = 'permission_resources'
+
+  token = db.Column(db.String(40), primary_key=True)
+  resource_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+
+
+def _get_token(resources):
+  return hashlib.sha1(
+      ",".join(str(id_) for id_ in sorted(resources))
+  ).hexdigest()
+
+
+def _get_ttl():
+  return datetime.timedelta(
+      seconds=getattr(settings, "PERMISSION_RESOURCES_TTL", 24 * 60 * 60))
+
+
+def purge_resource_sets():
+  """Remove stored sets that weren't used for PERMISSION_RESOURCES_TTL."""
+  sets_table = PermissionResourceSet.__table__
+  resource_table = PermissionResource.__table__
+  cutoff = datetime.datetime.utcnow() - _get_ttl()
+  with db.engine.begin() as connection:
+    expired = [row.token for row in connection.execute(
+        select([sets_table.c.token]).where(
+            sets_table.c.last_used_at < cutoff))]
+    if not expired:
+      return
+    # sets reused since the select above are refreshed and kept
+    connection.execute(sets_table.delete().where(and_(
+        sets_table.c.token.in_(expired),
+        sets_table.c.last_used_at < cutoff,
+    )))
+    connection.execute(resource_table.delete().where(and_(
+        resource_table.c.token.in_(expired),
+        resource_table.c.token.notin_(select([sets_table.c.token])),
+    )))
+
+
+def _store(token, resources):
+  """Store the resource set or refresh its last use in a new transaction."""
+  sets_table = PermissionResourceSet.__table__
+  now = datetime.datetime.utcnow()
+  with db.engine.begin() as connection:
+    stored = connection.execute(select([sets_table.c.last_used_at]).where(
+        sets_table.c.token == token)).first()
+    if stored and stored.last_used_at >= now - _get_ttl() / 4:
+      return
+    if stored and connection.execute(sets_table.update().where(
+        sets_table.c.token == token
+    ).values(last_used_at=now)).rowcount:
+      return
+    # the set is missing or was purged after the select
+    connection.execute(
+        PermissionResource.__table__.insert().prefix_with("IGNORE"),
+        [{"token": token, "resource_id": id_} for id_ in resources],
+    )
+    connection.execute(
+        sets_table.insert().prefix_with("IGNORE"),
+        {"token": token, "created_at": now, "last_used_at": now},
+    )
+
+
+def get_resource_set_token(resources):
+  """Get token of the stored set of resources, store it if needed.
+
+  Tokens are remembered for the current request, so every set is hashed
+  and checked at most once per permissions load.
+  """
+  resources = frozenset(resources)
+  tokens = getattr(g, "_permission_resource_tokens", None)
+  if tokens is None:
+    tokens = g._permission_resource_tokens = {}
+  if resources not in tokens:
+    token = _get_token(resources)
+    _store(token, resources)
+    tokens[resources] = token
+  return tokens[resources]
+
+
+def resource_query_filter(id_column, resources):
+  """Get filter for id_column being one of the resources.
+
+  Lists larger than PERMISSION_RESOURCES_THRESHOLD setting are matched with
+  a subquery on the stored resource set instead of a literal IN list.
+  """
+  threshold = getattr(settings, "PERMISSION_RESOURCES_THRESHOLD", 1000)
+  if len(resources) < threshold or not has_app_context():
+    return id_column.in_(resources)
+  resource_table = PermissionResource.__table__
+  return id_column.in_(select([resource_table.c.resource_id]).where(
+      resource_table.c.token == get_resource_set_token(resources)))
@@ -23,6 +23,13 @@ class UserPermissions(object):
     """
     raise NotImplementedError()
 
+  def filter_allowed_read(self, triples):
+    """Get (resource_type, resource_id, context_id) triples the user can read.
+
+    Implementations can override this to check many resources at once.
+    """
+    return {triple for triple in triples if self.is_allowed_read(*triple)}
+
   def is_allowed_update(self, resource_type, resource_id, context_id):
     """Whether or not the user is allowed to update a resource of the specified
     type in the context."""
@@ -6,6 +6,7 @@
 resources.
 """
 
+import base64
 import datetime
 import hashlib
 import itertools
@@ -19,10 +20,13 @@ from urllib import urlencode
 
 from blinker import Namespace
 from flask import url_for, request, current_app, g, has_request_context
+from flask import stream_with_context
 from flask.views import View
 from flask.ext.sqlalchemy import Pagination
 import sqlalchemy.orm.exc
 from sqlalchemy import and_, or_
+from sqlalchemy import func
+from sqlalchemy import orm
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql.expression import tuple_
 from werkzeug.exceptions import BadRequest, Forbidden
@@ -32,13 +36,16 @@ import ggrc.models
 from ggrc import db, utils
 from ggrc.utils import as_json, benchmark
 from ggrc.fulltext import get_indexer
+from ggrc.fulltext.sql import SqlIndexer
 from ggrc.login import get_current_user_id, get_current_user
 from ggrc.models.cache import Cache
 from ggrc.models.event import Event
 from ggrc.models.revision import Revision
 from ggrc.models.exceptions import ValidationError, translate_message
 from ggrc.rbac import permissions, context_query_filter
+from ggrc.rbac.resource_sets import resource_query_filter
 from ggrc.services.attribute_query import AttributeQueryBuilder
+from ggrc.services.stub_cache import stub_cache
 from ggrc.models.background_task import BackgroundTask, create_task
 from ggrc import settings
 
@@ -49,6 +56,16 @@ logger = getLogger(__name__)
 
 CACHE_EXPIRY_COLLECTION = 60
 
+CURSOR_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+# Fields that filter_resource needs for permission checks, by model name
+SPARSE_PERMISSION_FIELDS = {
+    None: ('id', 'type', 'context'),
+    'Relationship': ('source', 'destination'),
+}
+# Fields published without loading columns other than id and context_id
+SPARSE_COMPUTED_FIELDS = {'type', 'selfLink', 'viewLink', 'context'}
+
 
 def get_oauth_credentials():
   from flask import session
@@ -312,22 +329,36 @@ def get_modified_objects(session):
 def update_index(session, cache):
   """Update fulltext index records for cached objects."""
   from ggrc.snapshotter.indexer import reindex_snapshots
+  from ggrc.fulltext import index_queue
   from ggrc.fulltext.mixin import Indexed
   if cache is None:
     return
+  if index_queue.is_enabled():
+    # Indexed objects are queued by before_commit listener of the indexer
+    pairs = [(obj.__class__.__name__, obj.id) for obj in cache.deleted]
+    pairs.extend((obj.__class__.__name__, obj.id)
+                 for obj in itertools.chain(cache.new, cache.dirty)
+                 if obj.type == "Snapshot" or not isinstance(obj, Indexed))
+    index_queue.enqueue(pairs)
+    session.commit()
+    return
   indexer = get_indexer()
   reindex_snapshots_list = []
+  records = []
   for obj in itertools.chain(cache.new, cache.dirty):
     if obj.type == "Snapshot":
       reindex_snapshots_list.append(obj.id)
     elif not isinstance(obj, Indexed):
-      indexer.update_record(indexer.fts_record_for(obj), commit=False)
+      records.append(indexer.fts_record_for(obj))
+  indexer.update_records(records, commit=False)
+  deleted = defaultdict(set)
   for obj in cache.deleted:
-    indexer.delete_record(obj.id, obj.__class__.__name__, commit=False)
+    deleted[obj.__class__.__name__].add(obj.id)
+  indexer.delete_records(deleted, commit=False)
   session.commit()
   if reindex_snapshots_list:
-    for snapshot_id in reindex_snapshots_list:
-      indexer.delete_record(snapshot_id, "Snapshot", commit=False)
+    indexer.delete_records({"Snapshot": reindex_snapshots_list},
+                           commit=False)
     reindex_snapshots(reindex_snapshots_list)
 
 
@@ -336,7 +367,8 @@ def _revision_generator(user_id, action, objects):
     yield Revision(obj, user_id, action, obj.log_json())
 
 
-def _get_log_revisions(current_user_id, obj=None, force_obj=False):
+def _get_log_revisions(current_user_id, obj=None, force_obj=False,
+                       forced_objects=()):
   """Generate and return revisions for all cached objects."""
   revisions = []
   cache = get_cache()
@@ -362,12 +394,18 @@ def _get_log_revisions(current_user_id, obj=None, force_obj=False):
   revisions.extend(_revision_generator(
       current_user_id, "modified", folder_modified_objects
   ))
-  if force_obj and obj is not None and obj not in cache.dirty:
+  forced_objects = list(forced_objects)
+  if force_obj and obj is not None:
+    forced_objects.append(obj)
+  for forced_obj in forced_objects:
+    if forced_obj in cache.dirty:
+      continue
     # If the ``obj`` has been updated, but only its custom attributes have
     # been changed, then this object will not be added into
     # ``cache.dirty set``. So that its revision will not be created.
     # The ``force_obj`` flag solves the issue, but in a bit dirty way.
-    revision = Revision(obj, current_user_id, 'modified', obj.log_json())
+    revision = Revision(forced_obj, current_user_id, 'modified',
+                        forced_obj.log_json())
     revisions.append(revision)
   revisions.extend(_revision_generator(
       current_user_id, "deleted", cache.deleted
@@ -376,7 +414,7 @@ def _get_log_revisions(current_user_id, obj=None, force_obj=False):
 
 
 def log_event(session, obj=None, current_user_id=None, flush=True,
-              force_obj=False):
+              force_obj=False, forced_objects=()):
   """Logs an event on object `obj`.
 
   Args:
@@ -385,6 +423,8 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
     current_user_id: ID of the user performing operation
     flush: If set to true, flush the session at the start
     force_obj: Used in case of custom attribute changes to force revision write
+    forced_objects: Objects to force revision write for, like `force_obj`
+      for bulk updates
   Returns:
     Uncommitted models.Event instance
   """
@@ -393,7 +433,8 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
     session.flush()
   if current_user_id is None:
     current_user_id = get_current_user_id()
-  revisions = _get_log_revisions(current_user_id, obj=obj, force_obj=force_obj)
+  revisions = _get_log_revisions(current_user_id, obj=obj, force_obj=force_obj,
+                                 forced_objects=forced_objects)
   if obj is None:
     resource_id = 0
     resource_type = None
@@ -419,7 +460,7 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
 def clear_permission_cache():
   if not getattr(settings, 'MEMCACHE_MECHANISM', False):
     return
-  cache = _get_cache_manager().cache_object.memcache_client
+  cache = _get_cache_manager().client
   cached_keys_set = cache.get('permissions:list') or set()
   cached_keys_set.add('permissions:list')
   # We delete all the cached user permissions as well as
@@ -433,6 +474,8 @@ class ModelView(View):
   # access to _sa_class_manager is needed for fetching the right mapper
   DEFAULT_PAGE_SIZE = 20
   MAX_PAGE_SIZE = 100
+  # Number of resources serialized at once in streamed collection responses
+  STREAM_CHUNK_SIZE = 100
   pk = 'id'
   pk_type = 'int'
 
@@ -582,7 +625,8 @@ class ModelView(View):
       resources = permissions.read_resources_for(self.model.__name__)
       filter_expr = context_query_filter(self.model.context_id, contexts)
       if resources:
-        filter_expr = or_(filter_expr, self.model.id.in_(resources))
+        filter_expr = or_(filter_expr,
+                          resource_query_filter(self.model.id, resources))
       query = query.filter(filter_expr)
       for j in joinlist:
         j_class = j.property.mapper.class_
@@ -599,16 +643,24 @@ class ModelView(View):
       terms = request.args['__search']
       types = self._get_matching_types(self.model)
       indexer = get_indexer()
-      models = indexer._get_grouped_types(types)
-      search_query = indexer.get_permissions_query(models, 'read', None)
-      search_query = and_(search_query, indexer._get_filter_query(terms))
-      search_query = db.session.query(indexer.record_type.key).filter(
-          search_query)
-      if '__mywork' in request.args:
-        search_query = indexer._add_owner_query(
-            search_query, models, get_current_user_id())
-      search_subquery = search_query.subquery()
-      query = query.filter(self.model.id.in_(search_subquery))
+      if isinstance(indexer, SqlIndexer):
+        models = indexer._get_grouped_types(types)
+        search_query = indexer.get_permissions_query(models, 'read', None)
+        search_query = and_(search_query, indexer._get_filter_query(terms))
+        search_query = db.session.query(indexer.record_type.key).filter(
+            search_query)
+        if '__mywork' in request.args:
+          search_query = indexer._add_owner_query(
+              search_query, models, get_current_user_id())
+        search_subquery = search_query.subquery()
+        query = query.filter(self.model.id.in_(search_subquery))
+      else:
+        contact_id = None
+        if '__mywork' in request.args:
+          contact_id = get_current_user_id()
+        keys = [r.key for r in indexer.search(
+            terms, types=types, contact_id=contact_id)]
+        query = query.filter(self.model.id.in_(keys or [-1]))
     order_properties = []
     if '__sort' in request.args:
       sort_attrs = request.args['__sort'].split(",")
@@ -711,13 +763,14 @@ class ModelView(View):
 
 
 # View base class for Views handling
-#   - /resources (GET, POST)
+#   - /resources (GET, POST, PUT, DELETE)
 #   - /resources/<pk:pk_type> (GET, PUT, POST, DELETE)
 class Resource(ModelView):
   """View base class for Views handling.  Will typically be registered with an
   application following a collection style for routes. Collection `GET` and
   `POST` will have a route like `/resources` while collection member
-  resource routes will have routes likej `/resources/<pk:pk_type>`.
+  resource routes will have routes likej `/resources/<pk:pk_type>`. Collection
+  `PUT` and `DELETE` change many existing resources in a single transaction.
 
   To register a Resource subclass FooCollection with a Flask application:
 
@@ -834,9 +887,15 @@ class Resource(ModelView):
             else:
               return self.collection_post()
           elif method == 'PUT':
-            return self.put(*args, **kwargs)
+            if self.pk in kwargs and kwargs[self.pk] is not None:
+              return self.put(*args, **kwargs)
+            else:
+              return self.collection_put()
           elif method == 'DELETE':
-            return self.delete(*args, **kwargs)
+            if self.pk in kwargs and kwargs[self.pk] is not None:
+              return self.delete(*args, **kwargs)
+            else:
+              return self.collection_delete()
           else:
             raise NotImplementedError()
         except (IntegrityError, ValidationError, ValueError) as err:
@@ -892,32 +951,41 @@ class Resource(ModelView):
       return self.json_success_response(
           object_for_json, self.modified_at(obj))
 
-  def validate_headers_for_put_or_delete(self, obj):
-    """rfc 6585 defines a new status code for missing required headers"""
+  def check_preconditions(self, obj, headers):
+    """Check If-Match and If-Unmodified-Since values for PUT or DELETE.
+
+    rfc 6585 defines a new status code for missing required headers.
+
+    Args:
+      obj: object that is going to be changed.
+      headers: dict-like object with the precondition values.
+
+    Returns:
+      (status, message) tuple if the preconditions fail or None.
+    """
     required_headers = set(["If-Match", "If-Unmodified-Since"])
-    missing_headers = required_headers.difference(
-        set(self.request.headers.keys()))
+    missing_headers = required_headers.difference(set(headers.keys()))
     if missing_headers:
-      return current_app.make_response((
-          json.dumps({
-              "message": "Missing headers: " + ", ".join(missing_headers),
-          }),
-          428,
-          [("Content-Type", "application/json")],
-      ))
+      return 428, "Missing headers: " + ", ".join(missing_headers)
 
     object_etag = etag(self.object_for_json(obj))
     object_timestamp = self.http_timestamp(self.modified_at(obj))
-    if (request.headers["If-Match"] != object_etag or
-            request.headers["If-Unmodified-Since"] != object_timestamp):
+    if (headers["If-Match"] != object_etag or
+            headers["If-Unmodified-Since"] != object_timestamp):
+      return 409, ("The resource could not be updated due to a conflict "
+                   "with the current state on the server. Please "
+                   "resolve the conflict by refreshing the resource.")
+    return None
+
+  def validate_headers_for_put_or_delete(self, obj):
+    """Get an error response if request preconditions fail."""
+    error = self.check_preconditions(obj, self.request.headers)
+    if error:
+      status, message = error
       return current_app.make_response((
-          json.dumps({
-              "message": "The resource could not be updated due to a conflict "
-                         "with the current state on the server. Please "
-                         "resolve the conflict by refreshing the resource.",
-          }),
-          409,
-          [("Content-Type", "application/json")]
+          json.dumps({"message": message}),
+          status,
+          [("Content-Type", "application/json")],
       ))
     return None
 
@@ -998,6 +1066,15 @@ class Resource(ModelView):
       return self.json_success_response(
           object_for_json, self.modified_at(obj))
 
+  def _check_delete_permissions(self, obj):
+    """Check context and resource permissions for DELETE."""
+    if not permissions.is_allowed_delete(
+        self.model.__name__, obj.id, obj.context_id)\
+       and not permissions.has_conditions("delete", self.model.__name__):
+      raise Forbidden()
+    if not permissions.is_allowed_delete_for(obj):
+      raise Forbidden()
+
   def delete(self, id):
     if 'X-Appengine-Taskname' not in request.headers:
       task = create_task(request.method, request.full_path)
@@ -1015,12 +1092,7 @@ class Resource(ModelView):
       if obj is None:
         return self.not_found_response()
       with benchmark("Query delete permissions"):
-        if not permissions.is_allowed_delete(
-            self.model.__name__, obj.id, obj.context_id)\
-           and not permissions.has_conditions("delete", self.model.__name__):
-          raise Forbidden()
-        if not permissions.is_allowed_delete_for(obj):
-          raise Forbidden()
+        self._check_delete_permissions(obj)
       header_error = self.validate_headers_for_put_or_delete(obj)
       if header_error:
         return header_error
@@ -1058,10 +1130,87 @@ class Resource(ModelView):
   def has_cache(self):
     return getattr(settings, 'MEMCACHE_MECHANISM', False)
 
-  def apply_paging(self, matches_query):
-    page_size = min(
+  def _get_page_size(self):
+    return min(
         int(request.args.get('__page_size', self.DEFAULT_PAGE_SIZE)),
         self.MAX_PAGE_SIZE)
+
+  @staticmethod
+  def encode_cursor(match):
+    """Get opaque cursor pointing after the given match."""
+    updated_at = getattr(match, 'updated_at', None)
+    if updated_at is not None:
+      updated_at = updated_at.strftime(CURSOR_DATETIME_FORMAT)
+    return base64.urlsafe_b64encode(json.dumps([updated_at, match.id]))
+
+  @staticmethod
+  def decode_cursor(cursor):
+    """Get (updated_at, id) from a cursor or raise BadRequest."""
+    try:
+      updated_at, id_ = json.loads(base64.urlsafe_b64decode(str(cursor)))
+      if updated_at is not None:
+        updated_at = datetime.datetime.strptime(updated_at,
+                                                CURSOR_DATETIME_FORMAT)
+      return updated_at, int(id_)
+    except (TypeError, ValueError):
+      raise BadRequest('Invalid __cursor value.')
+
+  def _get_cursor_filter(self, matches_query, cursor):
+    """Get filter for matches after cursor in (updated_at desc, id desc)."""
+    updated_at, id_ = self.decode_cursor(cursor)
+    id_column = self.model.id
+    column_names = [column['name'] for column in
+                    matches_query.column_descriptions]
+    if 'updated_at' not in column_names:
+      return id_column < id_
+    updated_at_column = self.modified_attr
+    if updated_at is None:
+      # NULL values are sorted last in descending order
+      return and_(updated_at_column.is_(None), id_column < id_)
+    return or_(
+        updated_at_column < updated_at,
+        and_(updated_at_column == updated_at, id_column < id_),
+        updated_at_column.is_(None),
+    )
+
+  def apply_cursor_paging(self, matches_query):
+    """Get a page of matches after `__cursor` without using OFFSET.
+
+    Matches are ordered by (updated_at, id), so the next page starts right
+    after the last match of the previous page. An empty `__cursor` gets the
+    first page. Total count costs an extra query and is only computed if
+    `__total` argument is present.
+    """
+    if '__sort' in request.args or '__limit' in request.args:
+      raise BadRequest('__cursor can not be used with __sort or __limit.')
+    page_size = self._get_page_size()
+    cursor = request.args.get('__cursor')
+    query = matches_query
+    if cursor:
+      query = query.filter(self._get_cursor_filter(matches_query, cursor))
+    matches = query.limit(page_size + 1).all()
+    has_next = len(matches) > page_size
+    matches = matches[:page_size]
+
+    def page_url(page_cursor):
+      args = dict([(k, unicode(v)) for k, v in request.args.items()])
+      args['__cursor'] = page_cursor
+      return self.url_for() + '?' + urlencode(utils.encoded_dict(args))
+    paging = {
+        'cursor': cursor,
+        'first': page_url(''),
+    }
+    if has_next:
+      paging['next_cursor'] = self.encode_cursor(matches[-1])
+      paging['next'] = page_url(paging['next_cursor'])
+    if '__total' in request.args:
+      paging['total'] = matches_query.count()
+    return matches, {'paging': paging}
+
+  def apply_paging(self, matches_query):
+    if '__cursor' in request.args:
+      return self.apply_cursor_paging(matches_query)
+    page_size = self._get_page_size()
     if '__page_only' in request.args:
       page_number = int(request.args.get('__page', 0))
       matches = []
@@ -1084,8 +1233,16 @@ class Resource(ModelView):
     return matches, collection_extras
 
   def get_matched_resources(self, matches):
+    """Get published resources for matches, keyed by match.
+
+    Only matches that are missing in the cache are loaded from the database,
+    published and added to the cache. Resources with related objects
+    requested by `__include` are not cached, as the cached representations
+    don't have them.
+    """
     cache_objs = {}
-    if self.has_cache():
+    use_cache = self.has_cache() and '__include' not in request.args
+    if use_cache:
       self.request.cache_manager = _get_cache_manager()
       with benchmark("Query cache for resources"):
         cache_objs = self.get_resources_from_cache(matches)
@@ -1095,8 +1252,9 @@ class Resource(ModelView):
 
     database_objs = {}
     if len(database_matches) > 0:
-      database_objs = self.get_resources_from_database(matches)
-      if self.has_cache():
+      database_objs = self.get_resources_from_database(database_matches)
+      # Resources with sparse fields are incomplete and can't be cached
+      if use_cache and self.get_sparse_fields() is None:
         with benchmark("Add resources to cache"):
           self.add_resources_to_cache(database_objs)
     return cache_objs, database_objs
@@ -1123,53 +1281,124 @@ class Resource(ModelView):
       matches_query = self.get_collection_matches(
           self.model, filter_by_contexts)
     with benchmark("dispatch_request > collection_get > Query Data"):
-      if '__page' in request.args or '__page_only' in request.args:
+      paging_args = ('__page', '__page_only', '__cursor')
+      if any(arg in request.args for arg in paging_args):
         with benchmark("Query matches with paging"):
           matches, extras = self.apply_paging(matches_query)
       else:
         with benchmark("Query matches"):
           matches = matches_query.all()
           extras = {}
+    with benchmark("dispatch_request > collection_get > Collection etag"):
+      collection_etag = self.collection_etag(matches, extras)
+      if self.request.headers.get('If-None-Match') == collection_etag:
+        return current_app.make_response(
+            ('', 304, [('Etag', collection_etag)]))
+    if '__stream' in request.args:
+      return self.collection_stream_response(matches, extras, collection_etag)
     with benchmark("dispatch_request > collection_get > Matched resources"):
-      cache_op = None
-      if '__stubs_only' in request.args:
-        objs = [{
-            'id': m[0],
-            'type': m[1],
-            'href': utils.url_for(m[1], id=m[0]),
-            'context_id': m[2]
-        } for m in matches]
-
-      else:
-        cache_objs, database_objs = self.get_matched_resources(matches)
-        objs = {}
-        objs.update(cache_objs)
-        objs.update(database_objs)
-
-        objs = [objs[m] for m in matches if m in objs]
-        with benchmark("Filter resources based on permissions"):
-          objs = filter_resource(objs)
-
-        cache_op = 'Hit' if len(cache_objs) > 0 else 'Miss'
+      objs, cache_op = self.get_collection_objs(matches)
     with benchmark("dispatch_request > collection_get > Create Response"):
-      # Return custom fields specified via `__fields=id,title,description` etc.
-      # TODO this can be optimized by filter_resource() not retrieving
-      # the other fields to being with
-      if '__fields' in request.args:
-        custom_fields = request.args['__fields'].split(',')
-        objs = [{f: o[f] for f in custom_fields if f in o} for o in objs]
       with benchmark("Serialize collection"):
         collection = self.build_collection_representation(
             objs, extras=extras)
 
-      if 'If-None-Match' in self.request.headers and \
-         self.request.headers['If-None-Match'] == etag(collection):
-        return current_app.make_response((
-            '', 304, [('Etag', etag(collection))]))
-
       with benchmark("Make response"):
         return self.json_success_response(
-            collection, self.collection_last_modified(), cache_op=cache_op)
+            collection, self.collection_last_modified(), cache_op=cache_op,
+            etag_value=collection_etag)
+
+  def get_collection_objs(self, matches):
+    """Get readable JSON representations of matches and the cache status.
+
+    Returns:
+      (list of dicts in match order, 'Hit', 'Partial', 'Miss' or None)
+    """
+    cache_op = None
+    if '__stubs_only' in request.args:
+      objs = [{
+          'id': m[0],
+          'type': m[1],
+          'href': utils.url_for(m[1], id=m[0]),
+          'context_id': m[2]
+      } for m in matches]
+
+    else:
+      cache_objs, database_objs = self.get_matched_resources(matches)
+      objs = {}
+      objs.update(cache_objs)
+      objs.update(database_objs)
+
+      objs = [objs[m] for m in matches if m in objs]
+      with benchmark("Filter resources based on permissions"):
+        objs = filter_resource(objs)
+
+      if not cache_objs:
+        cache_op = 'Miss'
+      elif database_objs:
+        cache_op = 'Partial'
+      else:
+        cache_op = 'Hit'
+    # Return custom fields specified via `__fields=id,title,description` etc.
+    if '__fields' in request.args:
+      custom_fields = request.args['__fields'].split(',')
+      objs = [{f: o[f] for f in custom_fields if f in o} for o in objs]
+    return objs, cache_op
+
+  def collection_etag(self, matches, extras):
+    """Get ETag of a collection from its matches instead of the body.
+
+    The ETag depends on the most recent updated_at, the ids of the matches of
+    the requested page and the paging information, so objects are only
+    loaded and serialized if the page has changed. The latest revision id
+    changes with every change of any object, including related objects that
+    are published in the collection. The permissions fingerprint and the
+    query string are added, as both change the representation of the same
+    matches.
+    """
+    ids_hash = hashlib.sha1(",".join(
+        "{}:{}".format(match[1], match[0]) for match in matches
+    )).hexdigest()
+    updated_at = [match.updated_at for match in matches
+                  if getattr(match, 'updated_at', None) is not None]
+    revision_id = db.session.query(func.max(Revision.id)).scalar()
+    return etag((max(updated_at) if updated_at else None, len(matches),
+                 ids_hash, revision_id, extras.get('paging', {}).get('total'),
+                 permissions.permissions_fingerprint(), request.query_string))
+
+  def collection_stream_response(self, matches, extras, collection_etag):
+    """Stream collection JSON, serializing matches chunk by chunk.
+
+    The response has no Content-Length, so it is sent with chunked transfer
+    encoding, and only one chunk of resources is kept in memory at a time.
+    """
+    table_plural = self.model._inflector.table_plural
+    header = dict(extras or {})
+    header['selfLink'] = self.url_for_preserving_querystring()
+
+    def generate():
+      yield '{{{0}: {1}, {2}: ['.format(
+          json.dumps('{0}_collection'.format(table_plural)),
+          self.as_json(header)[:-1],
+          json.dumps(table_plural))
+      separator = ''
+      for start in range(0, len(matches), self.STREAM_CHUNK_SIZE):
+        with benchmark("Serialize collection chunk"):
+          objs, _ = self.get_collection_objs(
+              matches[start:start + self.STREAM_CHUNK_SIZE])
+          for obj in objs:
+            yield separator + self.as_json(obj)
+            separator = ','
+      yield ']}}'
+
+    headers = [
+        ('Last-Modified',
+         self.http_timestamp(self.collection_last_modified())),
+        ('Etag', collection_etag),
+        ('Content-Type', 'application/json'),
+    ]
+    return current_app.response_class(
+        stream_with_context(generate()), headers=headers)
 
   def get_resources_from_cache(self, matches):
     """Get resources from cache for specified matches"""
@@ -1179,8 +1408,8 @@ class Resource(ModelView):
     # invalidation logic so we have to disabling memcache.
     if self.model.__name__ == 'BackgroundTask':
       return resources
-    # Skip right to memcache
-    memcache_client = self.request.cache_manager.cache_object.memcache_client
+    # Skip right to the cache client
+    cache_client = self.request.cache_manager.client
     key_matches = {}
     keys = []
     for match in matches:
@@ -1190,7 +1419,7 @@ class Resource(ModelView):
     while len(keys) > 0:
       slice_keys = keys[:32]
       keys = keys[32:]
-      result = memcache_client.get_multi(slice_keys)
+      result = cache_client.get_multi(slice_keys)
       for key in result:
         if 'selfLink' in result[key]:
           resources[key_matches[key]] = result[key]
@@ -1198,8 +1427,8 @@ class Resource(ModelView):
 
   def add_resources_to_cache(self, match_obj_pairs):
     """Add resources to cache if they are not blocked by DeleteOp entries"""
-    # Skip right to memcache
-    memcache_client = self.request.cache_manager.cache_object.memcache_client
+    # Skip right to the cache client
+    cache_client = self.request.cache_manager.client
     key_objs = {}
     key_blockers = {}
     keys = []
@@ -1213,12 +1442,12 @@ class Resource(ModelView):
       slice_keys = keys[:32]
       keys = keys[32:]
       blocker_keys = [key_blockers[slice_key] for slice_key in slice_keys]
-      result = memcache_client.get_multi(blocker_keys)
+      result = cache_client.get_multi(blocker_keys)
       # Reduce `slice_keys` to only unblocked keys
       slice_keys = [
           slice_key for slice_key in slice_keys
           if key_blockers[slice_key] not in result]
-      memcache_client.add_multi(
+      cache_client.add_multi(
           {key: key_objs[key] for key in slice_keys})
 
   def json_create(self, obj, src):
@@ -1359,9 +1588,7 @@ class Resource(ModelView):
     for class_name, ids in objects.items():
       class_ = getattr(ggrc.models, class_name, None)
       if hasattr(class_, "query"):
-        g.referenced_objects[class_] = {
-            obj.id: obj for obj in class_.query.filter(class_.id.in_(ids))
-        }
+        g.referenced_objects[class_] = stub_cache.get_objects(class_, ids)
 
   def collection_post_loop(self, body, res, no_result, running_async):
     """Handle all posted objects.
@@ -1509,6 +1736,231 @@ class Resource(ModelView):
             task.finish("Failure", result)
         return result
 
+  def _unwrap_bulk_src(self, wrapped_src):
+    """Get model attributes and preconditions of a collection PUT/DELETE item.
+
+    Wrapped source example:
+      {
+          "control": {"id": 1, "title": "A"},
+          "If-Match": "<etag of the control>",
+          "If-Unmodified-Since": "<last modified time of the control>",
+      }
+
+    Args:
+      wrapped_src: dict containing a dict with model attributes and the
+        precondition values that would be sent as headers for a single
+        object PUT or DELETE.
+
+    Returns:
+      (src, wrapped_src) tuple where src is the inner dict with model
+      attributes with an integer id.
+
+    Raises:
+      BadRequest if the object or its id are missing.
+    """
+    root_attribute = self.model._inflector.table_singular
+    src = None
+    if isinstance(wrapped_src, dict):
+      src = wrapped_src.get(root_attribute)
+    if not isinstance(src, dict) or "id" not in src:
+      raise BadRequest('Required attribute "{0}" with an id not found'.format(
+          root_attribute))
+    try:
+      src["id"] = int(src["id"])
+    except (ValueError, TypeError):
+      raise BadRequest("Invalid id: {0}".format(src["id"]))
+    return src, wrapped_src
+
+  def _get_bulk_objects(self, body, check_permissions):
+    """Get objects for collection PUT or DELETE and check them.
+
+    Args:
+      body: list of wrapped sources, see _unwrap_bulk_src.
+      check_permissions: function of an object and its source that raises
+        Forbidden if the object can not be changed.
+
+    Returns:
+      (pairs, errors) tuple where pairs is a list of (obj, src) tuples. If
+      any object can not be changed, errors contains a (status, message)
+      tuple for every item of the body and nothing must be changed.
+    """
+    if not isinstance(body, list) or not body:
+      raise BadRequest("Request body must be a non-empty list.")
+    items = [self._unwrap_bulk_src(wrapped_src) for wrapped_src in body]
+    ids = [src["id"] for src, _ in items]
+    if len(set(ids)) != len(ids):
+      raise BadRequest("Request body contains duplicate ids.")
+    with benchmark("Query for objects"):
+      objects = {
+          obj.id: obj for obj in self.get_collection(filter_by_contexts=False)
+          .filter(self.model.id.in_(ids))
+      }
+    pairs = []
+    errors = []
+    for src, preconditions in items:
+      obj = objects.get(src["id"])
+      error = None
+      if obj is None:
+        error = (404, self.not_found_message())
+      else:
+        try:
+          check_permissions(obj, src)
+          error = self.check_preconditions(obj, preconditions)
+        except Forbidden as exc:
+          error = (403, exc.description)
+      pairs.append((obj, src))
+      errors.append(error)
+    if not any(errors):
+      return pairs, []
+    return pairs, [
+        item_error or (424, "Not changed because of errors in other items.")
+        for item_error in errors
+    ]
+
+  def _make_bulk_response(self, res):
+    """Make a response for a list of (status, body) tuples."""
+    headers = {"Content-Type": "application/json"}
+    errors = [(res_status, body) for res_status, body in res
+              if not 200 <= res_status < 300 and res_status != 424]
+    status = 200
+    if errors:
+      status = errors[0][0]
+      headers["X-Flash-Error"] = " || ".join(body for _, body in errors)
+    return current_app.make_response((self.as_json(res), status, headers))
+
+  def collection_put_loop(self, pairs, res):
+    """Update all objects from the collection PUT body.
+
+    Args:
+      pairs: list of (obj, src) tuples of objects and their new attributes.
+      res: List that will get responses appended to it.
+    """
+    with benchmark("Update objects"):
+      for obj, src in pairs:
+        with benchmark("Deserialize object"):
+          self.json_update(obj, src)
+        obj.modified_by_id = get_current_user_id()
+        db.session.add(obj)
+        with benchmark("Validate custom attributes"):
+          if hasattr(obj, "validate_custom_attributes"):
+            obj.validate_custom_attributes()
+        with benchmark("Send PUT event"):
+          self.model_put.send(obj.__class__, obj=obj, src=src, service=self)
+    objects = [obj for obj, _ in pairs]
+    with benchmark("Get modified objects"):
+      modified_objects = get_modified_objects(db.session)
+    with benchmark("Log event for all objects"):
+      event = log_event(db.session, flush=False, forced_objects=objects)
+    with benchmark("Update memcache before commit for collection PUT"):
+      update_memcache_before_commit(
+          self.request, modified_objects, CACHE_EXPIRY_COLLECTION)
+    with benchmark("Commit collection"):
+      db.session.commit()
+    with benchmark("Update index"):
+      update_index(db.session, modified_objects)
+    with benchmark("Update memcache after commit for collection PUT"):
+      update_memcache_after_commit(self.request)
+    with benchmark("Send PUT - after commit events"):
+      for obj, src in pairs:
+        self.model_put_after_commit.send(obj.__class__, obj=obj,
+                                         src=src, service=self, event=event)
+      # Note: Some data is created in listeners for model_put_after_commit
+      # (like updates to snapshots), so we need to commit the changes
+      db.session.commit()
+    with benchmark("Serialize objects"):
+      for obj in objects:
+        res.append((200, self.object_for_json(obj)))
+
+  def collection_put(self):
+    """Update many objects in a single transaction.
+
+    The body is a list of wrapped sources described in _unwrap_bulk_src.
+    Nothing is changed unless every object exists, is allowed to be updated
+    and matches its preconditions.
+    """
+    if self.request.mimetype != 'application/json':
+      return current_app.make_response((
+          'Content-Type must be application/json', 415, []))
+    if hasattr(self.model, "PER_OBJECT_CUSTOM_ATTRIBUTABLE"):
+      # set_ids_for_new_custom_attributes can handle only one object at once
+      raise BadRequest("{0} can not be updated in bulk.".format(
+          self.model._inflector.title_plural))
+    with benchmark("collection put > check objects"):
+      pairs, errors = self._get_bulk_objects(
+          self.request.json,
+          lambda obj, src: self._check_put_permissions(
+              obj, self.get_context_id_from_json(src)))
+    if errors:
+      return self._make_bulk_response(errors)
+    res = []
+    with benchmark("collection put > body loop: {}".format(len(pairs))):
+      try:
+        self.collection_put_loop(pairs, res)
+      except (IntegrityError, ValidationError, ValueError) as error:
+        res.append(self._make_error_from_exception(error))
+        db.session.rollback()
+    return self._make_bulk_response(res)
+
+  def collection_delete_loop(self, pairs, res):
+    """Delete all objects from the collection DELETE body.
+
+    Args:
+      pairs: list of (obj, src) tuples of objects to delete.
+      res: List that will get responses appended to it.
+    """
+    objects = [obj for obj, _ in pairs]
+    with benchmark("Delete objects"):
+      for obj in objects:
+        db.session.delete(obj)
+        with benchmark("Send DELETEd event"):
+          self.model_deleted.send(obj.__class__, obj=obj, service=self)
+    with benchmark("Get modified objects"):
+      modified_objects = get_modified_objects(db.session)
+    with benchmark("Log event for all objects"):
+      event = log_event(db.session, flush=False)
+    with benchmark("Update memcache before commit for collection DELETE"):
+      update_memcache_before_commit(
+          self.request, modified_objects, CACHE_EXPIRY_COLLECTION)
+    with benchmark("Commit collection"):
+      db.session.commit()
+    with benchmark("Update index"):
+      update_index(db.session, modified_objects)
+    with benchmark("Update memcache after commit for collection DELETE"):
+      update_memcache_after_commit(self.request)
+    with benchmark("Send DELETEd - after commit events"):
+      for obj in objects:
+        self.model_deleted_after_commit.send(obj.__class__, obj=obj,
+                                             service=self, event=event)
+    with benchmark("Serialize objects"):
+      for obj in objects:
+        res.append((200, self.object_for_json(obj)))
+
+  def collection_delete(self):
+    """Delete many objects in a single transaction.
+
+    The body is a list of wrapped sources described in _unwrap_bulk_src,
+    only ids are used from the object attributes. Nothing is deleted unless
+    every object exists, is allowed to be deleted and matches its
+    preconditions.
+    """
+    if self.request.mimetype != 'application/json':
+      return current_app.make_response((
+          'Content-Type must be application/json', 415, []))
+    with benchmark("collection delete > check objects"):
+      pairs, errors = self._get_bulk_objects(
+          self.request.json,
+          lambda obj, _: self._check_delete_permissions(obj))
+    if errors:
+      return self._make_bulk_response(errors)
+    res = []
+    with benchmark("collection delete > body loop: {}".format(len(pairs))):
+      try:
+        self.collection_delete_loop(pairs, res)
+      except (IntegrityError, ValidationError, ValueError) as error:
+        res.append(self._make_error_from_exception(error))
+        db.session.rollback()
+    return self._make_bulk_response(res)
+
   @classmethod
   def add_to(cls, app, url, model_class=None, decorators=()):
     if model_class:
@@ -1525,7 +1977,7 @@ class Resource(ModelView):
         url,
         defaults={cls.pk: None},
         view_func=view_func,
-        methods=['GET', 'POST'])
+        methods=['GET', 'POST', 'PUT', 'DELETE'])
     app.add_url_rule(
         '{url}/<{type}:{pk}>'.format(url=url, type=cls.pk_type, pk=cls.pk),
         view_func=view_func,
@@ -1581,19 +2033,61 @@ class Resource(ModelView):
     paging_obj['total'] = paging.total
     return paging_obj
 
+  def get_sparse_fields(self):
+    """Get attributes that have to be published for `__fields` request.
+
+    Besides the requested fields, this contains the fields that
+    filter_resource needs for permission checks. Returns None if full
+    resources have to be published.
+    """
+    if '__fields' not in request.args or '__include' in request.args:
+      return None
+    fields = set(request.args['__fields'].split(','))
+    fields.update(SPARSE_PERMISSION_FIELDS.get(self.model.__name__, ()))
+    fields.update(SPARSE_PERMISSION_FIELDS[None])
+    return fields
+
+  def get_sparse_query(self, fields):
+    """Get query that loads only the columns needed to publish fields.
+
+    Returns:
+      Query, or None if some of the fields are not plain columns, and
+      loading them column by column would be slower than eager loading.
+    """
+    model = self.model
+    mapper = model._sa_class_manager.mapper
+    column_names = {attr.key for attr in mapper.column_attrs}
+    custom_publish = getattr(model, '_custom_publish', {})
+    columns = {'context_id', 'updated_at'} & column_names
+    for field in fields - SPARSE_COMPUTED_FIELDS:
+      if field not in column_names or field in custom_publish:
+        return None
+      columns.add(field)
+    return db.session.query(model).options(
+        orm.Load(model).load_only(*columns))
+
   def get_resources_from_database(self, matches):
     # FIXME: This is cheating -- `matches` should be allowed to be any model
     model = self.model
     ids = {m[0]: m for m in matches}
+    fields = self.get_sparse_fields()
     with benchmark("Query database for matches"):
-      query = model.eager_query()
+      query = None
+      if fields is not None:
+        query = self.get_sparse_query(fields)
+      if query is None:
+        query = model.eager_query()
       # We force the query here so that we can benchmark it
       objs = query.filter(model.id.in_(ids.keys())).all()
     with benchmark("Publish objects"):
       resources = {}
       includes = self.get_properties_to_include(request.args.get('__include'))
       for obj in objs:
-        resources[ids[obj.id]] = ggrc.builder.json.publish(obj, includes)
+        if fields is None:
+          resources[ids[obj.id]] = ggrc.builder.json.publish(obj, includes)
+        else:
+          resources[ids[obj.id]] = ggrc.builder.json.publish_fields(
+              obj, fields)
     with benchmark("Publish representation"):
       ggrc.builder.json.publish_representation(resources)
     return resources
@@ -1633,10 +2127,11 @@ class Resource(ModelView):
     return format_date_time(time.mktime(timestamp.utctimetuple()))
 
   def json_success_response(self, response_object, last_modified,
-                            status=200, id=None, cache_op=None):
+                            status=200, id=None, cache_op=None,
+                            etag_value=None):
     headers = [
         ('Last-Modified', self.http_timestamp(last_modified)),
-        ('Etag', etag(response_object)),
+        ('Etag', etag_value or etag(response_object)),
         ('Content-Type', 'application/json'),
     ]
     if id is not None:
@@ -1663,8 +2158,128 @@ class ReadOnlyResource(Resource):
       raise NotImplementedError()
 
 
-def filter_resource(resource, depth=0, user_permissions=None):  # noqa
+def _get_resource_context_id(resource):
+  """Get context id of a JSON resource."""
+  if 'context' in resource:
+    if resource['context'] is None:
+      return None
+    return resource['context']['id']
+  assert 'context_id' in resource, "No context found for object"
+  return resource['context_id']
+
+
+def _iter_typed_resources(resource):
+  """Iterate over all JSON objects that filter_resource checks."""
+  if isinstance(resource, (list, tuple)):
+    for sub_resource in resource:
+      for typed in _iter_typed_resources(sub_resource):
+        yield typed
+  elif isinstance(resource, dict) and 'type' in resource:
+    yield resource
+    for key, value in resource.items():
+      if key != 'context' and isinstance(value, dict) and 'type' in value:
+        for typed in _iter_typed_resources(value):
+          yield typed
+  else:
+    assert False, "Non-object passed to filter_resource"
+
+
+def _is_readable_relationship(resource):
+  """Check if Creator can read both ends of a relationship.
+
+  In order to avoid loading full instances and using is_allowed_read_for,
+  we are making a special test for the Creator here. Creator can only
+  see relationship objects where they have read access on both source and
+  destination. This is defined in Creator.py:220 file, but is_allowed_read
+  can not check conditions without the full instance.
   """
+  for name in ('source', 'destination'):
+    inst = resource[name]
+    if not inst:
+      # If object was deleted but relationship still exists
+      continue
+    contexts = permissions.read_contexts_for(inst['type'])
+    if contexts is None:
+      # read_contexts_for returns None if the user has access to all the
+      # objects of this type. If the user doesn't have access to any object
+      # an empty list ([]) will be returned
+      continue
+    resources = permissions.read_resources_for(inst['type']) or []
+    if inst['context_id'] in contexts or inst['id'] in resources:
+      continue
+    return False
+  return True
+
+
+def _is_readable_revision(resource, user_permissions):
+  """Check if Creator can read the object of a revision."""
+  res_model = getattr(ggrc.models.all_models, resource['resource_type'])
+  instance = res_model.query.get(resource['resource_id'])
+  return (instance is not None and
+          user_permissions.is_allowed_read_for(instance))
+
+
+def _is_readable(resource, readable, user_permissions, is_creator):
+  """Check if a single JSON object is readable, ignoring its links."""
+  if resource['type'] == "Relationship" and is_creator:
+    return _is_readable_relationship(resource)
+  if resource['type'] == "Revision" and is_creator:
+    return _is_readable_revision(resource, user_permissions)
+  return (resource['type'], resource['id'],
+          _get_resource_context_id(resource)) in readable
+
+
+def _prune_resource(resource, readable, user_permissions, is_creator):
+  """Remove resources that are not readable, see filter_resource."""
+  if isinstance(resource, (list, tuple)):
+    filtered = []
+    for sub_resource in resource:
+      filtered_sub_resource = _prune_resource(
+          sub_resource, readable, user_permissions, is_creator)
+      if filtered_sub_resource is not None:
+        filtered.append(filtered_sub_resource)
+    return filtered
+
+  if not _is_readable(resource, readable, user_permissions, is_creator):
+    return None
+  # Then, filter any typed keys
+  for key, value in resource.items():
+    if key != 'context' and isinstance(value, dict) and 'type' in value:
+      # Apply filtering to sub-resources
+      resource[key] = _prune_resource(
+          value, readable, user_permissions, is_creator)
+  return resource
+
+
+def filter_resource(resource, depth=0, user_permissions=None):
+  """Filter out JSON objects the user can't read.
+
+  Read permissions of all objects in the resource are resolved at once with
+  user_permissions.filter_allowed_read, then unreadable objects are pruned
+  from lists, and unreadable linked objects are replaced with None. The
+  `context` links are not filtered.
+
+  Returns:
+     The subset of resources which are readable based on user_permissions
+  """
+  # pylint: disable=unused-argument
+  if user_permissions is None:
+    user_permissions = permissions.permissions_for(get_current_user())
+  triples = {
+      (typed['type'], typed['id'], _get_resource_context_id(typed))
+      for typed in _iter_typed_resources(resource)
+  }
+  readable = user_permissions.filter_allowed_read(triples)
+  return _prune_resource(resource, readable, user_permissions, _is_creator())
+
+
+def filter_resource_by_object(resource, depth=0,  # noqa
+                              user_permissions=None):
+  """Filter resources checking read permissions object by object.
+
+  This is the reference implementation of filter_resource, kept to compare
+  results and performance with it.
+
   Returns:
      The subset of resources which are readable based on user_permissions
   """
@@ -1675,7 +2290,7 @@ def filter_resource(resource, depth=0, user_permissions=None):  # noqa
   if isinstance(resource, (list, tuple)):
     filtered = []
     for sub_resource in resource:
-      filtered_sub_resource = filter_resource(
+      filtered_sub_resource = filter_resource_by_object(
           sub_resource, depth=depth + 1, user_permissions=user_permissions)
       if filtered_sub_resource is not None:
         filtered.append(filtered_sub_resource)
@@ -1736,7 +2351,7 @@ def filter_resource(resource, depth=0, user_permissions=None):  # noqa
       else:
         # Apply filtering to sub-resources
         if isinstance(value, dict) and 'type' in value:
-          resource[key] = filter_resource(
+          resource[key] = filter_resource_by_object(
               value, depth=depth + 1, user_permissions=user_permissions)
 
     return resource
@@ -0,0 +1,150 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Per worker cache of /query "ids" and "count" results.
+
+Widget tab counts and tree view ids are requested on every page navigation,
+while the underlying tables rarely change between clicks. Results are cached
+by the object query and the permissions fingerprint of the user, together
+with the version tokens of all tables read while computing them (see
+ggrc.cache.table_versions). A cached result is used only while none of these
+tables has been changed.
+
+Table versions are read before the computing transaction starts, so changes
+committed while a result is computed make that result invalid. Changes made
+with textual SQL statements don't bump table versions unless their tables
+are added with table_versions.add_changed_tables, otherwise they are seen
+once the entry expires. Results read with textual SQL or from outside of the
+DB are not cached. Versions bumped by other workers are seen only with
+a shared CACHE_BACKEND, so the cache is disabled with the local backend.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.util import find_tables
+
+from ggrc import db
+from ggrc import settings
+from ggrc.cache import backends
+from ggrc.cache import table_versions
+from ggrc.rbac import permissions
+from ggrc.utils.structures import LRUCache
+
+
+# Object query parameters that affect the filtered ids
+KEY_PARAMETERS = ("object_name", "filters", "order_by", "limit", "permissions")
+
+_cache = LRUCache(  # pylint: disable=invalid-name
+    getattr(settings, "QUERY_CACHE_SIZE", 1000),
+    getattr(settings, "QUERY_CACHE_TTL", 300),
+)
+_recording = threading.local()  # pylint: disable=invalid-name
+
+
+def is_enabled():
+  return (getattr(settings, "QUERY_CACHE_SIZE", 1000) > 0 and
+          backends.is_shared())
+
+
+def get_key(object_query):
+  """Get cache key of an object query for the current user."""
+  return (permissions.permissions_fingerprint(), json.dumps(
+      {name: object_query.get(name) for name in KEY_PARAMETERS},
+      sort_keys=True,
+      default=unicode,
+  ))
+
+
+def get_versions():
+  """Get version tokens of all tables."""
+  return table_versions.get_versions(db.metadata.tables)
+
+
+def get(key, versions):
+  """Get cached (ids, total) if the tables read for it are unchanged.
+
+  Args:
+    key: cache key of the object query.
+    versions: current version tokens of tables.
+
+  Returns:
+    (ids, total) tuple or None.
+  """
+  entry = _cache.get(key)
+  if entry is None:
+    return None
+  entry_versions, result = entry
+  for table, version in entry_versions.iteritems():
+    if versions.get(table) != version:
+      return None
+  return result
+
+
+def store(key, versions, tables, result):
+  """Cache (ids, total) computed from tables of the given versions.
+
+  Results computed from tables without known versions are not cached.
+  """
+  entry_versions = {}
+  for table in tables:
+    if table not in versions:
+      return
+    entry_versions[table] = versions[table]
+  _cache[key] = (entry_versions, result)
+
+
+def clear():
+  _cache.clear()
+
+
+@contextmanager
+def record_tables():
+  """Collect names of tables read by the current thread in the block.
+
+  Yields:
+    set of table names, with None added if a textual statement with unknown
+    tables was executed.
+  """
+  previous = getattr(_recording, "tables", None)
+  _recording.tables = set()
+  try:
+    yield _recording.tables
+  finally:
+    _recording.tables = previous
+
+
+def add_recorded_tables(tables):
+  """Add tables read earlier to the tables recorded by the current thread."""
+  recorded = getattr(_recording, "tables", None)
+  if recorded is not None:
+    recorded.update(tables)
+
+
+def add_unknown_tables():
+  """Make results computed by the current thread uncacheable.
+
+  Used for data read from outside of the DB, like a non-SQL indexer, which
+  has no table versions.
+  """
+  add_recorded_tables([None])
+
+
+@event.listens_for(Engine, "before_execute")
+def _record_statement_tables(conn, clauseelement, multiparams, params):
+  # pylint: disable=unused-argument
+  tables = getattr(_recording, "tables", None)
+  if tables is None:
+    return
+  if (not isinstance(clauseelement, sa.sql.ClauseElement) or
+          isinstance(clauseelement, TextClause)):
+    tables.add(None)
+    return
+  tables.update(table.name for table in find_tables(
+      clauseelement, check_columns=True, include_aliases=True
+  ) if isinstance(table, sa.Table))
@@ -3,14 +3,74 @@
 
 """This module contains special query helper class for query API."""
 
+import collections
+import functools
+import itertools
+import json as json_lib
+import Queue
+import sys
+import threading
+
+import flask
+import sqlalchemy as sa
+
+from ggrc import db
+from ggrc import settings
 from ggrc.builder import json
 from ggrc.converters.query_helper import QueryHelper
 from ggrc.models import inflector
+from ggrc.services import query_cache
 from ggrc.utils import benchmark
 
 
 # pylint: disable=too-few-public-methods
 
+def _work(func, items, pending, results, errors):
+  """Compute results of pending items until there are none left.
+
+  Stops early once any worker has failed.
+  """
+  while not errors:
+    try:
+      index = pending.get_nowait()
+    except Queue.Empty:
+      return
+    try:
+      results[index] = func(items[index])
+    except Exception:  # pylint: disable=broad-except
+      errors.append(sys.exc_info())
+
+
+def _run_threads(target, args, threads):
+  """Start threads running target(*args) and wait for all of them."""
+  workers = [threading.Thread(target=target, args=args)
+             for _ in range(threads)]
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+
+
+def _map_in_threads(func, items, threads):
+  """Get results of func for items, computed in new threads.
+
+  The threads are started for the current request and joined before
+  returning, as App Engine doesn't allow threads to outlive requests.
+  Exceptions raised by func are re-raised in the calling thread.
+  """
+  items = list(items)
+  results = [None] * len(items)
+  errors = []
+  pending = Queue.Queue()
+  for index in range(len(items)):
+    pending.put(index)
+  _run_threads(_work, (func, items, pending, results, errors),
+               min(threads, len(items)))
+  if errors:
+    raise errors[0][0], errors[0][1], errors[0][2]
+  return results
+
+
 class QueryAPIQueryHelper(QueryHelper):
   """Helper class for handling request queries for query API.
 
@@ -32,7 +92,206 @@ class QueryAPIQueryHelper(QueryHelper):
       ids: [ ids of filtered objects ] (present if type is "ids")
       count: the number of objects filtered, after "limit" is applied
       total: the number of objects filtered, before "limit" is applied
+
+  Filters of different object queries often contain the same sub-expressions,
+  like the same "relevant" filter in the queries of a tree view page. Such
+  shared sub-expressions are evaluated only once per request into a list of
+  matching ids, which is then used by all queries containing them.
+
+  "ids" and "count" queries that don't depend on results of other queries are
+  run concurrently in QUERY_API_THREADS threads started for the request, each
+  thread with its own DB session. Queries that reference "__previous__"
+  results run after them, in order. Results of these independent queries are
+  cached, see ggrc.services.query_cache. With a single thread all queries run
+  one after another in the request session and are not cached.
   """
+
+  # Shared sub-expressions that match more objects are reused as SQL clauses
+  # instead of lists of ids
+  MAX_SHARED_IDS = 10000
+
+  # Operators that have to be built for every query they are used in
+  NOT_SHARED_OPERATIONS = {"AND", "OR", "similar"}
+
+  # Operators that use the current user or store state in flask.g, so the
+  # queries containing them can't run in worker threads. Permission filters
+  # of the other queries are built in the request thread before they start.
+  NOT_PARALLEL_OPERATIONS = {"owned", "similar"}
+
+  def __init__(self, query):
+    super(QueryAPIQueryHelper, self).__init__(query)
+    self._shared_keys = self._plan_shared_expressions()
+    self._shared_results = {}
+    self._shared_lock = threading.Lock()
+    self._type_queries = {}
+
+  @classmethod
+  def _iter_leaves(cls, expression):
+    """Get all operands of AND and OR operators in the expression tree."""
+    if not isinstance(expression, dict):
+      return
+    if expression.get("op", {}).get("name") in ("AND", "OR"):
+      for leaf in itertools.chain(cls._iter_leaves(expression.get("left")),
+                                  cls._iter_leaves(expression.get("right"))):
+        yield leaf
+    else:
+      yield expression
+
+  def _plan_shared_expressions(self):
+    """Find sub-expressions used by more than one object query.
+
+    Sub-expressions are the same if they are applied to the same model and
+    have the same content. "__previous__" references are the same if they
+    point to the same object query.
+
+    Returns:
+      dict of shared sub-expression keys by id() of the sub-expression dicts.
+    """
+    keys = {}
+    for object_query in self.query:
+      expression = object_query.get("filters", {}).get("expression")
+      object_class = inflector.get_model(object_query["object_name"])
+      if not expression or object_class is None:
+        continue
+      tgt_class = self._get_target_class(object_query, object_class)
+      for leaf in self._iter_leaves(expression):
+        if leaf.get("op", {}).get("name") in self.NOT_SHARED_OPERATIONS:
+          continue
+        keys[id(leaf)] = (object_class.__name__, tgt_class.__name__,
+                          json_lib.dumps(leaf, sort_keys=True,
+                                         default=unicode))
+    counts = collections.Counter(keys.itervalues())
+    return {leaf_id: key for leaf_id, key in keys.iteritems()
+            if counts[key] > 1}
+
+  def _build_expression(self, expression, object_class, tgt_class):
+    """Make a filtering expression reusing shared sub-expressions."""
+    operation = expression.get("op", {}).get("name")
+    if operation in ("AND", "OR"):
+      combine = sa.and_ if operation == "AND" else sa.or_
+      return combine(
+          self._build_expression(expression["left"], object_class, tgt_class),
+          self._build_expression(expression["right"], object_class,
+                                 tgt_class),
+      )
+    key = self._shared_keys.get(id(expression))
+    if key is None:
+      return super(QueryAPIQueryHelper, self)._build_expression(
+          expression, object_class, tgt_class)
+    with self._shared_lock:
+      if key not in self._shared_results:
+        with query_cache.record_tables() as tables:
+          clause = self._evaluate_shared_expression(
+              expression, object_class, tgt_class)
+        self._shared_results[key] = (clause, tables)
+      clause, tables = self._shared_results[key]
+    # results of every query using the sub-expression depend on its tables
+    query_cache.add_recorded_tables(tables)
+    return clause
+
+  def _evaluate_shared_expression(self, expression, object_class, tgt_class):
+    """Get a filter by ids of objects matching the sub-expression."""
+    clause = super(QueryAPIQueryHelper, self)._build_expression(
+        expression, object_class, tgt_class)
+    if clause is None:
+      return None
+    with benchmark("Evaluate shared expression"):
+      ids = [row[0] for row in db.session.query(object_class.id).filter(
+          clause).distinct().limit(self.MAX_SHARED_IDS + 1)]
+    if len(ids) > self.MAX_SHARED_IDS:
+      return clause
+    if not ids:
+      return sa.sql.false()
+    return object_class.id.in_(ids)
+
+  def _get_type_query(self, model, permission_type):
+    """Get permissions filter of the model, built once per request."""
+    key = (model.__name__, permission_type)
+    if key not in self._type_queries:
+      self._type_queries[key] = super(
+          QueryAPIQueryHelper, self)._get_type_query(model, permission_type)
+    return self._type_queries[key]
+
+  def _is_independent(self, object_query):
+    """Check if the object query can run in a worker thread."""
+    if object_query.get("type", "values") == "values":
+      return False
+    expression = object_query.get("filters", {}).get("expression")
+    if not expression or inflector.get_model(
+            object_query["object_name"]) is None:
+      return False
+    for leaf in self._iter_leaves(expression):
+      if (leaf.get("op", {}).get("name") in self.NOT_PARALLEL_OPERATIONS or
+              leaf.get("object_name") == "__previous__"):
+        return False
+    return True
+
+  def _get_parallel_queries(self):
+    """Get "ids" and "count" queries that don't depend on other queries.
+
+    With the query cache enabled they always run in worker threads, so that
+    results to be cached are computed in new transactions.
+    """
+    if getattr(settings, "QUERY_API_THREADS", 1) <= 1:
+      return []
+    queries = [object_query for object_query in self.query
+               if self._is_independent(object_query)]
+    if len(queries) < 2 and not query_cache.is_enabled():
+      return []
+    return queries
+
+  def _get_ids_in_app_context(self, app, object_query):
+    """Get ids of the object query and tables read for them.
+
+    The query runs in a new app context, which gets its own DB session. The
+    session is removed together with the context.
+    """
+    with app.app_context():
+      with query_cache.record_tables() as tables:
+        ids = self._get_ids(object_query)
+      return ids, tables
+
+  def _get_ids_in_parallel(self, queries):
+    """Get ids and read tables of independent queries in worker threads."""
+    # permissions are read from the request context of the current user
+    for object_query in queries:
+      self._get_type_query(inflector.get_model(object_query["object_name"]),
+                           object_query.get("permissions", "read"))
+    get_ids = functools.partial(self._get_ids_in_app_context,
+                                flask.current_app._get_current_object())
+    return _map_in_threads(get_ids, queries,
+                           getattr(settings, "QUERY_API_THREADS", 1))
+
+  def _get_independent_ids(self, queries):
+    """Get ids of independent object queries from the cache or threads.
+
+    Table versions are read before the worker threads start their
+    transactions, so the cached results can't be older than the versions.
+    """
+    if not query_cache.is_enabled():
+      return [ids for ids, _ in self._get_ids_in_parallel(queries)]
+    versions = query_cache.get_versions()
+    keys = [query_cache.get_key(object_query) for object_query in queries]
+    results = [query_cache.get(key, versions) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+    if missing:
+      computed = self._get_ids_in_parallel([queries[index]
+                                            for index in missing])
+      for index, (ids, tables) in zip(missing, computed):
+        results[index] = (ids, queries[index]["total"])
+        query_cache.store(keys[index], versions, tables, results[index])
+    for object_query, (_, total) in zip(queries, results):
+      object_query["total"] = total
+    return [ids for ids, _ in results]
+
+  @staticmethod
+  def _set_ids_results(object_query, ids):
+    """Add results of an "ids" or "count" query to the object query."""
+    object_query["count"] = len(ids)
+    object_query["last_modified"] = None  # synonymous to now()
+    if object_query.get("type") == "ids":
+      object_query["ids"] = ids
+
   def get_results(self):
     """Filter the objects and get their information.
 
@@ -44,10 +303,20 @@ class QueryAPIQueryHelper(QueryHelper):
                      the filter.
     """
     for object_query in self.query:
-      query_type = object_query.get("type", "values")
-      if query_type not in {"values", "ids", "count"}:
+      if object_query.get("type", "values") not in {"values", "ids", "count"}:
         raise NotImplementedError("Only 'values', 'ids' and 'count' queries "
                                   "are supported now")
+    parallel_queries = self._get_parallel_queries()
+    if parallel_queries:
+      with benchmark("Get result sets: get_results -> _get_independent_ids"):
+        results = self._get_independent_ids(parallel_queries)
+      for object_query, ids in zip(parallel_queries, results):
+        self._set_ids_results(object_query, ids)
+    done = {id(object_query) for object_query in parallel_queries}
+    for object_query in self.query:
+      if id(object_query) in done:
+        continue
+      query_type = object_query.get("type", "values")
       model = inflector.get_model(object_query["object_name"])
       if query_type == "values":
         with benchmark("Get result set: get_results > _get_objects"):
@@ -64,10 +333,7 @@ class QueryAPIQueryHelper(QueryHelper):
       else:
         with benchmark("Get result set: get_results -> _get_ids"):
           ids = self._get_ids(object_query)
-        object_query["count"] = len(ids)
-        object_query["last_modified"] = None  # synonymous to now()
-        if query_type == "ids":
-          object_query["ids"] = ids
+        self._set_ids_results(object_query, ids)
     return self.query
 
   @staticmethod
@@ -7,11 +7,29 @@ from flask import request, current_app
 
 import ggrc.models.relationship
 
+from ggrc.fulltext import counts_cache
 from ggrc.fulltext import get_indexer
 from ggrc.utils import GrcEncoder, url_for, benchmark
 from ggrc import db
 
 
+def _get_paging_args():
+  """Get non-negative limit and offset from the request args.
+
+  Returns:
+    (limit, offset) tuple, limit is None if not given.
+
+  Raises:
+    ValueError: if limit or offset is not a non-negative integer.
+  """
+  limit = request.args.get('limit')
+  limit = int(limit) if limit else None
+  offset = int(request.args.get('offset') or 0)
+  if (limit is not None and limit < 0) or offset < 0:
+    raise ValueError("Negative limit or offset")
+  return limit, offset
+
+
 def search():
   terms = request.args.get('q')
   permission_type = request.args.get('__permission_type', 'read')
@@ -39,6 +57,16 @@ def search():
 
   relevant_objects = request.args.get('relevant_objects', None)
 
+  try:
+    limit, offset = _get_paging_args()
+  except ValueError:
+    return current_app.make_response((
+        'Query parameters "limit" and "offset" must be non-negative '
+        'integers.',
+        400,
+        [('Content-Type', 'text/plain')],
+    ))
+
   if extra_params:
     # Parse t1:a=b,c=d;t2:e=f into dict {t1:{a:b,c:d},t2:{e:f}}
     extra_params = {
@@ -65,11 +93,11 @@ def search():
     return do_counts(terms, types, contact_id, extra_params, extra_columns)
   if should_group_by_type:
     return group_by_type_search(terms, types, contact_id, extra_params,
-                                relevant_objects)
+                                relevant_objects, limit, offset)
   return basic_search(
       terms, types,
       permission_type, permission_model,
-      contact_id, extra_params, relevant_objects
+      contact_id, extra_params, relevant_objects, limit, offset
   )
 
 
@@ -82,9 +110,9 @@ def do_counts(terms, types=None, contact_id=None,
 
   indexer = get_indexer()
   with benchmark("Counts"):
-    results = indexer.counts(terms, types=types, contact_id=contact_id,
-                             extra_params=extra_params,
-                             extra_columns=extra_columns)
+    results = counts_cache.get_counts(
+        indexer.counts, terms, types=types, contact_id=contact_id,
+        extra_params=extra_params, extra_columns=extra_columns)
 
   results = [(r[2] if r[2] != "" else r[0], r[1]) for r in results]
   return current_app.make_response((
@@ -129,13 +157,21 @@ def _build_relevant_filter(types, relevant_objects):
 
 def do_search(terms, list_for_type, types=None, permission_type='read',
               permission_model=None, contact_id=None, extra_params=None,
-              relevant_objects=None):
+              relevant_objects=None, limit=None, offset=0):
+  """Search and add a page of found objects to lists given by list_for_type.
+
+  The page is selected by the indexer, unless the results have to be filtered
+  by relevant objects first.
+  """
   indexer = get_indexer()
+  paginate_results = relevant_objects is not None and limit is not None
   with benchmark("Search"):
     results = indexer.search(
         terms, types=types, permission_type=permission_type,
         permission_model=permission_model, contact_id=contact_id,
-        extra_params=extra_params
+        extra_params=extra_params,
+        limit=None if paginate_results else limit,
+        offset=0 if paginate_results else offset,
     )
 
   related_filter = _build_relevant_filter(types, relevant_objects)
@@ -147,6 +183,11 @@ def do_search(terms, list_for_type, types=None, permission_type='read',
     result_pair = (model_type, id)
     if result_pair not in seen_results and related_filter(result_pair):
       seen_results[result_pair] = True
+      if paginate_results:
+        if len(seen_results) <= offset:
+          continue
+        if len(seen_results) > offset + limit:
+          break
       entries_list = list_for_type(model_type)
       entries_list.append({
           'id': id,
@@ -170,24 +211,26 @@ def make_search_result(entries):
 
 def basic_search(terms, types=None,
                  permission_type='read', permission_model=None,
-                 contact_id=None, extra_params=None, relevant_objects=None):
+                 contact_id=None, extra_params=None, relevant_objects=None,
+                 limit=None, offset=0):
   entries = []
 
   def list_for_type(_):
     return entries
 
   do_search(terms, list_for_type, types, permission_type, permission_model,
-            contact_id, extra_params, relevant_objects)
+            contact_id, extra_params, relevant_objects, limit, offset)
   return make_search_result(entries)
 
 
 def group_by_type_search(terms, types=None, contact_id=None, extra_params={},
-                         relevant_objects=None):
+                         relevant_objects=None, limit=None, offset=0):
   entries = {}
 
   def list_for_type(t):
     return entries[t] if t in entries else entries.setdefault(t, [])
 
   do_search(terms, list_for_type, types, contact_id=contact_id,
-            extra_params=extra_params, relevant_objects=relevant_objects)
+            extra_params=extra_params, relevant_objects=relevant_objects,
+            limit=limit, offset=offset)
   return make_search_result(entries)
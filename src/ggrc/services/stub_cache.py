@@ -0,0 +1,135 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Per worker cache of objects referenced by stubs in POSTed JSON.
+
+Collection POST resolves every {"type": ..., "id": ...} stub in the request
+body to a model instance. Imports and automation clients keep posting stubs
+of the same programs, audits and people, so column values of recently
+referenced objects are kept here. A cached object is only validated with a
+narrow query of its updated_at and the id of its latest revision instead of
+loading its full row.
+
+Every change made through the API logs a new revision in the same
+transaction, so changes made by other workers are detected even within the
+same second as the cached state. Objects changed by this worker are also
+removed from the cache right away.
+"""
+
+import copy
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy import orm
+from sqlalchemy.orm import attributes
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models.revision import Revision
+from ggrc.utils.structures import LRUCache
+
+
+class StubCache(object):
+  """Bounded cache of column values of objects by type and id."""
+
+  def __init__(self, max_size, ttl=None):
+    self._cache = LRUCache(max_size, ttl)
+
+  @staticmethod
+  def _snapshot(obj):
+    """Get class and loaded column values of a clean persistent object."""
+    mapper = orm.object_mapper(obj)
+    values = {attr.key: obj.__dict__[attr.key]
+              for attr in mapper.column_attrs if attr.key in obj.__dict__}
+    return obj.__class__, copy.deepcopy(values)
+
+  @staticmethod
+  def _restore(entry):
+    """Get an instance in the current session from cached column values.
+
+    The instance is made persistent without a query. Attributes that were not
+    cached, like relationships, are loaded lazily on access.
+    """
+    model, values = entry
+    mapper = orm.class_mapper(model)
+    key = mapper.identity_key_from_primary_key(
+        [values[mapper.get_property_by_column(column).key]
+         for column in mapper.primary_key])
+    obj = db.session.identity_map.get(key)
+    if obj is not None:
+      return obj
+    obj = mapper.class_manager.new_instance()
+    obj.__dict__.update(copy.deepcopy(values))
+    attributes.instance_state(obj).key = key
+    return db.session.merge(obj, load=False)
+
+  @staticmethod
+  def _latest_revision(model):
+    """Get a subquery of the latest revision id of each object of model."""
+    return sa.select([sa.func.max(Revision.id)]).where(sa.and_(
+        Revision.resource_type == model.__name__,
+        Revision.resource_id == model.id,
+    )).as_scalar()
+
+  def get_objects(self, model, ids):
+    """Get existing objects of model by ids.
+
+    Args:
+      model: model class of the objects.
+      ids: ids of the objects.
+
+    Returns:
+      dict of instances in the current session by id.
+    """
+    ids = set(ids)
+    if not hasattr(model, "updated_at"):
+      return {obj.id: obj for obj in model.query.filter(model.id.in_(ids))}
+    cached = {}
+    for id_ in ids:
+      entry = self._cache.get((model.__name__, id_))
+      if entry is not None:
+        cached[id_] = entry
+    result = {}
+    if cached:
+      current = {
+          id_: (updated_at, revision_id)
+          for id_, updated_at, revision_id in db.session.query(
+              model.id, model.updated_at, self._latest_revision(model),
+          ).filter(model.id.in_(cached.keys()))
+      }
+      for id_, (version, entry) in cached.iteritems():
+        if id_ in current and current[id_] == version:
+          result[id_] = self._restore(entry)
+    missing = ids.difference(result)
+    if missing:
+      # updated_at and most columns are deferred, load them with the rows
+      base_class = orm.class_mapper(model).base_mapper.class_
+      query = db.session.query(model, self._latest_revision(model)).options(
+          orm.Load(base_class).undefer_group(
+              base_class.__name__ + "_complete"))
+      for obj, revision_id in query.filter(model.id.in_(missing)):
+        result[obj.id] = obj
+        self._cache[(model.__name__, obj.id)] = (
+            (obj.updated_at, revision_id), self._snapshot(obj))
+    return result
+
+  def invalidate(self, obj=None):
+    """Remove a single object or all objects from the cache."""
+    if obj is None:
+      self._cache.clear()
+    else:
+      self._cache.pop((obj.__class__.__name__, obj.id), None)
+
+
+stub_cache = StubCache(  # pylint: disable=invalid-name
+    getattr(settings, "STUB_CACHE_SIZE", 10000),
+    getattr(settings, "STUB_CACHE_TTL", 300),
+)
+
+
+@event.listens_for(db.Model, "after_update", propagate=True)
+@event.listens_for(db.Model, "after_delete", propagate=True)
+def invalidate_object(mapper, connection, target):
+  # pylint: disable=unused-argument
+  """Remove objects changed by this worker from the cache."""
+  stub_cache.invalidate(target)
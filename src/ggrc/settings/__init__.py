@@ -60,6 +60,9 @@ for module_name in SETTINGS_MODULE.split(" "):
 
   globals().update(namespace)
 
+if MEMCACHE_MECHANISM and CACHE_BACKEND not in ('appengine', 'memcached'):
+  raise RuntimeError("MEMCACHE_MECHANISM requires a shared CACHE_BACKEND, "
+                     "'appengine' or 'memcached'")
 
 LOGGING = {
     "version": 1,
@@ -9,5 +9,6 @@ FULLTEXT_INDEXER = 'ggrc.fulltext.mysql.MysqlIndexer'
 AUTOBUILD_ASSETS = False
 SQLALCHEMY_RECORD_QUERIES = False
 MEMCACHE_MECHANISM = True
+CACHE_BACKEND = 'appengine'
 CALENDAR_MECHANISM = False
 BACKGROUND_COLLECTION_POST_SLEEP = 2.5  # seconds
@@ -16,8 +16,33 @@ SQLALCHEMY_POOL_RECYCLE = 120
 AUTOBUILD_ASSETS = False
 ENABLE_JASMINE = False
 DEBUG_ASSETS = False
+# Use 'ggrc.fulltext.mysql.MysqlNgramIndexer' to search with MySQL FULLTEXT
+# (ngram) index instead of LIKE, requires MySQL 5.7.6+
+# Use 'ggrc.fulltext.inverted.InvertedIndexer' to keep the index in memory
 FULLTEXT_INDEXER = None
+# File to persist InvertedIndexer index to, it's kept only in memory if empty
+FULLTEXT_INDEX_PATH = os.environ.get('GGRC_FULLTEXT_INDEX_PATH', '')
+# Queue changed objects and update full text index outside of the request,
+# the queue is drained by /_background_tasks/update_fulltext_index cron job
+FULLTEXT_INDEX_ASYNC = os.environ.get(
+    'GGRC_FULLTEXT_INDEX_ASYNC', '').lower() in ('1', 'true')
+# Max number of people and seconds they are cached for full text records,
+# the cache is also cleared when people are changed by any worker sharing
+# CACHE_BACKEND, see ggrc.fulltext.people
+FULLTEXT_PEOPLE_CACHE_SIZE = 10000
+FULLTEXT_PEOPLE_CACHE_TTL = 300
+# Max number of cached search counts and seconds they are cached for
+FULLTEXT_COUNTS_CACHE_SIZE = 1000
+FULLTEXT_COUNTS_CACHE_TTL = 60
+# Number of worker processes used for full reindex
+FULLTEXT_REINDEX_PROCESSES = int(
+    os.environ.get('GGRC_FULLTEXT_REINDEX_PROCESSES', '1'))
 USER_PERMISSIONS_PROVIDER = None
+# Permission filters with more resource ids than this use stored resource
+# sets instead of IN lists, sets unused for the given number of seconds are
+# purged by the nightly cron job
+PERMISSION_RESOURCES_THRESHOLD = 1000
+PERMISSION_RESOURCES_TTL = 24 * 60 * 60
 EXTENSIONS = []
 exports = []
 
@@ -68,7 +93,33 @@ else:
 SQLALCHEMY_DATABASE_URI = os.environ.get('GGRC_DATABASE_URI', '')
 SECRET_KEY = os.environ.get('GGRC_SECRET_KEY', 'Replace-with-something-secret')
 
-MEMCACHE_MECHANISM = True
+# Backend of the shared cache: "appengine", "memcached" or "local"
+CACHE_BACKEND = os.environ.get('GGRC_CACHE_BACKEND', 'local')
+# Cache resources and permissions, entries are invalidated only by the worker
+# that changed them, so the cache needs a CACHE_BACKEND shared by all workers
+MEMCACHE_MECHANISM = CACHE_BACKEND in ('appengine', 'memcached')
+# Comma separated host:port list of memcached servers
+CACHE_SERVERS = os.environ.get('GGRC_CACHE_SERVERS', '')
+# Max number of entries and seconds they are cached for by local backend
+CACHE_LOCAL_SIZE = 10000
+CACHE_LOCAL_TTL = 60
+# Max number of objects referenced in POSTed JSON and seconds their column
+# values are cached for by each worker
+STUB_CACHE_SIZE = 10000
+STUB_CACHE_TTL = 300
+# Number of threads started by a /query request to run its independent "ids"
+# and "count" queries, 1 runs them one after another in the request thread
+# without the query cache
+QUERY_API_THREADS = int(os.environ.get('GGRC_QUERY_API_THREADS', '4'))
+# Max number of cached /query "ids" and "count" results per worker and
+# seconds they are cached for, 0 size disables the cache, it is also disabled
+# with the local CACHE_BACKEND and a single QUERY_API_THREADS
+QUERY_CACHE_SIZE = 1000
+QUERY_CACHE_TTL = 300
+# Max number of cached filter clause templates of /query expression shapes
+# per worker, 0 disables the cache, it is also disabled with the local
+# CACHE_BACKEND
+QUERY_TEMPLATE_CACHE_SIZE = 1000
 
 # AppEngine Email
 APPENGINE_EMAIL = os.environ.get('APPENGINE_EMAIL', '')
@@ -118,6 +169,9 @@ LOGGING_LOGGERS = {
 
 
 DEBUG_BENCHMARK = os.environ.get("GGRC_BENCHMARK")
+# Collect per endpoint latency and SQL statistics shown on /admin/profiler
+PROFILER_ENABLED = os.environ.get(
+    "GGRC_PROFILER", "true").lower() in ("1", "true")
 
 # GGRCQ integration
 GGRC_Q_INTEGRATION_URL = os.environ.get('GGRC_Q_INTEGRATION_URL', '')
@@ -10,6 +10,7 @@ child object (e.g. Control, Regulation, ...) and a particular revision.
 
 from logging import getLogger
 
+import sqlalchemy as sa
 from sqlalchemy.sql.expression import tuple_
 from sqlalchemy.sql.expression import bindparam
 
@@ -448,42 +449,45 @@ class SnapshotGenerator(object):
     between a pair of object that was snapshotted. These relationships get
     created for all objects inside a single parent scope.
     """
+    relationships = models.Relationship.__table__
+    rel = relationships.alias("rel")
+    snap_1 = models.Snapshot.__table__.alias("snap_1")
+    snap_2 = models.Snapshot.__table__.alias("snap_2")
     for parent in self.parents:
-      query = """
-          INSERT IGNORE INTO relationships (
-              modified_by_id,
-              created_at,
-              updated_at,
-              source_id,
-              source_type,
-              destination_id,
-              destination_type,
-              context_id
-          )
-          SELECT
-              :user_id,
-              now(),
-              now(),
-              snap_1.id,
-              "Snapshot",
-              snap_2.id,
-              "Snapshot",
-              snap_2.context_id
-          FROM relationships AS rel
-          INNER JOIN snapshots AS snap_1
-              ON (snap_1.child_type, snap_1.child_id) =
-                 (rel.source_type, rel.source_id)
-          INNER JOIN snapshots AS snap_2
-              ON (snap_2.child_type, snap_2.child_id) =
-                 (rel.destination_type, rel.destination_id)
-          WHERE
-              snap_1.parent_id = :parent_id AND
-              snap_2.parent_id = :parent_id
-          """
-      db.session.execute(query, {
-          "user_id": get_current_user_id(),
-          "parent_id": parent.id
-      })
+      # a Core statement, so that hooks of changed tables see the new rows
+      select = sa.select([
+          sa.literal(get_current_user_id()),
+          sa.func.now(),
+          sa.func.now(),
+          snap_1.c.id,
+          sa.literal("Snapshot"),
+          snap_2.c.id,
+          sa.literal("Snapshot"),
+          snap_2.c.context_id,
+      ]).select_from(
+          rel.join(snap_1, sa.and_(
+              snap_1.c.child_type == rel.c.source_type,
+              snap_1.c.child_id == rel.c.source_id,
+          )).join(snap_2, sa.and_(
+              snap_2.c.child_type == rel.c.destination_type,
+              snap_2.c.child_id == rel.c.destination_id,
+          ))
+      ).where(sa.and_(
+          snap_1.c.parent_id == parent.id,
+          snap_2.c.parent_id == parent.id,
+      ))
+      db.session.execute(relationships.insert().prefix_with(
+          "IGNORE"
+      ).from_select([
+          relationships.c.modified_by_id,
+          relationships.c.created_at,
+          relationships.c.updated_at,
+          relationships.c.source_id,
+          relationships.c.source_type,
+          relationships.c.destination_id,
+          relationships.c.destination_type,
+          relationships.c.context_id,
+      ], select))
 
 
 def create_snapshots(objs, event, revisions=None, _filter=None, dry_run=False):
@@ -12,7 +12,9 @@ from ggrc import db
 from ggrc import models
 from ggrc.models import all_models
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.fulltext import counts_cache
 from ggrc.fulltext import get_indexer
+from ggrc.fulltext.people import people_cache
 from ggrc.models.reflection import AttributeInfo
 from ggrc.utils import generate_query_chunks
 
@@ -180,6 +182,7 @@ def delete_records(snapshot_ids):
     snapshot_ids: An iterable with snapshot IDs whose full text records should
         be deleted.
   """
+  counts_cache.invalidate(["Snapshot"])
   to_delete = {("Snapshot", _id) for _id in snapshot_ids}
   db.session.query(Record).filter(
       tuple_(Record.type, Record.key).in_(to_delete)
@@ -193,6 +196,7 @@ def insert_records(payload):
   Args:
     payload: List of dictionaries that represent records entries.
   """
+  counts_cache.invalidate(["Snapshot"])
   engine = db.engine
   engine.execute(Record.__table__.insert(), payload)
   db.session.commit()
@@ -226,6 +230,24 @@ def get_person_sort_subprop(rec, people):
   return data
 
 
+def _iter_people(value):
+  """Iterate over person stubs in a revision value of any nesting."""
+  if isinstance(value, dict):
+    if value.get("type") == "Person" and "id" in value:
+      yield value
+  elif isinstance(value, (list, tuple)):
+    for item in value:
+      for person in _iter_people(item):
+        yield person
+
+
+def _get_person_ids(properties_list):
+  """Get ids of all people referenced in searchable properties."""
+  return {person["id"] for properties in properties_list
+          for value in properties.values()
+          for person in _iter_people(value)}
+
+
 def reindex_pairs(pairs):  # noqa  # pylint:disable=too-many-branches
   """Reindex selected snapshots.
 
@@ -266,6 +288,7 @@ def reindex_pairs(pairs):  # noqa  # pylint:disable=too-many-branches
     for _id, _type, content in revision_query:
       revisions[_id] = get_searchable_attributes(
           CLASS_PROPERTIES[_type], cad_dict, content)
+    people_cache.prefetch(_get_person_ids(revisions.values()))
 
     snapshot_ids = set()
     for pair in snapshots:
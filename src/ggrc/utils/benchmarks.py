@@ -20,6 +20,7 @@ import time
 from collections import defaultdict
 
 from ggrc import settings
+from ggrc.utils import profiler
 
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,7 @@ class BenchmarkContextManager(object):
 
   def __exit__(self, exc_type, exc_value, exc_trace):
     end = time.time()
+    profiler.record_phase(self.message, end - self.start)
     logger.debug("%.4f %s", end - self.start, self.message)
 
 
@@ -147,6 +149,7 @@ class DebugBenchmark(object):
     duration = time.time() - self.start
     DebugBenchmark._depth -= 1
     self.update_stats(duration)
+    profiler.record_phase(self.message, duration)
     if not self.quiet and self._summary in {"all", "last"}:
       msg = self.form.format(
           prefix=self.PREFIX * DebugBenchmark._depth,
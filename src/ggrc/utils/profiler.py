@@ -0,0 +1,241 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Lightweight always-on request profiler.
+
+Every request counts its SQL statements, their time and the number of
+fetched rows, and sums up time spent in ``benchmark()`` blocks. At the end of
+the request the numbers are added to in-memory histograms per endpoint and
+HTTP method, so N+1 query regressions show up on live traffic.
+
+Stats are kept per worker process and can be read with ``get_stats`` (JSON)
+or ``prometheus_text`` (Prometheus text exposition format).
+"""
+
+import bisect
+import re
+import threading
+import time
+from collections import defaultdict
+
+from flask import g
+from flask import has_request_context
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+ROWS_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+# Endpoint name of requests that didn't match any URL rule
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+# Numbers in benchmark messages, like "body loop: 15", would make a new phase
+# for every value
+_NUMBERS = re.compile(r"\d+")
+
+
+class Histogram(object):
+  """Counts of observed values in buckets with upper bounds."""
+
+  def __init__(self, buckets):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)
+    self.sum = 0
+    self.count = 0
+
+  def observe(self, value):
+    self.counts[bisect.bisect_left(self.buckets, value)] += 1
+    self.sum += value
+    self.count += 1
+
+  def cumulative(self):
+    """Get (upper bound, count of values <= bound) pairs."""
+    result = []
+    total = 0
+    for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+      total += count
+      result.append((bound, total))
+    return result
+
+  def as_dict(self):
+    return {
+        "buckets": self.cumulative(),
+        "sum": self.sum,
+        "count": self.count,
+        "mean": float(self.sum) / self.count if self.count else 0,
+    }
+
+
+class EndpointStats(object):
+  """Histograms of all requests to a single endpoint."""
+
+  METRICS = (
+      ("duration_seconds", TIME_BUCKETS),
+      ("sql_queries", COUNT_BUCKETS),
+      ("sql_seconds", TIME_BUCKETS),
+      ("sql_rows", ROWS_BUCKETS),
+  )
+
+  def __init__(self):
+    self.metrics = {name: Histogram(buckets)
+                    for name, buckets in self.METRICS}
+    self.phases = defaultdict(lambda: Histogram(TIME_BUCKETS))
+
+  def add(self, profile, duration):
+    """Add a finished request profile."""
+    self.metrics["duration_seconds"].observe(duration)
+    self.metrics["sql_queries"].observe(profile.sql_queries)
+    self.metrics["sql_seconds"].observe(profile.sql_seconds)
+    self.metrics["sql_rows"].observe(profile.sql_rows)
+    for phase, phase_duration in profile.phases.iteritems():
+      self.phases[phase].observe(phase_duration)
+
+  def as_dict(self):
+    result = {name: histogram.as_dict()
+              for name, histogram in self.metrics.iteritems()}
+    result["phases"] = {phase: histogram.as_dict()
+                        for phase, histogram in self.phases.iteritems()}
+    return result
+
+
+class RequestProfile(object):
+  """Numbers collected during a single request."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self.start = time.time()
+    self.sql_queries = 0
+    self.sql_seconds = 0
+    self.sql_rows = 0
+    self.phases = defaultdict(float)
+
+
+_stats = defaultdict(EndpointStats)  # pylint: disable=invalid-name
+_stats_lock = threading.Lock()  # pylint: disable=invalid-name
+_started_at = time.time()  # pylint: disable=invalid-name
+
+
+def _get_profile():
+  """Get profile of the current request or None."""
+  if not has_request_context():
+    return None
+  return getattr(g, "_request_profile", None)
+
+
+def record_phase(message, duration):
+  """Add duration of a benchmark block to the current request profile."""
+  profile = _get_profile()
+  if profile is not None:
+    profile.phases[_NUMBERS.sub("N", message)] += duration
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+  # pylint: disable=unused-argument,too-many-arguments,protected-access
+  if context is not None and _get_profile() is not None:
+    context._profiler_start = time.time()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+  # pylint: disable=unused-argument,too-many-arguments
+  profile = _get_profile()
+  start = getattr(context, "_profiler_start", None)
+  if profile is None or start is None:
+    return
+  profile.sql_queries += 1
+  profile.sql_seconds += time.time() - start
+  if statement.lstrip()[:6].upper() == "SELECT" and cursor.rowcount > 0:
+    profile.sql_rows += cursor.rowcount
+
+
+def start_request():
+  g._request_profile = RequestProfile()  # pylint: disable=protected-access
+
+
+def finish_request(exc=None):
+  """Add the profile of the current request to endpoint stats."""
+  # pylint: disable=unused-argument
+  profile = _get_profile()
+  if profile is None:
+    return
+  duration = time.time() - profile.start
+  del g._request_profile  # pylint: disable=protected-access
+  rule = request.url_rule
+  key = (request.method, rule.rule if rule else UNMATCHED_ENDPOINT)
+  with _stats_lock:
+    _stats[key].add(profile, duration)
+
+
+def init_app(app):
+  """Profile all requests of the app."""
+  app.before_request(start_request)
+  app.teardown_request(finish_request)
+  if not event.contains(Engine, "before_cursor_execute",
+                        _before_cursor_execute):
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def reset():
+  """Remove all collected stats."""
+  global _started_at  # pylint: disable=global-statement,invalid-name
+  with _stats_lock:
+    _stats.clear()
+    _started_at = time.time()
+
+
+def get_stats():
+  """Get collected stats as a JSON serializable dict."""
+  with _stats_lock:
+    endpoints = []
+    for (method, endpoint), stats in sorted(_stats.iteritems()):
+      item = stats.as_dict()
+      item["method"] = method
+      item["endpoint"] = endpoint
+      endpoints.append(item)
+  return {"since": _started_at, "endpoints": endpoints}
+
+
+def _format_labels(labels):
+  def escape(value):
+    return unicode(value).replace("\\", "\\\\").replace(
+        "\"", "\\\"").replace("\n", "\\n")
+  return u",".join(u'{}="{}"'.format(name, escape(value))
+                   for name, value in labels)
+
+
+def _histogram_lines(name, labels, histogram):
+  """Get Prometheus sample lines of a histogram."""
+  lines = []
+  for bound, count in histogram.cumulative():
+    lines.append(u"{}_bucket{{{}}} {}".format(
+        name, _format_labels(labels + [("le", bound)]), count))
+  lines.append(u"{}_sum{{{}}} {}".format(
+      name, _format_labels(labels), histogram.sum))
+  lines.append(u"{}_count{{{}}} {}".format(
+      name, _format_labels(labels), histogram.count))
+  return lines
+
+
+def prometheus_text():
+  """Get collected stats in Prometheus text exposition format."""
+  metrics = defaultdict(list)
+  with _stats_lock:
+    for (method, endpoint), stats in sorted(_stats.iteritems()):
+      labels = [("method", method), ("endpoint", endpoint)]
+      for name, histogram in sorted(stats.metrics.iteritems()):
+        metrics["ggrc_request_" + name].extend(
+            _histogram_lines("ggrc_request_" + name, labels, histogram))
+      for phase, histogram in sorted(stats.phases.iteritems()):
+        metrics["ggrc_request_phase_seconds"].extend(_histogram_lines(
+            "ggrc_request_phase_seconds", labels + [("phase", phase)],
+            histogram))
+  lines = []
+  for name, samples in sorted(metrics.iteritems()):
+    lines.append(u"# TYPE {} histogram".format(name))
+    lines.extend(samples)
+  return u"\n".join(lines) + u"\n"
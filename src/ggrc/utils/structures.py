@@ -4,6 +4,8 @@
 """Collection if ggrc specific structures."""
 
 import collections
+import threading
+import time
 
 
 class CaseInsensitiveDict(collections.MutableMapping):
@@ -102,3 +104,58 @@ class CaseInsensitiveDefaultDict(CaseInsensitiveDict):
 
   def copy(self):
     return CaseInsensitiveDefaultDict(self._default, data=self._store.values())
+
+
+class LRUCache(collections.MutableMapping):
+  """Thread safe dict with bounded size and optional expiration time.
+
+  When the cache is full, the least recently used item is evicted. Items
+  older than `ttl` seconds are treated as missing.
+  """
+
+  def __init__(self, max_size, ttl=None, timer=time.time):
+    self.max_size = max_size
+    self.ttl = ttl
+    self._timer = timer
+    self._store = collections.OrderedDict()
+    self._lock = threading.RLock()
+
+  def _expired(self, stored_at):
+    return self.ttl is not None and self._timer() - stored_at > self.ttl
+
+  def __getitem__(self, key):
+    with self._lock:
+      value, stored_at = self._store.pop(key)
+      if self._expired(stored_at):
+        raise KeyError(key)
+      self._store[key] = (value, stored_at)
+      return value
+
+  def __setitem__(self, key, value):
+    with self._lock:
+      self._store.pop(key, None)
+      self._store[key] = (value, self._timer())
+      while len(self._store) > self.max_size:
+        self._store.popitem(last=False)
+
+  def __delitem__(self, key):
+    with self._lock:
+      del self._store[key]
+
+  def __contains__(self, key):
+    try:
+      self[key]
+    except KeyError:
+      return False
+    return True
+
+  def __iter__(self):
+    with self._lock:
+      return iter(self._store.keys())
+
+  def __len__(self):
+    return len(self._store)
+
+  def clear(self):
+    with self._lock:
+      self._store.clear()
@@ -12,32 +12,32 @@ import logging
 from flask import flash
 from flask import g
 from flask import render_template
+from flask import request
 from flask import url_for
 from werkzeug.exceptions import Forbidden
 
 from ggrc import models
 from ggrc import settings
 from ggrc.app import app
-from ggrc.app import db
 from ggrc.builder.json import publish
 from ggrc.builder.json import publish_representation
 from ggrc.converters import get_importables, get_exportables
 from ggrc.extensions import get_extension_modules
-from ggrc.fulltext import get_indexer, get_indexed_model_names, mixin
+from ggrc.fulltext import index_queue
+from ggrc.fulltext.reindex import do_reindex
+from ggrc.fulltext.reindex import get_progress as get_reindex_progress
 from ggrc.login import get_current_user
 from ggrc.login import login_required
 from ggrc.models import all_models
 from ggrc.models.background_task import create_task
 from ggrc.models.background_task import make_task_response
 from ggrc.models.background_task import queued_task
-from ggrc.models.inflector import get_model
 from ggrc.models.reflection import AttributeInfo
 from ggrc.rbac import permissions
 from ggrc.services.common import as_json
 from ggrc.services.common import inclusion_filter
 from ggrc.services import query as services_query
 from ggrc.snapshotter import rules
-from ggrc.snapshotter.indexer import reindex as reindex_snapshots
 from ggrc.views import converters
 from ggrc.views import cron
 from ggrc.views import filters
@@ -46,7 +46,7 @@ from ggrc.views import notifications
 from ggrc.views.common import RedirectedPolymorphView
 from ggrc.views.registry import object_view
 from ggrc.utils import benchmark
-from ggrc.utils import generate_query_chunks
+from ggrc.utils import profiler
 from ggrc.utils import revisions
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -63,47 +63,35 @@ def refresh_revisions(_):
 
 @app.route("/_background_tasks/reindex", methods=["POST"])
 @queued_task
-def reindex(_):
+def reindex(task):
   """Web hook to update the full text search index."""
-  do_reindex()
+  parameters = task.parameters or {}
+  do_reindex(resume=parameters.get("resume", False))
   return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
-def do_reindex():
-  """Update the full text search index."""
-
-  indexer = get_indexer()
-  indexed_models = get_indexed_model_names()
-
-  people = db.session.query(all_models.Person.id, all_models.Person.name,
-                            all_models.Person.email)
-  indexer.cache["people_map"] = {p.id: (p.name, p.email) for p in people}
-  for model in sorted(indexed_models):
-    # pylint: disable=protected-access
-    logger.info("Updating index for: %s", model)
-    with benchmark("Create records for %s" % model):
-      model = get_model(model)
-      mapper_class = model._sa_class_manager.mapper.base_mapper.class_
-      if issubclass(model, mixin.Indexed):
-        for query_chunk in generate_query_chunks(db.session.query(model.id)):
-          model.bulk_record_update_for([i.id for i in query_chunk])
-          db.session.commit()
-      else:
-        logger.warning(
-            "Try to index model that not inherited from Indexed mixin: %s",
-            model.__name__
-        )
-        indexer.delete_records_by_type(model.__name__)
-        query = model.query.options(
-            db.undefer_group(mapper_class.__name__ + '_complete'),
-        )
-        for query_chunk in generate_query_chunks(query):
-          for instance in query_chunk:
-            indexer.create_record(indexer.fts_record_for(instance), False)
-          db.session.commit()
-
-  reindex_snapshots()
-  indexer.invalidate_cache()
+def _is_cron_request():
+  """Check if the request is sent by App Engine cron.
+
+  App Engine removes X-Appengine headers from requests of external clients.
+  """
+  return request.headers.get("X-Appengine-Cron") == "true"
+
+
+@app.route("/_background_tasks/update_fulltext_index", methods=["GET", "POST"])
+def update_fulltext_index():
+  """Web hook to update the full text index for queued objects.
+
+  Only cron jobs and administrators can drain the queue.
+  """
+  if not _is_cron_request():
+    user = get_current_user()
+    if (user is None or user.is_anonymous() or
+            not permissions.is_allowed_read("/admin", None, 1)):
+      raise Forbidden()
+  index_queue.drain_all()
+  return app.make_response((json.dumps(index_queue.get_status()), 200,
+                            [("Content-Type", "application/json")]))
 
 
 def get_permissions_json():
@@ -303,12 +291,24 @@ def admin_reindex():
   """
   if not permissions.is_allowed_read("/admin", None, 1):
     raise Forbidden()
-  task_queue = create_task("reindex", url_for(reindex.__name__), reindex)
+  resume = request.values.get("resume", "").lower() in ("1", "true")
+  task_queue = create_task("reindex", url_for(reindex.__name__), reindex,
+                           parameters={"resume": resume})
   return task_queue.make_response(
       app.make_response(("scheduled %s" % task_queue.name, 200,
                          [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/reindex/progress", methods=["GET"])
+@login_required
+def admin_reindex_progress():
+  """Get last reindexed ids of models from the reindex checkpoints."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  return app.make_response((json.dumps(get_reindex_progress()), 200,
+                            [("Content-Type", "application/json")]))
+
+
 @app.route("/admin/refresh_revisions", methods=["POST"])
 @login_required
 def admin_refresh_revisions():
@@ -324,6 +324,22 @@ def admin_refresh_revisions():
                          [('Content-Type', 'text/html')])))
 
 
+@app.route("/admin/profiler", methods=["GET"])
+@login_required
+def admin_profiler():
+  """Get request latency and SQL statistics of this worker by endpoint.
+
+  Use the format=prometheus parameter to get the Prometheus text format.
+  """
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  if request.args.get("format") == "prometheus":
+    return app.make_response((profiler.prometheus_text(), 200,
+                              [("Content-Type", "text/plain; version=0.0.4")]))
+  return app.make_response((json.dumps(profiler.get_stats()), 200,
+                            [("Content-Type", "application/json")]))
+
+
 @app.route("/admin")
 @login_required
 def admin():
@@ -357,7 +357,7 @@ def query_memcache(key):
   Args:
       key (string): key of the stored permissions
   Returns:
-      cache (memcache_client): memcache client or None if caching
+      cache (cache client): cache backend client or None if caching
                                is not available
       permissions_cache (dict): dict with all permissions or None if there
                                 was a cache miss
@@ -365,7 +365,7 @@ def query_memcache(key):
   if not getattr(settings, 'MEMCACHE_MECHANISM', False):
     return None, None
 
-  cache = _get_cache_manager().cache_object.memcache_client
+  cache = _get_cache_manager().client
   cached_keys_set = cache.get('permissions:list') or set()
   if key not in cached_keys_set:
     # We set the permissions:list variable so that we are able to batch
@@ -155,8 +155,13 @@ class Api(object):
     api_link = self.api_link(obj, obj.id)
     return self.client.delete(api_link, headers=headers)
 
-  def search(self, types, q="", counts=False, relevant_objects=None):
+  def search(self, types, q="", counts=False, relevant_objects=None,
+             limit=None, offset=None):
     query = '/search?q={}&types={}&counts_only={}'.format(q, types, counts)
     if relevant_objects is not None:
       query += '&relevant_objects=' + relevant_objects
+    if limit is not None:
+      query += '&limit={}'.format(limit)
+    if offset is not None:
+      query += '&offset={}'.format(offset)
     return (self.client.get(query), self.headers)
@@ -0,0 +1,54 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cached full text search counts."""
+
+from mock import Mock
+from mock import patch
+
+from ggrc import db
+from ggrc import fulltext
+from ggrc.fulltext import counts_cache
+from ggrc.fulltext.recordbuilder import Record
+from ggrc.models import Control
+from ggrc.rbac import permissions
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestCountsCache(TestCase):
+  """Tests for counts-only search results."""
+
+  def setUp(self):
+    super(TestCountsCache, self).setUp()
+    self.api = Api()
+
+  def _count(self, type_):
+    res, _ = self.api.search(type_, counts=True)
+    return res.json["results"]["counts"].get(type_, 0)
+
+  def test_counts_invalidated(self):
+    """Counts change after objects of the counted type are indexed."""
+    factories.ControlFactory()
+    self.assertEqual(self._count("Control"), 1)
+    response = self.api.post(Control, {
+        "control": {"title": "Second control", "context": None},
+    })
+    self.assert201(response)
+    self.assertEqual(self._count("Control"), 2)
+    self.api.delete(Control.query.first())
+    self.assertEqual(self._count("Control"), 1)
+
+  @patch.object(permissions, "permissions_fingerprint", return_value="")
+  def test_invalidated_after_commit(self, _):
+    """Counts cached before an index write is committed are not used."""
+    counts = Mock(return_value=[("Control", 1, "")])
+    fulltext.get_indexer().create_record(
+        Record(1, "Control", None, {"title": {"": "a"}}), commit=False)
+    counts_cache.get_counts(counts, "", types=["Control"])
+    counts_cache.get_counts(counts, "", types=["Control"])
+    self.assertEqual(counts.call_count, 1)
+    db.session.commit()
+    counts_cache.get_counts(counts, "", types=["Control"])
+    self.assertEqual(counts.call_count, 2)
@@ -0,0 +1,71 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for deferred full text indexing."""
+
+from mock import patch
+
+from ggrc import db
+from ggrc import fulltext
+from ggrc import settings
+from ggrc.fulltext import index_queue
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.generator import ObjectGenerator
+from integration.ggrc.models import factories
+
+
+@patch.object(settings, "FULLTEXT_INDEX_ASYNC", True, create=True)
+class TestIndexQueue(TestCase):
+  """Tests for fulltext_index_queue processing."""
+
+  def setUp(self):
+    super(TestIndexQueue, self).setUp()
+    self.api = Api()
+    self.indexer = fulltext.get_indexer()
+
+  def _titles(self, control_id):
+    return [r.content for r in self.indexer.record_type.query.filter_by(
+        type="Control", key=control_id, property="title")]
+
+  def test_coalesce(self):
+    """Repeated changes of an object are queued once."""
+    index_queue.enqueue([("Control", 1), ("Control", 1), ("Market", 1)])
+    index_queue.enqueue([("Control", 1)])
+    db.session.commit()
+    items = {(i.object_type, i.object_id): i.version
+             for i in index_queue.IndexQueueItem.query}
+    self.assertEqual(items, {("Control", 1): 2, ("Market", 1): 1})
+
+  def test_deferred_update(self):
+    """Index is updated only when the queue is drained."""
+    control = factories.ControlFactory(title="old title")
+    control_id = control.id
+    index_queue.drain_all()
+    self.api.put(control, {"title": "new title"})
+    self.assertEqual(self._titles(control_id), ["old title"])
+    self.assertEqual(index_queue.get_status()["length"], 1)
+
+    self.assertEqual(index_queue.drain_all(), 1)
+    self.assertEqual(self._titles(control_id), ["new title"])
+    self.assertEqual(index_queue.get_status()["length"], 0)
+
+  def test_deleted_object(self):
+    """Records of deleted objects are removed from index."""
+    control = factories.ControlFactory(title="deleted")
+    control_id = control.id
+    index_queue.drain_all()
+    self.assertEqual(self._titles(control_id), ["deleted"])
+    self.api.delete(control)
+    index_queue.drain_all()
+    self.assertEqual(self._titles(control_id), [])
+
+  def test_drain_endpoint(self):
+    """Only cron requests and administrators can drain the queue."""
+    url = "/_background_tasks/update_fulltext_index"
+    self.assert200(self.api.client.get(url))
+    _, creator = ObjectGenerator().generate_person(user_role="Creator")
+    self.api.set_user(creator)
+    self.assert403(self.api.client.get(url))
+    self.assert200(self.api.client.get(
+        url, headers={"X-Appengine-Cron": "true"}))
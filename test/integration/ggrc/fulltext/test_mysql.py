@@ -73,3 +73,48 @@ class TestCAD(TestCase):
           property=u"\u5555" * 240 + u"2",
       ))
       db.session.commit()
+
+
+class TestMysqlNgramIndexer(TestCase):
+  """Tests for filtering full text records with the ngram index."""
+
+  def setUp(self):
+    super(TestMysqlNgramIndexer, self).setUp()
+    index = db.session.execute(
+        "SHOW INDEX FROM fulltext_record_properties "
+        "WHERE Key_name = 'ft_fulltext_record_properties_content'").first()
+    if index is None:
+      self.skipTest("FULLTEXT ngram index requires MySQL 5.7.6+")
+    for key, title in ((1, u"Alpha control"), (2, u"Beta control")):
+      db.session.add(mysql.MysqlRecordProperty(
+          key=key,
+          type="Control",
+          property="title",
+          subproperty="",
+          content=title,
+      ))
+    # InnoDB adds rows to FULLTEXT indexes on commit
+    db.session.commit()
+
+  @staticmethod
+  def _keys(terms):
+    """Get keys of records matching the terms."""
+    return {record.key for record in mysql.MysqlRecordProperty.query.filter(
+        mysql.MysqlNgramIndexer._get_filter_query(terms))}
+
+  def test_ngram_search(self):
+    """Terms are matched anywhere in the content with MATCH ... AGAINST."""
+    self.assertIn("MATCH", str(mysql.MysqlNgramIndexer._get_filter_query(
+        "lph")))
+    self.assertEqual(self._keys("lph"), {1})
+    self.assertEqual(self._keys("ntrol"), {1, 2})
+    self.assertEqual(self._keys('"beta"'), {2})
+    self.assertEqual(self._keys("gamma"), set())
+
+  def test_short_terms(self):
+    """Terms shorter than the ngram size are matched with LIKE."""
+    clause = str(mysql.MysqlNgramIndexer._get_filter_query("b"))
+    self.assertNotIn("MATCH", clause)
+    self.assertIn("LIKE", clause)
+    self.assertEqual(self._keys("b"), {2})
+    self.assertEqual(self._keys(""), {1, 2})
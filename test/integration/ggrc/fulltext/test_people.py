@@ -0,0 +1,57 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the people cache of full text records."""
+
+from ggrc import db
+from ggrc.fulltext.people import PeopleCache
+from ggrc.fulltext.people import people_cache
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestPeopleCache(TestCase):
+  """Tests for getting people through the people cache."""
+
+  def setUp(self):
+    super(TestPeopleCache, self).setUp()
+    people_cache.invalidate()
+
+  def test_missing_person(self):
+    """People that are not cached are loaded, unknown people are empty."""
+    person = factories.PersonFactory(name="name", email="user@example.com")
+    self.assertEqual(people_cache.get({"id": person.id}),
+                     (person.id, "name", "user@example.com"))
+    self.assertEqual(people_cache.get({"id": person.id + 1}),
+                     (person.id + 1, None, None))
+
+  def test_rename_in_other_cache(self):
+    """Renames are seen by other caches sharing the cache backend."""
+    person = factories.PersonFactory(name="old", email="user@example.com")
+    person_id = person.id
+    caches = [PeopleCache(10), PeopleCache(10)]
+    for cache in caches:
+      cache.prefetch([person_id])
+      self.assertEqual(cache.get({"id": person_id}),
+                       (person_id, "old", "user@example.com"))
+    person.name = "new"
+    db.session.commit()
+    for cache in caches:
+      cache.prefetch([person_id])
+      self.assertEqual(cache.get({"id": person_id}),
+                       (person_id, "new", "user@example.com"))
+
+  def test_rolled_back_rename(self):
+    """Values of people changed in a transaction are not cached."""
+    person = factories.PersonFactory(name="old", email="user@example.com")
+    person_id = person.id
+    person.name = "new"
+    db.session.flush()
+    self.assertEqual(people_cache.get({"id": person_id}),
+                     (person_id, "new", "user@example.com"))
+    self.assertEqual(people_cache.get(person),
+                     (person_id, "new", "user@example.com"))
+    db.session.rollback()
+    people_cache.prefetch([person_id])
+    self.assertEqual(people_cache.get({"id": person_id}),
+                     (person_id, "old", "user@example.com"))
@@ -0,0 +1,72 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for stored permission resource sets."""
+
+import datetime
+
+import flask
+from mock import patch
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models import all_models
+from ggrc.rbac import resource_sets
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+@patch.object(settings, "PERMISSION_RESOURCES_THRESHOLD", 2, create=True)
+class TestResourceSets(TestCase):
+  """Tests for resource_query_filter."""
+
+  def setUp(self):
+    super(TestResourceSets, self).setUp()
+    with factories.single_commit():
+      self.ids = [factories.ControlFactory().id for _ in range(4)]
+
+  def _filtered_ids(self, resources):
+    return {c.id for c in all_models.Control.query.filter(
+        resource_sets.resource_query_filter(all_models.Control.id,
+                                            resources))}
+
+  def test_small_list(self):
+    """Short lists are not stored."""
+    self.assertEqual(self._filtered_ids(self.ids[:1]), set(self.ids[:1]))
+    self.assertEqual(resource_sets.PermissionResourceSet.query.count(), 0)
+
+  def test_stored_set(self):
+    """Long lists are stored once and matched with a subquery."""
+    resources = self.ids[:3]
+    self.assertEqual(self._filtered_ids(resources), set(resources))
+    self.assertEqual(self._filtered_ids(list(reversed(resources))),
+                     set(resources))
+    self.assertEqual(resource_sets.PermissionResourceSet.query.count(), 1)
+    self.assertEqual(resource_sets.PermissionResource.query.count(), 3)
+
+  def _set_last_used_at(self, last_used_at):
+    db.engine.execute(
+        resource_sets.PermissionResourceSet.__table__.update().values(
+            last_used_at=last_used_at))
+
+  def test_reused_set(self):
+    """Reusing a set keeps it from being purged."""
+    resources = self.ids[:3]
+    self._filtered_ids(resources)
+    self._set_last_used_at(datetime.datetime.utcnow() -
+                           datetime.timedelta(days=2))
+    # tokens are remembered per request
+    del flask.g._permission_resource_tokens  # pylint: disable=protected-access
+    self.assertEqual(self._filtered_ids(resources), set(resources))
+    resource_sets.purge_resource_sets()
+    self.assertEqual(resource_sets.PermissionResourceSet.query.count(), 1)
+    self.assertEqual(resource_sets.PermissionResource.query.count(), 3)
+
+  def test_purge_unused(self):
+    """Sets unused for the TTL are purged with their resources."""
+    self._filtered_ids(self.ids[:3])
+    self._set_last_used_at(datetime.datetime.utcnow() -
+                           datetime.timedelta(days=2))
+    resource_sets.purge_resource_sets()
+    self.assertEqual(resource_sets.PermissionResourceSet.query.count(), 0)
+    self.assertEqual(resource_sets.PermissionResource.query.count(), 0)
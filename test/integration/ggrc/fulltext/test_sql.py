@@ -0,0 +1,104 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for batched SQL indexer writes."""
+
+from mock import patch
+
+from ggrc import db
+from ggrc import fulltext
+from ggrc.fulltext.recordbuilder import Record
+from ggrc.utils import QueryCounter
+from integration.ggrc import TestCase
+
+
+class TestSqlIndexer(TestCase):
+  """Tests for bulk write methods of SqlIndexer."""
+
+  def setUp(self):
+    super(TestSqlIndexer, self).setUp()
+    self.indexer = fulltext.get_indexer()
+    self.indexer.delete_all_records()
+
+  def _contents(self, type_, key):
+    return {
+        (r.property, r.subproperty): r.content
+        for r in self.indexer.record_type.query.filter_by(type=type_, key=key)
+    }
+
+  def test_update_records(self):
+    """Only indexed properties of the updated records are replaced."""
+    self.indexer.create_records([
+        Record(1, "Control", None, {"title": {"": "a"}, "notes": {"": "b"}}),
+        Record(2, "Control", None, {"title": {"": "c"}}),
+    ])
+    self.indexer.update_records([
+        Record(1, "Control", None, {"title": {"": "x"}}),
+        Record(1, "Control", None, {"title": {"": "y"}}),
+        Record(2, "Control", None, {"title": {"": "z", "1": None}}),
+    ])
+    self.assertEqual(self._contents("Control", 1),
+                     {("title", ""): "y", ("notes", ""): "b"})
+    self.assertEqual(self._contents("Control", 2), {("title", ""): "z"})
+
+  def test_delete_records(self):
+    """Records of given objects are deleted with one query per type."""
+    self.indexer.create_records([
+        Record(1, "Control", None, {"title": {"": "a"}}),
+        Record(2, "Control", None, {"title": {"": "b"}}),
+        Record(1, "Market", None, {"title": {"": "c"}}),
+    ])
+    self.indexer.delete_records({"Control": {1}, "Market": [1]},
+                                commit=False)
+    db.session.commit()
+    self.assertEqual(self._contents("Control", 1), {})
+    self.assertEqual(self._contents("Control", 2), {("title", ""): "b"})
+    self.assertEqual(self._contents("Market", 1), {})
+
+  def test_update_only_changes(self):
+    """Unchanged rows are not written again."""
+    self.indexer.create_records([
+        Record(1, "Control", None, {"title": {"": "a"}, "notes": {"": "b"}}),
+    ])
+    with QueryCounter() as counter:
+      self.indexer.update_records([
+          Record(1, "Control", None, {"title": {"": "a"}, "notes": {"": "b"}}),
+      ], commit=False)
+    self.assertEqual([q.split()[0] for q in counter.queries], ["SELECT"])
+    with QueryCounter() as counter:
+      self.indexer.update_records([
+          Record(1, "Control", None, {"title": {"": "c"}, "notes": {"": "b"}}),
+      ], commit=False)
+    self.assertEqual([q.split()[0] for q in counter.queries],
+                     ["SELECT", "INSERT"])
+    db.session.commit()
+    self.assertEqual(self._contents("Control", 1),
+                     {("title", ""): "c", ("notes", ""): "b"})
+
+  def test_update_replace(self):
+    """Replace removes properties missing in the new records."""
+    self.indexer.create_records([
+        Record(1, "Control", None, {"title": {"": "a"}, "notes": {"": "b"}}),
+    ])
+    self.indexer.update_records([
+        Record(1, "Control", None, {"title": {"": "a"}}),
+    ])
+    self.assertEqual(self._contents("Control", 1),
+                     {("title", ""): "a", ("notes", ""): "b"})
+    self.indexer.update_records([
+        Record(1, "Control", None, {"title": {"": "a"}}),
+    ], replace=True)
+    self.assertEqual(self._contents("Control", 1), {("title", ""): "a"})
+
+  def test_overlapping_update(self):
+    """Rows stored after they were read are updated, not inserted again."""
+    self.indexer.create_records([
+        Record(1, "Control", None, {"title": {"": "a"}}),
+    ])
+    # a concurrent reindex stored the rows after this one read them
+    with patch.object(self.indexer, "_get_existing_rows", return_value={}):
+      self.indexer.update_records([
+          Record(1, "Control", None, {"title": {"": "b"}, "notes": {"": "c"}}),
+      ])
+    self.assertEqual(self._contents("Control", 1),
+                     {("title", ""): "b", ("notes", ""): "c"})
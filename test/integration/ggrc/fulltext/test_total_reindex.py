@@ -3,9 +3,12 @@
 
 """Test for total reindex procedure"""
 
+from ggrc import db
 from ggrc import fulltext
-
 from ggrc import views
+from ggrc.fulltext import reindex
+from ggrc.fulltext.reindex import ReindexCheckpoint
+from ggrc.models import all_models
 from integration.ggrc import TestCase
 from integration.ggrc.models import factories as ggrc_factories
 from integration.ggrc_workflows.models import factories as wf_factories
@@ -54,3 +57,31 @@ class TestTotalTeindex(TestCase):
     count = indexer.record_type.query.count()
     views.do_reindex()
     self.assertEqual(count, indexer.record_type.query.count())
+
+  def test_resume_reindex(self):
+    """Test resumed reindex skips completed models and continues others."""
+    with ggrc_factories.single_commit():
+      for _ in range(3):
+        ggrc_factories.ControlFactory()
+        ggrc_factories.MarketFactory()
+    indexer = fulltext.get_indexer()
+    count = indexer.record_type.query.count()
+    last_id = min(c.id for c in all_models.Control.query)
+    ReindexCheckpoint.query.filter_by(model="Control").update({
+        "completed": False,
+        "last_id": last_id,
+    })
+    indexer.delete_records_by_type("Market")
+    indexer.delete_record(last_id, "Control", False)
+    db.session.commit()
+    views.do_reindex(resume=True)
+    # Market was completed and Control is continued after the checkpoint
+    self.assertEqual(
+        indexer.record_type.query.filter_by(type="Market").count(), 0)
+    self.assertEqual(
+        indexer.record_type.query.filter_by(type="Control",
+                                            key=last_id).count(), 0)
+    progress = reindex.get_progress()
+    self.assertTrue(progress["Control"]["completed"])
+    views.do_reindex()
+    self.assertEqual(count, indexer.record_type.query.count())
@@ -0,0 +1,213 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for the materialized object adjacency."""
+
+from collections import defaultdict
+
+from sqlalchemy import event
+
+from ggrc import db
+from ggrc.models import adjacency
+from ggrc.models import all_models
+from ggrc.models.mixins import WithContact
+from ggrc.models.relationship_helper import RelationshipHelper
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc.snapshotter import SnapshotterBaseTestCase
+from integration.ggrc_workflows.models import factories as wf_factories
+
+
+class TestObjectAdjacency(TestCase):
+  """object_adjacency follows changes of mapping rows."""
+
+  def setUp(self):
+    super(TestObjectAdjacency, self).setUp()
+    self.program = factories.ProgramFactory()
+    self.control = factories.ControlFactory()
+
+  @staticmethod
+  def _related_ids(object_type, related_type, related_id):
+    return {row[0] for row in RelationshipHelper.get_ids_related_to(
+        object_type, related_type, [related_id])}
+
+  def test_relationship(self):
+    """Relationships are found in both directions until deleted."""
+    relationship = factories.RelationshipFactory(source=self.program,
+                                                 destination=self.control)
+    self.assertEqual(self._related_ids("Control", "Program", self.program.id),
+                     {self.control.id})
+    self.assertEqual(self._related_ids("Program", "Control", self.control.id),
+                     {self.program.id})
+
+    db.session.delete(relationship)
+    db.session.commit()
+    self.assertEqual(self._related_ids("Control", "Program", self.program.id),
+                     set())
+
+  def test_audit_columns(self):
+    """Changed program and contact of an audit move its rows."""
+    audit = factories.AuditFactory()
+    program, contact = audit.program, audit.contact
+    self.assertEqual(self._related_ids("Audit", "Program", program.id),
+                     {audit.id})
+    self.assertEqual(self._related_ids("Person", "Audit", audit.id),
+                     {contact.id})
+
+    audit = all_models.Audit.query.get(audit.id)
+    audit.program = self.program
+    db.session.commit()
+    self.assertEqual(self._related_ids("Audit", "Program", program.id),
+                     set())
+    self.assertEqual(self._related_ids("Audit", "Program", self.program.id),
+                     {audit.id})
+    self.assertEqual(self._related_ids("Person", "Audit", audit.id),
+                     {contact.id})
+
+
+class TestAdjacencySources(TestCase):
+  """object_adjacency matches direct queries of every mapping table."""
+
+  def setUp(self):
+    super(TestAdjacencySources, self).setUp()
+    people = [factories.PersonFactory() for _ in range(3)]
+    self.program = factories.ProgramFactory()
+    self.control = factories.ControlFactory(contact=people[0],
+                                            secondary_contact=people[1])
+    self.audit = factories.AuditFactory(program=self.program)
+    factories.RelationshipFactory(source=self.program,
+                                  destination=self.control)
+    db.session.add(all_models.ObjectPerson(person_id=people[1].id,
+                                           personable=self.control))
+    factories.OwnerFactory(person=people[2], ownable=self.control)
+    factories.SnapshotFactory(parent=self.audit, child_type="Control",
+                              child_id=self.control.id)
+    cad = factories.CustomAttributeDefinitionFactory(
+        definition_type="control",
+        attribute_type="Map:Person",
+    )
+    factories.CustomAttributeValueFactory(
+        attributable=self.control,
+        custom_attribute=cad,
+        attribute_value="Person",
+        attribute_object_id=people[0].id,
+    )
+    db.session.add(all_models.RiskAssessment(title="risk assessment",
+                                             program=self.program))
+    wf_factories.TaskGroupObjectFactory(object_type="Control",
+                                        object_id=self.control.id)
+    db.session.commit()
+
+  @staticmethod
+  def _source_edges():
+    """Get (object, related) pairs of all rows of the mapping tables."""
+    edges = [((rel.source_type, rel.source_id),
+              (rel.destination_type, rel.destination_id))
+             for rel in all_models.Relationship.query]
+    edges.extend((("Person", obj.person_id),
+                  (obj.personable_type, obj.personable_id))
+                 for obj in all_models.ObjectPerson.query)
+    edges.extend((("Person", obj.person_id),
+                  (obj.ownable_type, obj.ownable_id))
+                 for obj in all_models.ObjectOwner.query)
+    edges.extend(((obj.parent_type, obj.parent_id), ("Snapshot", obj.id))
+                 for obj in all_models.Snapshot.query)
+    edges.extend(((obj.attributable_type, obj.attributable_id),
+                  (obj.attribute_value, obj.attribute_object_id))
+                 for obj in all_models.CustomAttributeValue.query
+                 if obj.attribute_object_id is not None)
+    for model in (all_models.Audit, all_models.RiskAssessment):
+      edges.extend((("Program", obj.program_id), (model.__name__, obj.id))
+                   for obj in model.query)
+    edges.extend((("TaskGroup", obj.task_group_id),
+                  (obj.object_type, obj.object_id))
+                 for obj in all_models.TaskGroupObject.query)
+    for model in all_models.all_models:
+      if not issubclass(model, WithContact):
+        continue
+      for obj in model.query:
+        if obj.__class__ is not model:
+          continue
+        edges.extend((("Person", person_id), (model.__name__, obj.id))
+                     for person_id in (obj.contact_id,
+                                       obj.secondary_contact_id)
+                     if person_id is not None)
+    return edges
+
+  def assert_source_edges(self):
+    """Assert related ids of all mapped objects match the mapping tables."""
+    expected = defaultdict(set)
+    for first, second in self._source_edges():
+      for obj, related in ((first, second), (second, first)):
+        expected[(obj[0], related[0], related[1])].add(obj[1])
+    for (object_type, related_type, related_id), ids in expected.items():
+      related = adjacency.get_related_ids(object_type, related_type,
+                                          [related_id])
+      self.assertEqual({row[0] for row in related}, ids,
+                       (object_type, related_type, related_id))
+
+  def test_source_edges(self):
+    """Rows of every mapping table are in object_adjacency."""
+    vias = {row.via for row in db.session.query(
+        adjacency.ObjectAdjacency.via).distinct()}
+    self.assertTrue(vias.issuperset({
+        "relationships", "object_people", "object_owners", "snapshots",
+        "custom_attribute_values", "audits", "risk_assessments",
+        "task_group_objects", "controls",
+    }), vias)
+    self.assert_source_edges()
+
+  def test_changed_source_edges(self):
+    """Changed and deleted mapping rows are followed by object_adjacency."""
+    control = all_models.Control.query.get(self.control.id)
+    control.contact, control.secondary_contact = (control.secondary_contact,
+                                                  None)
+    audit = all_models.Audit.query.get(self.audit.id)
+    audit.program = factories.ProgramFactory()
+    db.session.delete(all_models.ObjectOwner.query.first())
+    db.session.commit()
+    self.assert_source_edges()
+
+  def test_unrelated_updates(self):
+    """Updates of columns that aren't mapped skip object_adjacency."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+      # pylint: disable=unused-argument
+      statements.append(statement)
+
+    control = all_models.Control.query.get(self.control.id)
+    control.title = "new title"
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+      db.session.flush()
+    finally:
+      event.remove(db.engine, "before_cursor_execute", record)
+    db.session.commit()
+    self.assertIn("UPDATE controls", " ".join(statements))
+    self.assertEqual([statement for statement in statements
+                      if "object_adjacency" in statement or
+                      statement.startswith("SELECT controls.id")], [])
+
+
+class TestSnapshotAdjacency(SnapshotterBaseTestCase):
+  """Relationships copied between snapshots are in object_adjacency."""
+
+  def test_copied_relationships(self):
+    """Snapshots of related objects are related to each other."""
+    program = self.create_object(all_models.Program, {"title": "program"})
+    control = self.create_object(all_models.Control, {"title": "control"})
+    objective = self.create_object(all_models.Objective,
+                                   {"title": "objective"})
+    self.create_mapping(program, control)
+    self.create_mapping(program, objective)
+    self.create_mapping(control, objective)
+
+    self.create_audit(program)
+
+    snapshots = {snapshot.child_type: snapshot.id
+                 for snapshot in all_models.Snapshot.query}
+    self.assertEqual(set(snapshots), {"Control", "Objective"})
+    related = RelationshipHelper.get_ids_related_to(
+        "Snapshot", "Snapshot", [snapshots["Control"]])
+    self.assertEqual({row[0] for row in related}, {snapshots["Objective"]})
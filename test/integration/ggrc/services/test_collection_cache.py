@@ -0,0 +1,54 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cached collection GET."""
+
+from mock import patch
+
+from ggrc import settings
+from ggrc.cache import backends
+from ggrc.models import all_models
+from ggrc.services.common import Resource
+from ggrc.services.common import get_cache_key
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+@patch.object(settings, "MEMCACHE_MECHANISM", True)
+class TestCollectionCache(TestCase):
+  """Tests for collection GET with partially cached resources."""
+
+  def setUp(self):
+    super(TestCollectionCache, self).setUp()
+    backends.get_client().flush_all()
+    self.api = Api()
+    self.controls = [factories.ControlFactory() for _ in range(3)]
+    self.ids = ",".join(str(control.id) for control in self.controls)
+
+  def tearDown(self):
+    backends.get_client().flush_all()
+    super(TestCollectionCache, self).tearDown()
+
+  def _get(self):
+    response = self.api.get_collection(all_models.Control, self.ids)
+    self.assert200(response)
+    entries = response.json["controls_collection"]["controls"]
+    return response.headers.get("X-GGRC-Cache"), entries
+
+  def test_partial_hit(self):
+    """Only missing resources are loaded and merged in match order."""
+    cache_op, entries = self._get()
+    self.assertEqual(cache_op, "Miss")
+    self.assertEqual(self._get(), ("Hit", entries))
+
+    backends.get_client().delete(get_cache_key(self.controls[1]))
+    from_database = Resource.get_resources_from_database
+    with patch.object(Resource, "get_resources_from_database",
+                      autospec=True,
+                      side_effect=from_database) as mocked_from_database:
+      cache_op, partial_entries = self._get()
+    self.assertEqual(cache_op, "Partial")
+    self.assertEqual(partial_entries, entries)
+    loaded = mocked_from_database.call_args[0][1]
+    self.assertEqual([match[0] for match in loaded], [self.controls[1].id])
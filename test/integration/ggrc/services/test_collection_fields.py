@@ -0,0 +1,48 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for collection GET with __fields."""
+
+from mock import patch
+
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestCollectionFields(TestCase):
+  """Tests for sparse fieldsets of collection GET."""
+
+  def setUp(self):
+    super(TestCollectionFields, self).setUp()
+    self.api = Api()
+    self.controls = [factories.ControlFactory() for _ in range(3)]
+
+  def _get_controls(self, query):
+    response = self.api.get_query(all_models.Control, query)
+    self.assert200(response)
+    return response.json["controls_collection"]["controls"]
+
+  def test_column_fields(self):
+    """Column fields are loaded without eager loading of full objects."""
+    with patch.object(all_models.Control, "eager_query") as eager_query:
+      controls = self._get_controls("__fields=id,title,selfLink")
+    self.assertFalse(eager_query.called)
+    self.assertEqual(
+        sorted(controls, key=lambda control: control["id"]),
+        [{"id": control.id, "title": control.title,
+          "selfLink": "/api/controls/{}".format(control.id)}
+         for control in self.controls])
+
+  def test_link_fields(self):
+    """Fields that are not columns are published as in full resources."""
+    full = {control["id"]: control for control in self._get_controls("")}
+    sparse = self._get_controls("__fields=id,owners,context")
+    self.assertEqual(len(sparse), 3)
+    for control in sparse:
+      self.assertEqual(control, {
+          "id": control["id"],
+          "owners": full[control["id"]]["owners"],
+          "context": full[control["id"]]["context"],
+      })
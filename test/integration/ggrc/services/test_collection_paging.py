@@ -0,0 +1,57 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cursor paging of collection GET."""
+
+import datetime
+
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestCursorPaging(TestCase):
+  """Tests for collection GET with __cursor argument."""
+
+  def setUp(self):
+    super(TestCursorPaging, self).setUp()
+    self.api = Api()
+    # Objects with equal updated_at are ordered by id
+    updated_at = datetime.datetime(2017, 1, 1)
+    self.controls = [factories.ControlFactory(updated_at=updated_at)
+                     for _ in range(3)]
+    self.controls += [factories.ControlFactory() for _ in range(2)]
+
+  def _get(self, query):
+    response = self.api.get_query(all_models.Control, query)
+    return response, response.json and response.json["controls_collection"]
+
+  def test_pages(self):
+    """Following next cursors returns all objects in collection order."""
+    _, collection = self._get("__stubs_only=1")
+    expected = [control["id"] for control in collection["controls"]]
+    ids = []
+    cursor = ""
+    while cursor is not None:
+      response, collection = self._get(
+          "__stubs_only=1&__page_size=2&__cursor={}".format(cursor))
+      self.assert200(response)
+      ids.extend(control["id"] for control in collection["controls"])
+      cursor = collection["paging"].get("next_cursor")
+      self.assertNotIn("total", collection["paging"])
+    self.assertEqual(ids, expected)
+    self.assertEqual(len(ids), 5)
+
+  def test_total(self):
+    """Total count is returned only on request."""
+    _, collection = self._get("__page_size=2&__cursor=&__total=1")
+    self.assertEqual(collection["paging"]["total"], 5)
+    self.assertEqual(len(collection["controls"]), 2)
+
+  def test_invalid_cursor(self):
+    """Invalid cursor and cursor with __sort are rejected."""
+    response, _ = self._get("__cursor=invalid")
+    self.assert400(response)
+    response, _ = self._get("__cursor=&__sort=title")
+    self.assert400(response)
@@ -0,0 +1,44 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for streamed collection GET."""
+
+from ggrc.models import all_models
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestCollectionStream(TestCase):
+  """Tests for streamed collection GET."""
+
+  def setUp(self):
+    super(TestCollectionStream, self).setUp()
+    self.api = Api()
+    self.controls = [factories.ControlFactory() for _ in range(3)]
+
+  def test_stream(self):
+    """Streamed collection is the same as the regular one."""
+    for query in ("__stubs_only=1", "__fields=id,title", ""):
+      expected = self.api.get_query(all_models.Control, query)
+      response = self.api.get_query(all_models.Control,
+                                    query + "&__stream=1")
+      self.assert200(response)
+      self.assertEqual(response.json["controls_collection"]["controls"],
+                       expected.json["controls_collection"]["controls"])
+
+  def test_stream_etag(self):
+    """Streamed collection ETag changes when the collection changes."""
+    response = self.api.get_query(all_models.Control, "__stream=1")
+    collection_etag = response.headers["Etag"]
+    response = self.api.data_to_json(self.api.client.get(
+        "/api/controls?__stream=1",
+        headers={"If-None-Match": collection_etag}))
+    self.assertStatus(response, 304)
+    factories.ControlFactory()
+    response = self.api.data_to_json(self.api.client.get(
+        "/api/controls?__stream=1",
+        headers={"If-None-Match": collection_etag}))
+    self.assert200(response)
+    self.assertEqual(len(response.json["controls_collection"]["controls"]),
+                     4)
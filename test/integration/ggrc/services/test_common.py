@@ -8,13 +8,14 @@ from wsgiref.handlers import format_date_time
 from sqlalchemy import and_
 
 from integration.ggrc.services import TestCase
+from integration.ggrc.services import ServicesTestMockModel
 from integration.ggrc.api_helper import Api
 from integration.ggrc.generator import ObjectGenerator
 from ggrc.models import all_models
 from ggrc import db
 
 
-COLLECTION_ALLOWED = ["HEAD", "GET", "POST", "OPTIONS"]
+COLLECTION_ALLOWED = ["HEAD", "GET", "POST", "PUT", "DELETE", "OPTIONS"]
 RESOURCE_ALLOWED = ["HEAD", "GET", "PUT", "DELETE", "OPTIONS"]
 
 
@@ -64,15 +65,99 @@ class TestServices(TestCase):
     response = self.client.get(self.mock_url("foo"), headers=self.headers())
     self.assert404(response)
 
+  def _bulk_item(self, mock, **attrs):
+    """Get a collection PUT/DELETE item with preconditions of mock."""
+    response = self.client.get(self.mock_url(mock.id), headers=self.headers())
+    self.assert200(response)
+    obj = response.json["services_test_mock_model"]
+    obj.update(attrs)
+    return {
+        "services_test_mock_model": obj,
+        "If-Match": response.headers["Etag"],
+        "If-Unmodified-Since": response.headers["Last-Modified"],
+    }
+
+  def _bulk_request(self, method, body):
+    return self.client.open(
+        self.mock_url(),
+        method=method,
+        data=json.dumps(body),
+        headers=self.headers(),
+        content_type="application/json",
+    )
+
   def test_collection_put(self):
-    self.assertAllow(
-        self.client.put(self.mock_url(), headers=self.headers()),
-        COLLECTION_ALLOWED)
+    """Collection PUT updates all objects in a single event."""
+    mocks = [self.mock_model(foo="buzz") for _ in range(3)]
+    ids = [mock.id for mock in mocks]
+    body = [self._bulk_item(mock, foo="baz") for mock in mocks]
+    response = self._bulk_request("PUT", body)
+    self.assert200(response)
+    self.assertEqual([status for status, _ in response.json],
+                     [200, 200, 200])
+    self.assertEqual(
+        [obj["services_test_mock_model"]["foo"] for _, obj in response.json],
+        ["baz", "baz", "baz"])
+    db.session.expire_all()
+    self.assertEqual(
+        {mock.foo for mock in ServicesTestMockModel.query.filter(
+            ServicesTestMockModel.id.in_(ids))},
+        {"baz"})
+    self.assertEqual(
+        all_models.Event.query.filter_by(action="BULK").count(), 1)
+
+  def test_collection_put_conflict(self):
+    """Collection PUT changes nothing if any item fails preconditions."""
+    mocks = [self.mock_model(foo="buzz") for _ in range(2)]
+    body = [self._bulk_item(mock, foo="baz") for mock in mocks]
+    body[1]["If-Match"] = "Definitely invalid etag"
+    response = self._bulk_request("PUT", body)
+    self.assertStatus(response, 409)
+    self.assertEqual([status for status, _ in response.json], [424, 409])
+    db.session.expire_all()
+    self.assertEqual(
+        {mock.foo for mock in ServicesTestMockModel.query}, {"buzz"})
+
+  def test_collection_put_not_found(self):
+    """Collection PUT of missing objects returns 404 items."""
+    mock = self.mock_model(foo="buzz")
+    item = self._bulk_item(mock)
+    item["services_test_mock_model"]["id"] = mock.id + 1
+    response = self._bulk_request("PUT", [item])
+    self.assert404(response)
+
+  def test_collection_put_bad_request(self):
+    """Collection PUT requires a list of objects with ids."""
+    self.assertStatus(
+        self.client.put(self.mock_url(), headers=self.headers()), 415)
+    self.assert400(self._bulk_request("PUT", {"foo": "bar"}))
+    self.assert400(self._bulk_request(
+        "PUT", [{"services_test_mock_model": {"foo": "bar"}}]))
 
   def test_collection_delete(self):
-    self.assertAllow(
-        self.client.delete(self.mock_url(), headers=self.headers()),
-        COLLECTION_ALLOWED)
+    """Collection DELETE removes all objects in a single event."""
+    mocks = [self.mock_model(foo="buzz") for _ in range(3)]
+    kept = self.mock_model(foo="kept")
+    body = [self._bulk_item(mock) for mock in mocks]
+    response = self._bulk_request("DELETE", body)
+    self.assert200(response)
+    self.assertEqual([status for status, _ in response.json],
+                     [200, 200, 200])
+    db.session.expire_all()
+    self.assertEqual([mock.id for mock in ServicesTestMockModel.query],
+                     [kept.id])
+    self.assertEqual(
+        all_models.Event.query.filter_by(action="BULK").count(), 1)
+
+  def test_collection_delete_428(self):
+    """Collection DELETE requires preconditions for every item."""
+    mocks = [self.mock_model(foo="buzz") for _ in range(2)]
+    body = [self._bulk_item(mock) for mock in mocks]
+    del body[0]["If-Unmodified-Since"]
+    response = self._bulk_request("DELETE", body)
+    self.assertStatus(response, 428)
+    self.assertEqual([status for status, _ in response.json], [428, 424])
+    self.assertEqual(ServicesTestMockModel.query.count(), 2)
 
   def _prepare_model_for_put(self, foo_param="buzz"):
     """Common object initializing sequence."""
@@ -281,6 +366,41 @@ class TestServices(TestCase):
     self.assertStatus(response, 304)
     self.assertIn("Etag", response.headers)
 
+  def test_collection_get_if_none_match(self):
+    """Collection ETag changes when the collection changes."""
+    self.mock_model(foo="baz")
+    response = self.client.get(self.mock_url(), headers=self.headers())
+    self.assert200(response)
+    collection_etag = response.headers["Etag"]
+    response = self.client.get(
+        self.mock_url(),
+        headers=self.headers(("If-None-Match", collection_etag)))
+    self.assertStatus(response, 304)
+    self.assertEqual(response.headers["Etag"], collection_etag)
+
+    self.mock_model(foo="bar")
+    response = self.client.get(
+        self.mock_url(),
+        headers=self.headers(("If-None-Match", collection_etag)))
+    self.assert200(response)
+    self.assertNotEqual(response.headers["Etag"], collection_etag)
+
+  def test_paged_collection_get_if_none_match(self):
+    """Collection ETag of a page only changes with the page."""
+    for foo in ("a", "b", "c"):
+      self.mock_model(foo=foo)
+    url = self.mock_url() + "?__page=1&__page_size=2"
+    response = self.client.get(url, headers=self.headers())
+    self.assert200(response)
+    page_etag = response.headers["Etag"]
+    response = self.client.get(self.mock_url() + "?__page=2&__page_size=2",
+                               headers=self.headers())
+    self.assertNotEqual(response.headers["Etag"], page_etag)
+    response = self.client.get(
+        url, headers=self.headers(("If-None-Match", page_etag)))
+    self.assertStatus(response, 304)
+    self.assertEqual(response.headers["Etag"], page_etag)
+
 
 class TestFilteringByRequest(TestCase):
   """Test filter query by request"""
@@ -0,0 +1,73 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cached filter clause templates of /query expressions."""
+
+from flask import json
+from mock import patch
+
+from ggrc import settings
+from ggrc.cache import backends
+from ggrc.converters import custom_operators
+from ggrc.converters import expression_templates
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc.services.test_query.test_basic import (
+    BaseQueryAPITestCase
+)
+
+
+class TestExpressionTemplates(BaseQueryAPITestCase):
+  """Expressions of the same shape reuse a clause with their own literals."""
+
+  def setUp(self):
+    TestCase.clear_data()
+    super(TestExpressionTemplates, self).setUp()
+    patcher = patch.object(settings, "QUERY_CACHE_SIZE", 0)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    # tests run in a single process, the local backend is enough
+    patcher = patch.object(backends, "is_shared", return_value=True)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    expression_templates.clear()
+    self.programs = [factories.ProgramFactory() for _ in range(2)]
+    self.controls = [factories.ControlFactory() for _ in range(3)]
+    factories.RelationshipFactory(source=self.programs[0],
+                                  destination=self.controls[0])
+    for control in self.controls[1:]:
+      factories.RelationshipFactory(source=self.programs[1],
+                                    destination=control)
+
+  def _ids(self, expression):
+    """Get ids of Controls matching the expression."""
+    response = self._post([{
+        "object_name": "Control",
+        "type": "ids",
+        "filters": {"expression": expression},
+    }])
+    self.assert200(response)
+    return sorted(json.loads(response.data)[0]["ids"])
+
+  def test_relevant(self):
+    """Relevant filters to different objects are built once."""
+    with patch.object(custom_operators, "build_expression",
+                      side_effect=custom_operators.build_expression) as build:
+      for program, controls in ((self.programs[0], self.controls[:1]),
+                                (self.programs[1], self.controls[1:])):
+        self.assertEqual(self._ids({
+            "object_name": "Program",
+            "op": {"name": "relevant"},
+            "ids": [program.id],
+        }), [control.id for control in controls])
+    self.assertEqual(build.call_count, 1)
+
+  def test_comparisons(self):
+    """Templates of comparisons get the compared literals."""
+    for control in self.controls:
+      self.assertEqual(self._ids({
+          "left": {"left": "title", "op": {"name": "~"},
+                   "right": control.title},
+          "op": {"name": "AND"},
+          "right": {"left": "id", "op": {"name": "="}, "right": control.id},
+      }), [control.id])
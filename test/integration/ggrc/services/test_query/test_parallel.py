@@ -0,0 +1,128 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for running independent object queries in parallel."""
+
+from flask import json
+from mock import patch
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models import all_models
+from ggrc.services import query_cache
+from ggrc.services.query_helper import QueryAPIQueryHelper
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.generator import ObjectGenerator
+from integration.ggrc.models import factories
+from integration.ggrc.services.test_query.test_basic import (
+    BaseQueryAPITestCase
+)
+
+
+class TestParallelQueries(BaseQueryAPITestCase):
+  """Independent "ids" and "count" queries run in worker threads."""
+
+  def setUp(self):
+    TestCase.clear_data()
+    super(TestParallelQueries, self).setUp()
+    patcher = patch.object(settings, "QUERY_CACHE_SIZE", 0)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    self.program = factories.ProgramFactory()
+    self.controls = [factories.ControlFactory() for _ in range(3)]
+    for control in self.controls[:2]:
+      factories.RelationshipFactory(source=self.program, destination=control)
+
+  def _queries(self):
+    """Get a mix of independent and dependent object queries."""
+    relevant = {
+        "object_name": "Program",
+        "op": {"name": "relevant"},
+        "ids": [self.program.id],
+    }
+    return [
+        {"object_name": "Control", "type": "count",
+         "filters": {"expression": relevant}},
+        {"object_name": "Program", "type": "ids",
+         "filters": {"expression": {"left": "title", "op": {"name": "="},
+                                    "right": self.program.title}}},
+        {"object_name": "Control", "type": "values",
+         "filters": {"expression": relevant}},
+        {"object_name": "Control", "type": "ids",
+         "filters": {"expression": {"object_name": "__previous__",
+                                    "op": {"name": "relevant"},
+                                    "ids": [1]}}},
+        {"object_name": "Control", "type": "ids",
+         "filters": {"expression": {"left": "title", "op": {"name": "~"},
+                                    "right": self.controls[2].title}}},
+    ]
+
+  def test_independent_queries(self):
+    """Only independent "ids" and "count" queries run in parallel."""
+    queries = self._queries()
+    helper = QueryAPIQueryHelper(queries)
+    with patch.object(settings, "QUERY_API_THREADS", 4):
+      self.assertEqual(helper._get_parallel_queries(),
+                       [queries[0], queries[1], queries[4]])
+    with patch.object(settings, "QUERY_API_THREADS", 1):
+      self.assertEqual(helper._get_parallel_queries(), [])
+
+  def test_single_query(self):
+    """A single query runs in a thread only to be cached."""
+    queries = self._queries()[:1]
+    helper = QueryAPIQueryHelper(queries)
+    with patch.object(settings, "QUERY_API_THREADS", 4):
+      self.assertEqual(helper._get_parallel_queries(), [])
+      with patch.object(query_cache, "is_enabled", return_value=True):
+        self.assertEqual(helper._get_parallel_queries(), queries)
+    with patch.object(settings, "QUERY_API_THREADS", 1):
+      with patch.object(query_cache, "is_enabled", return_value=True):
+        self.assertEqual(helper._get_parallel_queries(), [])
+
+  def test_same_results(self):
+    """Parallel and serial evaluation return the same results in order."""
+    results = {}
+    for threads in (1, 4):
+      with patch.object(settings, "QUERY_API_THREADS", threads):
+        response = self._post(self._queries())
+      self.assert200(response)
+      results[threads] = json.loads(response.data)
+    self.assertEqual(results[1], results[4])
+    parallel = results[4]
+    self.assertEqual(parallel[0]["count"], 2)
+    self.assertEqual(parallel[1]["ids"], [self.program.id])
+    self.assertEqual(sorted(value["id"] for value in parallel[2]["values"]),
+                     sorted(control.id for control in self.controls[:2]))
+    self.assertEqual(sorted(parallel[3]["ids"]),
+                     sorted(control.id for control in self.controls[:2]))
+    self.assertEqual(parallel[4]["ids"], [self.controls[2].id])
+
+  def test_current_user_permissions(self):
+    """Parallel queries are filtered by permissions of the current user."""
+    _, creator = ObjectGenerator().generate_person(user_role="Creator")
+    db.session.add(all_models.ObjectOwner(
+        person_id=creator.id,
+        ownable_id=self.controls[0].id,
+        ownable_type="Control",
+    ))
+    db.session.commit()
+    api = Api()
+    api.set_user(creator)
+    queries = self._queries()
+    results = {}
+    for threads in (1, 4):
+      with patch.object(settings, "QUERY_API_THREADS", threads):
+        self.assertEqual(
+            QueryAPIQueryHelper(queries)._get_parallel_queries(),
+            [] if threads == 1 else [queries[0], queries[1], queries[4]])
+        response = api.client.post(
+            "/query", data=json.dumps(queries),
+            headers={"Content-Type": "application/json"})
+      self.assert200(response)
+      results[threads] = json.loads(response.data)
+    self.assertEqual(results[1], results[4])
+    parallel = results[4]
+    self.assertEqual(parallel[0]["count"], 1)
+    self.assertEqual(parallel[1]["ids"], [])
+    self.assertEqual(parallel[4]["ids"], [])
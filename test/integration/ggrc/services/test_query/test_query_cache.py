@@ -0,0 +1,127 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the cache of /query "ids" and "count" results."""
+
+from flask import json
+from mock import patch
+
+from ggrc import fulltext
+from ggrc.cache import backends
+from ggrc.converters import custom_operators
+from ggrc.fulltext.recordbuilder import Record
+from ggrc.services import query_cache
+from ggrc.services.query_helper import QueryAPIQueryHelper
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc.services.test_query.test_basic import (
+    BaseQueryAPITestCase
+)
+
+
+class TestQueryCache(BaseQueryAPITestCase):
+  """Results are reused while the tables they were read from don't change."""
+
+  def setUp(self):
+    TestCase.clear_data()
+    super(TestQueryCache, self).setUp()
+    # tests run in a single process, the local backend is enough
+    patcher = patch.object(backends, "is_shared", return_value=True)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    query_cache.clear()
+    self.program = factories.ProgramFactory()
+    self.control = factories.ControlFactory()
+    factories.RelationshipFactory(source=self.program,
+                                  destination=self.control)
+
+  def _count(self):
+    """Get the number of Controls relevant to the program."""
+    response = self._post([{
+        "object_name": "Control",
+        "type": "count",
+        "filters": {"expression": {
+            "object_name": "Program",
+            "op": {"name": "relevant"},
+            "ids": [self.program.id],
+        }},
+    }])
+    self.assert200(response)
+    return json.loads(response.data)[0]["count"]
+
+  def test_cached_count(self):
+    """The same count is computed once."""
+    with patch.object(QueryAPIQueryHelper, "_get_ids", autospec=True,
+                      side_effect=QueryAPIQueryHelper._get_ids) as get_ids:
+      self.assertEqual(self._count(), 1)
+      self.assertEqual(self._count(), 1)
+    self.assertEqual(get_ids.call_count, 1)
+
+  def test_changed_tables(self):
+    """Changes of the read tables make cached counts invalid."""
+    self.assertEqual(self._count(), 1)
+    factories.RelationshipFactory(source=self.program,
+                                  destination=factories.ControlFactory())
+    self.assertEqual(self._count(), 2)
+
+  def test_shared_expression(self):
+    """Queries reusing a shared sub-expression depend on its tables."""
+    relevant = {
+        "object_name": "Program",
+        "op": {"name": "relevant"},
+        "ids": [self.program.id],
+    }
+    queries = [
+        {"object_name": "Control", "type": "count",
+         "filters": {"expression": relevant}},
+        {"object_name": "Control", "type": "ids",
+         "filters": {"expression": {
+             "left": relevant,
+             "op": {"name": "AND"},
+             "right": {"left": "title", "op": {"name": "~"}, "right": ""},
+         }}},
+    ]
+
+    def counts():
+      response = self._post(queries)
+      self.assert200(response)
+      return [result["count"] for result in json.loads(response.data)]
+
+    self.assertEqual(counts(), [1, 1])
+    factories.RelationshipFactory(source=self.program,
+                                  destination=factories.ControlFactory())
+    self.assertEqual(counts(), [2, 2])
+
+  def _count_expression(self, expression):
+    """Get the number of Controls matching the filter expression."""
+    response = self._post([{
+        "object_name": "Control",
+        "type": "count",
+        "filters": {"expression": expression},
+    }])
+    self.assert200(response)
+    return json.loads(response.data)[0]["count"]
+
+  def test_fulltext_records(self):
+    """Full text index writes make cached text search counts invalid."""
+    expression = {"op": {"name": "text_search"}, "text": "unique words"}
+    self.assertEqual(self._count_expression(expression), 0)
+    fulltext.get_indexer().update_records([Record(
+        self.control.id, "Control", None,
+        {"title": {"": "some unique words"}},
+    )])
+    self.assertEqual(self._count_expression(expression), 1)
+
+  def test_non_sql_indexer(self):
+    """Results matched by an indexer without SQL tables are not cached."""
+    expression = {"left": "title", "op": {"name": "~"}, "right": "title"}
+    patcher = patch.object(custom_operators, "is_sql_like",
+                           return_value=False)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    with patch.object(custom_operators, "get_indexer") as get_indexer:
+      matching_keys = get_indexer.return_value.get_matching_keys
+      matching_keys.return_value = [self.control.id]
+      self.assertEqual(self._count_expression(expression), 1)
+      matching_keys.return_value = []
+      self.assertEqual(self._count_expression(expression), 0)
@@ -0,0 +1,64 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for sub-expressions shared between queries of a /query request."""
+
+from flask import json
+from mock import Mock
+from mock import patch
+
+from ggrc.converters import custom_operators
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+from integration.ggrc.services.test_query.test_basic import (
+    BaseQueryAPITestCase
+)
+
+
+class TestSharedExpressions(BaseQueryAPITestCase):
+  """Shared sub-expressions are evaluated once per request."""
+
+  def setUp(self):
+    TestCase.clear_data()
+    super(TestSharedExpressions, self).setUp()
+    self.program = factories.ProgramFactory()
+    self.controls = [factories.ControlFactory() for _ in range(3)]
+    for control in self.controls[:2]:
+      factories.RelationshipFactory(source=self.program, destination=control)
+
+  def _relevant_query(self, type_, title=None):
+    """Get a Control query relevant to the program."""
+    relevant = {
+        "object_name": "Program",
+        "op": {"name": "relevant"},
+        "ids": [self.program.id],
+    }
+    expression = relevant
+    if title:
+      expression = {
+          "left": relevant,
+          "op": {"name": "AND"},
+          "right": {"left": "title", "op": {"name": "="}, "right": title},
+      }
+    return {
+        "object_name": "Control",
+        "type": type_,
+        "filters": {"expression": expression},
+    }
+
+  def test_shared_relevant(self):
+    """Relevant filter used by all queries is built once."""
+    relevant = Mock(side_effect=custom_operators.relevant)
+    with patch.dict(custom_operators.OPS, {"relevant": relevant}):
+      response = self._post([
+          self._relevant_query("ids"),
+          self._relevant_query("count"),
+          self._relevant_query("ids", title=self.controls[0].title),
+      ])
+    self.assert200(response)
+    results = json.loads(response.data)
+    expected_ids = sorted(control.id for control in self.controls[:2])
+    self.assertEqual(sorted(results[0]["ids"]), expected_ids)
+    self.assertEqual(results[1]["count"], 2)
+    self.assertEqual(results[2]["ids"], [self.controls[0].id])
+    self.assertEqual(relevant.call_count, 1)
@@ -70,3 +70,29 @@ class TestResource(TestCase):
     entries = self.search("Control", relevant_objects=ids)
     self.assertEqual({entry["id"] for entry in entries},
                      {self.objects[2].id})
+
+  def test_search_pages(self):
+    """Test search with limit and offset returns consecutive pages."""
+    all_ids = [entry["id"] for entry in self.search("Control")]
+    pages = [self.search("Control", limit=2, offset=offset)
+             for offset in (0, 2, 4)]
+    self.assertEqual([len(page) for page in pages], [2, 2, 1])
+    self.assertEqual([entry["id"] for page in pages for entry in page],
+                     all_ids)
+
+  def test_search_relevant_pages(self):
+    """Test pagination is applied after 'relevant to' filter."""
+    relevant_objects = "Control:{}".format(self.objects[2].id)
+    entries = self.search("Control", relevant_objects=relevant_objects,
+                          limit=2, offset=1)
+    self.assertEqual(len(entries), 2)
+    self.assertTrue({entry["id"] for entry in entries}.issubset(
+        {self.objects[i].id for i in [0, 3, 4]}))
+
+  def test_search_invalid_limit(self):
+    """Test search with invalid or negative limit and offset fails."""
+    res, _ = self.api.search("Control", limit="x")
+    self.assert400(res)
+    for params in ({"limit": -1}, {"offset": -2}):
+      res, _ = self.api.search("Control", **params)
+      self.assert400(res)
@@ -0,0 +1,100 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the cache of objects referenced in POSTed JSON."""
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.services.stub_cache import stub_cache
+from integration.ggrc import TestCase
+from integration.ggrc.api_helper import Api
+from integration.ggrc.models import factories
+
+
+class TestStubCache(TestCase):
+  """Tests for loading referenced objects through the stub cache."""
+
+  def setUp(self):
+    super(TestStubCache, self).setUp()
+    stub_cache.invalidate()
+    self.program = factories.ProgramFactory(title="program")
+    self.program_id = self.program.id
+
+  @contextmanager
+  def assert_statements(self, count):
+    """Assert the number of SQL statements executed in the block."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+      # pylint: disable=unused-argument
+      statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+      yield
+    finally:
+      event.remove(db.engine, "before_cursor_execute", record)
+    self.assertEqual(len(statements), count, statements)
+
+  def get_program(self):
+    """Get the program through the stub cache in a clean session."""
+    db.session.expunge_all()
+    objects = stub_cache.get_objects(all_models.Program, [self.program_id])
+    return objects[self.program_id]
+
+  def test_cached_objects(self):
+    """Cached objects are validated without loading full rows."""
+    self.get_program()
+    with self.assert_statements(1):
+      program = self.get_program()
+    self.assertIn(program, db.session)
+    self.assertEqual(program.title, "program")
+    self.assertNotIn(program, db.session.dirty)
+
+  def test_missing_objects(self):
+    """Objects missing in the cache are loaded with a single query."""
+    programs = [factories.ProgramFactory() for _ in range(4)]
+    ids = [self.program_id] + [program.id for program in programs]
+    db.session.expunge_all()
+    with self.assert_statements(1):
+      objects = stub_cache.get_objects(all_models.Program, ids)
+      titles = {id_: objects[id_].title for id_ in ids}
+    self.assertEqual(titles[self.program_id], "program")
+    with self.assert_statements(1):
+      self.assertEqual(
+          sorted(stub_cache.get_objects(all_models.Program, ids)), sorted(ids))
+
+  def test_updated_objects(self):
+    """Objects updated after caching are loaded again."""
+    program = self.get_program()
+    program.title = "new title"
+    db.session.commit()
+    self.assertEqual(self.get_program().title, "new title")
+
+  def test_deleted_objects(self):
+    """Deleted objects are not returned from the cache."""
+    self.get_program()
+    db.session.delete(db.session.merge(self.program))
+    db.session.commit()
+    self.assertEqual(
+        stub_cache.get_objects(all_models.Program, [self.program_id]), {})
+
+  def test_changes_of_other_workers(self):
+    """Changes logged by other workers are detected in the same second."""
+    # pylint: disable=protected-access
+    self.get_program()
+    key = ("Program", self.program_id)
+    entry = stub_cache._cache[key]
+    program = all_models.Program.query.get(self.program_id)
+    self.assert200(Api().put(program, {"title": "new title"}))
+    # the cache of another worker still has the state with the same updated_at
+    programs = all_models.Program.__table__
+    db.session.execute(programs.update().where(
+        programs.c.id == self.program_id).values(updated_at=entry[0][0]))
+    db.session.commit()
+    stub_cache._cache[key] = entry
+    self.assertEqual(self.get_program().title, "new title")
@@ -0,0 +1,173 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cache backend clients."""
+
+import itertools
+import SocketServer
+import threading
+import unittest
+
+from ggrc.cache import backends
+
+
+class FakeMemcachedHandler(SocketServer.StreamRequestHandler):
+  """Handler of the memcached text protocol subset used by the client."""
+
+  def _store(self, command, key, flags, data, cas_id):
+    # pylint: disable=too-many-arguments
+    store = self.server.store
+    if command == "add" and key in store:
+      return "NOT_STORED"
+    if command == "cas":
+      if key not in store:
+        return "NOT_FOUND"
+      if store[key][2] != cas_id:
+        return "EXISTS"
+    store[key] = (flags, data, str(next(self.server.versions)))
+    return "STORED"
+
+  def handle(self):
+    store = self.server.store
+    while True:
+      line = self.rfile.readline()
+      if not line:
+        return
+      parts = line.split()
+      command = parts[0]
+      if command in ("get", "gets"):
+        for key in parts[1:]:
+          if key in store:
+            flags, data, cas_id = store[key]
+            header = "VALUE {} {} {}".format(key, flags, len(data))
+            if command == "gets":
+              header += " " + cas_id
+            self.wfile.write(header + "\r\n" + data + "\r\n")
+        response = "END"
+      elif command in ("set", "add", "cas"):
+        data = self.rfile.read(int(parts[4]) + 2)[:-2]
+        cas_id = parts[5] if command == "cas" else None
+        response = self._store(command, parts[1], parts[2], data, cas_id)
+      elif command == "delete":
+        response = "DELETED" if store.pop(parts[1], None) else "NOT_FOUND"
+      elif command == "flush_all":
+        store.clear()
+        response = "OK"
+      else:
+        response = "ERROR"
+      self.wfile.write(response + "\r\n")
+      self.wfile.flush()
+
+
+class FakeMemcachedServer(SocketServer.ThreadingTCPServer):
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__(self):
+    SocketServer.ThreadingTCPServer.__init__(
+        self, ("127.0.0.1", 0), FakeMemcachedHandler)
+    self.store = {}
+    self.versions = itertools.count(1)
+
+
+class ClientTestMixin(object):
+  """Common tests of memcache.Client compatible behavior."""
+
+  client = None
+
+  def test_get_set(self):
+    """Stored values are returned as copies."""
+    value = {"id": 1, "items": [1, 2]}
+    self.assertTrue(self.client.set("key", value))
+    value["items"].append(3)
+    self.assertEqual(self.client.get("key"), {"id": 1, "items": [1, 2]})
+    self.assertIsNone(self.client.get("missing"))
+
+  def test_add(self):
+    """Add doesn't overwrite existing values."""
+    self.assertTrue(self.client.add("key", 1))
+    self.assertFalse(self.client.add("key", 2))
+    self.assertEqual(self.client.get("key"), 1)
+    self.assertEqual(self.client.add_multi({"key": 3, "other": 4}), ["key"])
+
+  def test_cas(self):
+    """Cas succeeds only if the value didn't change since gets."""
+    self.client.set("key", 1)
+    self.assertFalse(self.client.cas("key", 2))
+    self.assertEqual(self.client.gets("key"), 1)
+    self.assertTrue(self.client.cas("key", 2))
+    self.assertEqual(self.client.get_multi(["key"], for_cas=True), {"key": 2})
+    self.client.set("key", 3)
+    self.assertEqual(self.client.cas_multi({"key": 4}), ["key"])
+    self.assertEqual(self.client.get("key"), 3)
+
+  def test_delete(self):
+    """Delete reports missing items."""
+    self.client.set_multi({"a": 1, "b": 2, "c": 3})
+    self.assertEqual(self.client.delete("a"), backends.DELETE_SUCCESSFUL)
+    self.assertEqual(self.client.delete("a"), backends.DELETE_ITEM_MISSING)
+    self.assertTrue(self.client.delete_multi(["a", "b"]))
+    self.assertEqual(self.client.get_multi(["a", "b", "c"]), {"c": 3})
+    self.assertTrue(self.client.flush_all())
+    self.assertEqual(self.client.get_multi(["c"]), {})
+
+
+class TestLocalClient(ClientTestMixin, unittest.TestCase):
+  """Tests for in-process cache client."""
+
+  def setUp(self):
+    self.now = 1000
+    self.client = backends.LocalClient(3, timer=lambda: self.now)
+
+  def test_expiration(self):
+    """Values expire after their expiration time."""
+    self.client.set("key", 1, 10)
+    self.now += 9
+    self.assertEqual(self.client.get("key"), 1)
+    self.now += 1
+    self.assertIsNone(self.client.get("key"))
+    self.assertTrue(self.client.add("key", 2))
+
+  def test_max_size(self):
+    """Least recently used values are evicted."""
+    for key, value in (("a", 1), ("b", 2), ("c", 3)):
+      self.client.set(key, value)
+    self.client.get("a")
+    self.client.set("d", 4)
+    self.assertEqual(self.client.get_multi(["a", "b", "c", "d"]),
+                     {"a": 1, "c": 3, "d": 4})
+
+
+class TestMemcachedClient(ClientTestMixin, unittest.TestCase):
+  """Tests for memcached protocol client against a fake server."""
+
+  def setUp(self):
+    self.server = FakeMemcachedServer()
+    thread = threading.Thread(target=self.server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    self.client = backends.MemcachedClient(
+        ["{}:{}".format(*self.server.server_address)])
+
+  def tearDown(self):
+    self.client.disconnect_all()
+    self.server.shutdown()
+    self.server.server_close()
+
+  def test_long_keys(self):
+    """Keys that are invalid for memcached are hashed."""
+    key = "collection:controls " + "x" * 300
+    self.client.set(key, "value")
+    self.assertEqual(self.client.get_multi([key]), {key: "value"})
+
+  def test_server_down(self):
+    """Network failures are reported as cache misses and failures."""
+    self.tearDown()
+    self.client = backends.MemcachedClient(
+        ["{}:{}".format(*self.server.server_address)])
+    self.assertIsNone(self.client.get("key"))
+    self.assertFalse(self.client.set("key", 1))
+    self.assertEqual(self.client.delete("key"),
+                     backends.DELETE_NETWORK_FAILURE)
+    self.assertFalse(self.client.delete_multi(["key"]))
+    self.setUp()
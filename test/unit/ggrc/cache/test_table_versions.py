@@ -0,0 +1,69 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for data versions of tables."""
+
+import unittest
+
+import sqlalchemy as sa
+from mock import patch
+from sqlalchemy import orm
+
+from ggrc.cache import backends
+from ggrc.cache import table_versions
+
+
+metadata = sa.MetaData()  # pylint: disable=invalid-name
+items = sa.Table(  # pylint: disable=invalid-name
+    "items", metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("title", sa.String),
+)
+
+
+class TestTableVersions(unittest.TestCase):
+  """Versions are bumped by changes of table rows."""
+
+  def setUp(self):
+    patcher = patch.object(backends, "_client", backends.LocalClient())
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    table_versions.init_session_hooks(orm.Session)
+    self.engine = sa.create_engine("sqlite://")
+    metadata.create_all(self.engine)
+    self.session = orm.sessionmaker(bind=self.engine)()
+    # Flask-SQLAlchemy listens to commits of all sessions
+    self.session._model_changes = {}  # pylint: disable=protected-access
+
+  def get_version(self):
+    return table_versions.get_versions(["items"])["items"]
+
+  def test_stable_versions(self):
+    """Versions don't change without writes."""
+    version = self.get_version()
+    self.session.execute(items.select()).fetchall()
+    self.session.commit()
+    self.assertEqual(self.get_version(), version)
+
+  def test_session_changes(self):
+    """Changes are bumped when the session commits them."""
+    version = self.get_version()
+    self.session.execute(items.insert().values(title="item"))
+    self.assertEqual(self.get_version(), version)
+    self.session.commit()
+    self.assertNotEqual(self.get_version(), version)
+
+  def test_autocommit_changes(self):
+    """Statements outside of transactions bump versions right away."""
+    version = self.get_version()
+    self.engine.execute(items.delete())
+    self.assertNotEqual(self.get_version(), version)
+
+  def test_untracked_changes(self):
+    """Tables added as changed are bumped with the transaction."""
+    version = self.get_version()
+    self.session.execute("DELETE FROM items")
+    table_versions.add_changed_tables(["items"])
+    self.assertEqual(self.get_version(), version)
+    self.session.commit()
+    self.assertNotEqual(self.get_version(), version)
@@ -0,0 +1,122 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+"""Unit tests for in-process inverted index."""
+
+import cPickle
+import unittest
+from collections import namedtuple
+
+from mock import MagicMock, patch
+
+from ggrc.fulltext import inverted
+
+
+Record = namedtuple("Record", ["key", "type", "context_id", "properties"])
+
+
+class TestInvertedIndex(unittest.TestCase):
+  """Tests for InvertedIndex class."""
+
+  def setUp(self):
+    self.index = inverted.InvertedIndex()
+    self.index.add("Control", 1, None, "title",
+                   inverted.tokenize(u"Access control policy"))
+    self.index.add("Control", 1, 5, "description",
+                   inverted.tokenize(u"Second line"))
+    self.index.add("Market", 2, 5, "title",
+                   inverted.tokenize(u"Policy market"))
+
+  def matching(self, terms):
+    return sorted(self.index.document(doc_id)[:2] for doc_id in
+                  self.index.match(inverted.tokenize(terms)))
+
+  def test_tokenize(self):
+    self.assertEqual(inverted.tokenize(u"Foo, bar-baz!"),
+                     {u"foo", u"bar", u"baz"})
+    self.assertEqual(inverted.tokenize(None), set())
+
+  def test_match_substring(self):
+    self.assertEqual(self.matching(u"POLIC"),
+                     [("Control", 1), ("Market", 2)])
+    self.assertEqual(self.matching(u"ess cont"), [("Control", 1)])
+    self.assertEqual(self.matching(u"missing"), [])
+
+  def test_match_short_terms(self):
+    self.index.add("Market", 3, None, "title", inverted.tokenize(u"A b2 c"))
+    self.assertEqual(self.matching(u"b"), [("Market", 3)])
+    self.assertEqual(self.matching(u"ma"), [("Market", 2)])
+    self.assertEqual(self.matching(u"c"), [("Control", 1), ("Control", 1),
+                                           ("Market", 2), ("Market", 3)])
+
+  def test_document(self):
+    doc_ids = self.index.match({u"access"})
+    self.assertEqual([self.index.document(i) for i in doc_ids],
+                     [("Control", 1, None, "title")])
+
+  def test_remove_properties(self):
+    self.index.remove("Control", 1, {"title"})
+    self.assertEqual(self.matching(u"policy"), [("Market", 2)])
+    self.assertEqual(self.matching(u"second"), [("Control", 1)])
+    self.index.remove("Control", 1)
+    self.assertEqual(self.matching(u"second"), [])
+    self.assertEqual(len(self.index), 1)
+
+  def test_remove_type(self):
+    self.index.remove_type("Market")
+    self.assertEqual(self.matching(u"policy"), [("Control", 1)])
+
+  def test_compact(self):
+    self.index.remove("Control", 1)
+    self.index.compact()
+    self.assertEqual(len(self.index.alive), 1)
+    self.assertEqual(self.matching(u"policy"), [("Market", 2)])
+    self.assertNotIn(u"second", self.index.postings)
+
+  def test_pickle(self):
+    self.index.remove("Market", 2)
+    index = cPickle.loads(cPickle.dumps(self.index, cPickle.HIGHEST_PROTOCOL))
+    self.assertEqual(len(index), 2)
+    self.assertEqual(
+        sorted(index.document(doc_id)[:2]
+               for doc_id in index.match(inverted.tokenize(u"olic"))),
+        [("Control", 1)])
+    index.remove("Control", 1)
+    self.assertEqual(len(index), 0)
+
+
+class TestInvertedIndexer(unittest.TestCase):
+  """Tests for InvertedIndexer class."""
+  # pylint: disable=protected-access
+
+  def setUp(self):
+    self.session = MagicMock(info={})
+    patcher = patch.object(inverted.db, "session",
+                           return_value=self.session)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    settings = MagicMock(FULLTEXT_INDEX_PATH="")
+    self.indexers = [inverted.InvertedIndexer(settings) for _ in range(2)]
+
+  def matching(self, indexer, terms):
+    return sorted(doc[:2] for doc in indexer._match(terms))
+
+  def test_commit(self):
+    """Committed operations are applied to the indexer that wrote them."""
+    self.indexers[0].create_record(
+        Record(1, "Control", None, {"title": {"": u"Access policy"}}),
+        commit=False)
+    self.assertEqual(self.matching(self.indexers[0], u"policy"), [])
+    inverted._after_commit(self.session)
+    self.assertEqual(self.matching(self.indexers[0], u"policy"),
+                     [("Control", 1)])
+    self.assertEqual(self.matching(self.indexers[1], u"policy"), [])
+    self.assertEqual(self.session.info, {})
+
+  def test_rollback(self):
+    """Rolled back operations are dropped."""
+    self.indexers[0].create_record(
+        Record(1, "Control", None, {"title": {"": u"Access policy"}}),
+        commit=False)
+    inverted._after_rollback(self.session)
+    inverted._after_commit(self.session)
+    self.assertEqual(self.matching(self.indexers[0], u"policy"), [])
@@ -0,0 +1,116 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests and benchmark for permission filtering of JSON resources."""
+
+import copy
+import os
+import random
+import timeit
+import unittest
+
+import mock
+from ddt import ddt, data
+
+# pylint: disable=unused-import
+from ggrc import models  # NOQA
+from ggrc.rbac.permissions_provider import DefaultUserPermissions
+from ggrc.services import common
+
+
+class StaticPermissions(DefaultUserPermissions):
+  """User permissions from a static permissions dict."""
+
+  def __init__(self, permissions):
+    self.permissions = permissions
+
+  def _permissions(self):
+    return self.permissions
+
+
+PERMISSIONS = [
+    {},
+    {"__GGRC_ADMIN__": {"__GGRC_ALL__": {"contexts": [0]}}},
+    {"read": {"Control": {"contexts": [None]}}},
+    {"read": {"Control": {"contexts": [1, 2], "resources": [5, 7]},
+              "Person": {"contexts": [None]}}},
+    {"read": {"Market": {"resources": [1, 2, 3]},
+              "__GGRC_ALL__": {"contexts": [3]}}},
+    {"read": {"Control": {"contexts": [1]}},
+     "__GGRC_ADMIN__": {"__GGRC_ALL__": {"contexts": [2]}}},
+]
+
+
+def generate_resources(count, seed=0):
+  """Generate JSON resources with links to other objects."""
+  rand = random.Random(seed)
+
+  def stub(type_):
+    context_id = rand.choice([None, 0, 1, 2, 3])
+    return {
+        "type": type_,
+        "id": rand.randint(1, 10),
+        "context": {"id": context_id} if context_id is not None else None,
+    }
+
+  resources = []
+  for _ in range(count):
+    resource = stub(rand.choice(["Control", "Market"]))
+    resource["title"] = "title"
+    resource["modified_by"] = stub("Person")
+    resource["market"] = stub("Market")
+    resource["owners"] = [stub("Person")]
+    resources.append(resource)
+  return resources
+
+
+@ddt
+@mock.patch("ggrc.services.common._is_creator", return_value=False)
+class TestFilterResource(unittest.TestCase):
+  """Batched filtering gives the same results as filtering by object."""
+
+  @data(*PERMISSIONS)
+  def test_same_result(self, permissions, _):
+    """Resources are filtered the same way as object by object."""
+    user_permissions = StaticPermissions(permissions)
+    resources = generate_resources(200)
+    self.assertEqual(
+        common.filter_resource(copy.deepcopy(resources),
+                               user_permissions=user_permissions),
+        common.filter_resource_by_object(copy.deepcopy(resources),
+                                         user_permissions=user_permissions),
+    )
+
+  def test_filter_allowed_read(self, _):
+    """Batched read checks match single read checks."""
+    for permissions in PERMISSIONS:
+      user_permissions = StaticPermissions(permissions)
+      triples = {(type_, id_, context_id)
+                 for type_ in ("Control", "Market", "Person")
+                 for id_ in range(1, 10)
+                 for context_id in (None, 0, 1, 2, 3)}
+      self.assertEqual(
+          user_permissions.filter_allowed_read(triples),
+          {triple for triple in triples
+           if user_permissions.is_allowed_read(*triple)})
+
+
+@unittest.skipUnless(os.environ.get("GGRC_BENCHMARKS"),
+                     "Set GGRC_BENCHMARKS=1 to run benchmarks")
+@mock.patch("ggrc.services.common._is_creator", return_value=False)
+class BenchmarkFilterResource(unittest.TestCase):
+  """Compare speed of batched and object by object filtering."""
+
+  def test_benchmark(self, _):
+    """Print time of filtering a large collection with both filters."""
+    user_permissions = StaticPermissions(PERMISSIONS[3])
+    resources = generate_resources(5000)
+    for function in (common.filter_resource_by_object,
+                     common.filter_resource):
+      durations = []
+      for _ in range(3):
+        resources_copy = copy.deepcopy(resources)
+        start = timeit.default_timer()
+        function(resources_copy, user_permissions=user_permissions)
+        durations.append(timeit.default_timer() - start)
+      print "{}: {:.4f}s".format(function.__name__, min(durations))
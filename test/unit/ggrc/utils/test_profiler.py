@@ -0,0 +1,84 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the request profiler."""
+
+import unittest
+
+import flask
+import sqlalchemy
+
+from ggrc.utils import benchmark
+from ggrc.utils import profiler
+
+
+class TestHistogram(unittest.TestCase):
+  """Tests for histogram buckets."""
+
+  def test_cumulative(self):
+    """Values are counted in the first bucket they fit into."""
+    histogram = profiler.Histogram((1, 10))
+    for value in (0, 1, 2, 10, 11):
+      histogram.observe(value)
+    self.assertEqual(histogram.cumulative(),
+                     [(1, 2), (10, 4), ("+Inf", 5)])
+    self.assertEqual(histogram.sum, 24)
+    self.assertEqual(histogram.count, 5)
+
+
+class TestProfiler(unittest.TestCase):
+  """Tests for stats collected from requests."""
+
+  def setUp(self):
+    profiler.reset()
+    self.engine = sqlalchemy.create_engine("sqlite://")
+    self.app = flask.Flask(__name__)
+    profiler.init_app(self.app)
+
+    @self.app.route("/items/<int:count>")
+    def items(count):  # pylint: disable=unused-variable
+      with benchmark("Query items: {}".format(count)):
+        for _ in range(count):
+          self.engine.execute("SELECT 1").fetchall()
+      return "ok"
+
+    self.client = self.app.test_client()
+
+  def tearDown(self):
+    profiler.reset()
+
+  def test_stats(self):
+    """SQL statements and benchmark phases are collected per endpoint."""
+    self.client.get("/items/3")
+    self.client.get("/items/5")
+    self.client.get("/missing")
+    endpoints = {(item["method"], item["endpoint"]): item
+                 for item in profiler.get_stats()["endpoints"]}
+    self.assertItemsEqual(endpoints, [("GET", "/items/<int:count>"),
+                                      ("GET", profiler.UNMATCHED_ENDPOINT)])
+    stats = endpoints[("GET", "/items/<int:count>")]
+    self.assertEqual(stats["duration_seconds"]["count"], 2)
+    self.assertEqual(stats["sql_queries"]["sum"], 8)
+    self.assertEqual(stats["phases"].keys(), ["Query items: N"])
+    self.assertEqual(stats["phases"]["Query items: N"]["count"], 2)
+    missing = endpoints[("GET", profiler.UNMATCHED_ENDPOINT)]
+    self.assertEqual(missing["sql_queries"]["sum"], 0)
+
+  def test_no_request(self):
+    """Statements outside of requests are not counted."""
+    self.engine.execute("SELECT 1").fetchall()
+    with benchmark("Outside of request"):
+      pass
+    self.assertEqual(profiler.get_stats()["endpoints"], [])
+
+  def test_prometheus_text(self):
+    """Stats are exported as Prometheus histograms."""
+    self.client.get("/items/2")
+    lines = profiler.prometheus_text().splitlines()
+    self.assertIn("# TYPE ggrc_request_sql_queries histogram", lines)
+    self.assertIn(
+        'ggrc_request_sql_queries_bucket{method="GET",'
+        'endpoint="/items/<int:count>",le="2"} 1', lines)
+    self.assertIn(
+        'ggrc_request_phase_seconds_count{method="GET",'
+        'endpoint="/items/<int:count>",phase="Query items: N"} 1', lines)
@@ -93,3 +93,38 @@ class TestCaseInsensitiveDefDict(unittest.TestCase):
         sorted(self.ci_dict.lower_items()),
         sorted([("hello", "World"), ("foo", "BAR")])
     )
+
+
+class TestLRUCache(unittest.TestCase):
+  """Tests for bounded LRU cache."""
+
+  def setUp(self):
+    self.now = 0
+    self.cache = structures.LRUCache(2, ttl=10, timer=lambda: self.now)
+
+  def test_eviction(self):
+    """Least recently used item is evicted when the cache is full."""
+    self.cache["a"] = 1
+    self.cache["b"] = 2
+    self.assertEqual(self.cache["a"], 1)
+    self.cache["c"] = 3
+    self.assertEqual(sorted(self.cache.keys()), ["a", "c"])
+    self.assertNotIn("b", self.cache)
+    self.assertEqual(len(self.cache), 2)
+
+  def test_expiration(self):
+    """Expired items are treated as missing."""
+    self.cache["a"] = 1
+    self.now = 11
+    self.assertNotIn("a", self.cache)
+    self.assertIsNone(self.cache.get("a"))
+    self.cache["a"] = 2
+    self.assertEqual(self.cache["a"], 2)
+
+  def test_pop_and_clear(self):
+    self.cache["a"] = 1
+    self.cache["b"] = 2
+    self.assertEqual(self.cache.pop("a"), 1)
+    self.assertIsNone(self.cache.pop("a", None))
+    self.cache.clear()
+    self.assertEqual(len(self.cache), 0)